@@ -0,0 +1,98 @@
+"""
+CLI startup cost: what `rlcl` imports before it does anything, measured with
+`python -X importtime` in fresh interpreters.
+
+    python benchmarks/bench_import_time.py                 # exit 1 over budget
+    python benchmarks/bench_import_time.py --repeat 9 --top 15
+    python benchmarks/bench_import_time.py --budget-scale 2   # slow CI machine
+
+Each scenario runs --repeat times; the reported figure is the median import
+time added on top of a bare interpreter (`-c pass`), so `site` and the
+encodings are not counted. A scenario fails when that median exceeds its
+budget (times --budget-scale) or when it imports a module it must not:
+google.genai loads on the first Gemini request only, and the CLI entry
+points need neither numpy, PIL, ffmpeg nor rollcall.core. The module
+check is exact and machine independent; the budgets catch slow creep.
+--top lists the most expensive modules of the slowest scenario.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ("google.genai", "numpy", "PIL", "ffmpeg", "rollcall.core")
+
+# name -> (python args, budget in ms, modules that must not be imported)
+SCENARIOS: dict[str, tuple[list[str], float, tuple[str, ...]]] = {
+    "import rollcall":    (["-c", "import rollcall"], 60, HEAVY),
+    "import cli":         (["-c", "import rollcall.cli"], 250, HEAVY),
+    "rlcl --help":        (["-m", "rollcall.cli", "--help"], 400, HEAVY),  # typer's rich help is ~130 ms of it
+    "rlcl status --help": (["-m", "rollcall.cli", "status", "--help"], 400, HEAVY),
+    "import core":        (["-c", "import rollcall.core"], 600, ("google.genai",)),
+}
+
+
+def importtime(args: list[str]) -> list[tuple[int, int, str]]:
+    """(depth, cumulative µs, module) for every import `python args` makes."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True, check=False,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        rows.append(((len(name) - len(stripped) - 1) // 2, int(cumulative), stripped))
+    return rows
+
+
+def total_ms(rows: list[tuple[int, int, str]]) -> float:
+    return sum(c for depth, c, _ in rows if depth == 0) / 1000
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget (slow machines).")
+    ap.add_argument("--top", type=int, default=10, help="Most expensive modules to list (0 = none).")
+    ap.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Run these scenarios only.")
+    args = ap.parse_args(argv)
+
+    base = statistics.median(total_ms(importtime(["-c", "pass"])) for _ in range(args.repeat))
+    ok, slowest = True, None
+    print(f"{'scenario':<20} {'median':>9} {'budget':>9}  verdict")
+    for name, (py_args, budget, forbidden) in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        runs = [importtime(py_args) for _ in range(args.repeat)]
+        ms = statistics.median(total_ms(r) for r in runs) - base
+        budget *= args.budget_scale
+        loaded = {mod for _, _, mod in runs[0]}
+        bad = [m for m in forbidden if m in loaded]
+        verdict = "ok"
+        if bad:
+            verdict = "imports " + ", ".join(bad)
+        elif ms > budget:
+            verdict = "over budget"
+        ok = ok and verdict == "ok"
+        print(f"{name:<20} {ms:>7.1f}ms {budget:>7.0f}ms  {verdict}")
+        if slowest is None or ms > slowest[1]:
+            slowest = (name, ms, runs[0])
+
+    if args.top and slowest:
+        name, _, rows = slowest
+        print(f"\nslowest imports in {name!r} (cumulative ms):")
+        for depth, c, mod in sorted(rows, key=lambda r: -r[1])[:args.top]:
+            print(f"  {c / 1000:8.1f}  {'  ' * depth}{mod}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
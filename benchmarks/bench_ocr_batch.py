@@ -0,0 +1,125 @@
+"""
+Compare per-frame OCR against batched OCR (image parts / contact sheet) on a
+directory of credit frames: requests, prompt/output tokens, wall time, and how
+many key→value pairs each variant recovers.
+
+    python benchmarks/bench_ocr_batch.py frames/ --batch-sizes 1 2 4 8
+    python benchmarks/bench_ocr_batch.py frames/ --fake --latency 0.8 --json out.json
+
+Frames are any .png/.jpg files (e.g. from `rlcl --no-stream`, or ffmpeg -vf fps=1).
+Results are never cached, so every variant pays for its own requests.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.config import GeminiConfig  # noqa: E402
+from rollcall.services.ocr_pairs import BATCH_MODES, OCRService  # noqa: E402
+from rollcall.services.requester import GeminiRequester  # noqa: E402
+
+
+class CountingRequester(GeminiRequester):
+    """GeminiRequester that tallies requests and usage_metadata tokens."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._count_lock = threading.Lock()
+
+    async def agenerate_content(self, **kwargs):
+        resp = await super().agenerate_content(**kwargs)
+        usage = getattr(resp, "usage_metadata", None)
+        with self._count_lock:
+            self.requests += 1
+            self.prompt_tokens += int(getattr(usage, "prompt_token_count", 0) or 0)
+            self.output_tokens += int(getattr(usage, "candidates_token_count", 0) or 0)
+        return resp
+
+
+def load_frames(directory: Path, limit: int) -> list[Path]:
+    frames = sorted(p for p in directory.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+    return frames[:limit] if limit else frames
+
+
+def run_variant(client, model: str, frames: list[Path], batch: int, mode: str, args) -> dict:
+    requester = CountingRequester(client, max_concurrency=1, max_retries=args.max_retries)
+    ocr = OCRService(client, model, requester=requester)
+    pairs: set[tuple[str, str]] = set()
+    t0 = time.perf_counter()
+    try:
+        for start in range(0, len(frames), batch):
+            chunk = frames[start:start + batch]
+            if batch == 1:
+                results = [ocr.extract_pairs(chunk[0], max_tokens=args.max_tokens)]
+            else:
+                results = ocr.extract_pairs_batch(chunk, max_tokens=args.max_tokens, mode=mode)
+            for res in results:
+                for e in res.get("entries", []):
+                    for v in e.get("values", []):
+                        pairs.add((e["key"].casefold(), v.casefold()))
+    finally:
+        requester.close()
+    return {
+        "variant": "single" if batch == 1 else f"{mode}x{batch}",
+        "frames": len(frames),
+        "requests": requester.requests,
+        "prompt_tokens": requester.prompt_tokens,
+        "output_tokens": requester.output_tokens,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "pairs": len(pairs),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("frames", type=Path, help="Directory of credit frame images.")
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--modes", nargs="+", default=list(BATCH_MODES), choices=BATCH_MODES)
+    ap.add_argument("--limit", type=int, default=0, help="Only use the first N frames.")
+    ap.add_argument("--max-tokens", type=int, default=768)
+    ap.add_argument("--max-retries", type=int, default=5)
+    ap.add_argument("--model", default=GeminiConfig().model_name)
+    ap.add_argument("--fake", action="store_true", help="Use the offline FakeClient instead of the API.")
+    ap.add_argument("--latency", type=float, default=0.5, help="Per-request latency for --fake.")
+    ap.add_argument("--json", type=Path, help="Also write results to this file.")
+    args = ap.parse_args(argv)
+
+    frames = load_frames(args.frames, args.limit)
+    if not frames:
+        print(f"No frames found in {args.frames}", file=sys.stderr)
+        return 1
+
+    if args.fake:
+        from rollcall.services.fake_client import FakeClient
+        make = lambda: FakeClient(latency=args.latency)  # noqa: E731
+    else:
+        from rollcall.services.genai_client import make_client
+        client = make_client()
+        make = lambda: client  # noqa: E731
+
+    rows = []
+    for batch in sorted(set(args.batch_sizes)):
+        for mode in (args.modes[:1] if batch == 1 else args.modes):
+            rows.append(run_variant(make(), args.model, frames, batch, mode, args))
+            r = rows[-1]
+            print(
+                f"{r['variant']:>10}  requests={r['requests']:<4} prompt_tok={r['prompt_tokens']:<7} "
+                f"out_tok={r['output_tokens']:<6} {r['seconds']:>7.2f}s  pairs={r['pairs']}"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
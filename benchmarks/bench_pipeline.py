@@ -0,0 +1,440 @@
+"""
+End-to-end throughput of `process_media_directory` on a synthetic corpus
+(see synth_credits.py), against an offline Gemini stand-in by default.
+
+    python benchmarks/bench_pipeline.py                                   # 8 videos, fake API
+    python benchmarks/bench_pipeline.py --latency 0.8 --server-rpm 60 --rpm 60
+    python benchmarks/bench_pipeline.py --save baseline.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --tolerance 0.1
+    python benchmarks/bench_pipeline.py --real                            # real API, spends quota
+
+Reports videos/min, busy time per stage (ffprobe, credits locate, frame
+extract, text precheck, OCR, refine; summed over threads, so stages that
+overlap can add up to more than the wall time; OCR and refine include
+request latency and rate-limit waits, extract excludes waiting for the
+consumer to free a frame buffer), requests, 429 rejections,
+bytes uploaded, tokens and peak RSS. Every run works on a fresh copy of the
+corpus with the OCR cache and journal off, so runs are comparable.
+
+The fake backend answers OCR with credits drawn deterministically from the
+corpus (keyed by the uploaded bytes) and refine with the title whose director
+appears in them. It models latency and quota, not reading: `titles_found` is
+only meaningful with --real.
+
+--save writes the metrics as a JSON baseline; --compare exits 1 when a metric
+is worse than the baseline by more than --tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import rollcall.core as core  # noqa: E402
+from rollcall.config import CacheConfig, GeminiConfig, OCRConfig, PipelineConfig, default_cache_dir  # noqa: E402
+from rollcall.services.fake_client import FakeClient, batch_size, is_batch_request  # noqa: E402
+from rollcall.services.guess import GuesserService  # noqa: E402
+from rollcall.services.ocr_pairs import OCRService  # noqa: E402
+from rollcall.services.ratelimit import error_code  # noqa: E402
+from rollcall.utils.ffmpeg_utils import FramePool  # noqa: E402
+
+from synth_credits import make_corpus, parse_size  # noqa: E402  (sibling script)
+
+STAGES = ("ffprobe", "locate", "extract", "precheck", "ocr", "refine")
+
+# metric -> True if higher is better; everything else in a report is informational
+COMPARED = {
+    "videos_per_min": True,
+    "wall_s": False,
+    "requests": False,
+    "bytes_uploaded": False,
+    "prompt_tokens": False,
+    "peak_rss_mb": False,
+    **{f"stage_s.{s}": False for s in STAGES},
+}
+
+
+# ---- fake backend ------------------------------------------------------------
+
+def corpus_responder(manifest: dict):
+    """Responder for FakeClient: deterministic OCR/refine answers drawn from the corpus credits."""
+    pool = [(role, name) for v in manifest["videos"].values() for role, names in v["credits"] for name in names]
+    directors = {
+        name: v["title"]
+        for v in manifest["videos"].values() for role, names in v["credits"] if role == "Directed by" for name in names
+    }
+
+    def read(raw: bytes) -> list[dict]:
+        rng = random.Random(hashlib.sha256(raw).digest())
+        entries: dict[str, list[str]] = {}
+        for role, name in rng.sample(pool, min(len(pool), rng.randrange(1, 4))):
+            entries.setdefault(role, []).append(name)
+        return [{"key": k, "values": v} for k, v in entries.items()]
+
+    def respond(model: str, contents: list, config) -> str:
+        if getattr(config, "tools", None):
+            return "UNKNOWN_TITLE"
+        images = [c.inline_data.data for c in contents if getattr(c, "inline_data", None) is not None]
+        if is_batch_request(config):
+            if len(images) == 1:  # contact sheet: one image standing for several frames
+                images = [images[0] + bytes([i]) for i in range(batch_size(contents))]
+            return json.dumps({"frames": [{"frame": i + 1, "entries": read(raw)} for i, raw in enumerate(images)]})
+        if images:
+            return json.dumps({"entries": read(images[0])})
+        credits = json.loads(contents[1]).get("credits", {})
+        for name in credits.get("Directed by", []):
+            if name in directors:
+                return json.dumps({"title": directors[name]})
+        return json.dumps({"title": "UNKNOWN_TITLE"})
+
+    return respond
+
+
+# ---- measurement -------------------------------------------------------------
+
+class CountingClient:
+    """Wraps a genai-shaped client; tallies requests, errors, uploaded bytes and usage tokens."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.requests = self.errors_429 = self.bytes_uploaded = 0
+        self.prompt_tokens = self.output_tokens = 0
+        self._lock = threading.Lock()
+        self.models = _CountingModels(self, inner.models)
+        aio = getattr(inner, "aio", None)
+        self.aio = _CountingAio(self, aio.models) if aio is not None else None
+
+    def _before(self, contents) -> None:
+        contents = contents if isinstance(contents, (list, tuple)) else [contents]
+        size = sum(len(c.inline_data.data or b"") for c in contents if getattr(c, "inline_data", None) is not None)
+        with self._lock:
+            self.requests += 1
+            self.bytes_uploaded += size
+
+    def _after(self, resp=None, error: BaseException | None = None) -> None:
+        with self._lock:
+            if error is not None:
+                self.errors_429 += error_code(error) == 429
+                return
+            usage = getattr(resp, "usage_metadata", None)
+            self.prompt_tokens += int(getattr(usage, "prompt_token_count", 0) or 0)
+            self.output_tokens += int(getattr(usage, "candidates_token_count", 0) or 0)
+
+
+class _CountingModels:
+    def __init__(self, owner: CountingClient, models):
+        self._owner, self._models = owner, models
+
+    def generate_content(self, **kwargs):
+        self._owner._before(kwargs.get("contents"))
+        try:
+            resp = self._models.generate_content(**kwargs)
+        except Exception as e:
+            self._owner._after(error=e)
+            raise
+        self._owner._after(resp)
+        return resp
+
+
+class _CountingAsyncModels(_CountingModels):
+    async def generate_content(self, **kwargs):
+        self._owner._before(kwargs.get("contents"))
+        try:
+            resp = await self._models.generate_content(**kwargs)
+        except Exception as e:
+            self._owner._after(error=e)
+            raise
+        self._owner._after(resp)
+        return resp
+
+
+class _CountingAio:
+    def __init__(self, owner: CountingClient, models):
+        self.models = _CountingAsyncModels(owner, models)
+
+
+class StageTimer:
+    """
+    Patches the pipeline's stage entry points for the duration of a `with`
+    block and sums wall time per stage across threads. Nested calls of the
+    same stage on one thread (e.g. a batch falling back to single frames)
+    are counted once.
+    """
+
+    def __init__(self):
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patches: list[tuple[object, str, object]] = []
+
+    def _add(self, stage: str, dt: float, calls: int = 1) -> None:
+        with self._lock:
+            self.seconds[stage] += dt
+            self.calls[stage] += calls
+
+    def _wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            depth = getattr(self._local, stage, 0)
+            setattr(self._local, stage, depth + 1)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                setattr(self._local, stage, depth)
+                if depth == 0:
+                    self._add(stage, time.perf_counter() - t0)
+        return timed
+
+    def _wrap_iter(self, stage: str, fn):
+        # streaming decode happens lazily, so time each frame pulled from the
+        # generator, minus time spent blocked on a free FramePool buffer (that
+        # is back-pressure from OCR, not decoding)
+        def timed(*args, **kwargs):
+            self._add(stage, 0.0)
+            frames = fn(*args, **kwargs)
+            try:
+                while True:
+                    self._local.blocked = 0.0
+                    t0 = time.perf_counter()
+                    try:
+                        frame = next(frames)
+                    except StopIteration:
+                        return
+                    finally:
+                        self._add(stage, time.perf_counter() - t0 - self._local.blocked, calls=0)
+                    yield frame
+            finally:
+                frames.close()
+        return timed
+
+    def _wrap_wait(self, fn):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.blocked = getattr(self._local, "blocked", 0.0) + time.perf_counter() - t0
+        return timed
+
+    def _patch(self, owner, attr: str, wrapper) -> None:
+        original = getattr(owner, attr)
+        self._patches.append((owner, attr, original))
+        setattr(owner, attr, wrapper(original))
+
+    def __enter__(self) -> "StageTimer":
+        self._patch(core, "_probe_media", lambda f: self._wrap("ffprobe", f))
+        self._patch(core, "_locate_credits", lambda f: self._wrap("locate", f))
+        self._patch(core, "_extract_frames", lambda f: self._wrap("extract", f))
+        self._patch(core, "_stream_frames", lambda f: self._wrap_iter("extract", f))
+        self._patch(FramePool, "acquire", self._wrap_wait)
+        self._patch(core.MediaProcessor, "_has_text", lambda f: self._wrap("precheck", f))
+        self._patch(OCRService, "extract_pairs", lambda f: self._wrap("ocr", f))
+        self._patch(OCRService, "extract_pairs_batch", lambda f: self._wrap("ocr", f))
+        self._patch(GuesserService, "refine_title", lambda f: self._wrap("refine", f))
+        self._patch(GuesserService, "search_fallback", lambda f: self._wrap("refine", f))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches.clear()
+
+
+def peak_rss_mb(who: int) -> float | None:
+    if resource is None:
+        return None
+    kb = resource.getrusage(who).ru_maxrss
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB on Linux
+
+
+# ---- run / report ------------------------------------------------------------
+
+def ensure_corpus(args) -> tuple[Path, dict]:
+    w, h = args.size
+    corpus = args.corpus or default_cache_dir() / f"bench-corpus-n{args.n}-d{args.duration:g}-{w}x{h}-s{args.seed}"
+    manifest_path = corpus / "manifest.json"
+    if not manifest_path.exists():
+        print(f"Generating {args.n} synthetic videos in {corpus} ...")
+        make_corpus(corpus, args.n, seed=args.seed, duration=args.duration, credits_sec=args.credits_sec, size=args.size)
+    return corpus, json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def make_bench_client(args, manifest: dict):
+    if args.real:
+        from rollcall.services.genai_client import make_client
+        return make_client()
+    return FakeClient(
+        corpus_responder(manifest), latency=args.latency, jitter=args.jitter, rpm=args.server_rpm, seed=args.seed,
+    )
+
+
+def run(args, corpus: Path, manifest: dict) -> dict:
+    client = CountingClient(make_bench_client(args, manifest))
+    ocr_cfg = OCRConfig(**json.loads(args.ocr_cfg)) if args.ocr_cfg else OCRConfig()
+    with tempfile.TemporaryDirectory(prefix="rollcall_bench_") as tmp:
+        work = Path(tmp)
+        for name in manifest["videos"]:
+            shutil.copy2(corpus / name, work / name)  # renames happen on the copy
+
+        with StageTimer() as timer:
+            t0 = time.perf_counter()
+            core.process_media_directory(
+                work,
+                ocr_cfg=ocr_cfg,
+                gemini_cfg=GeminiConfig(rpm=args.rpm, max_concurrency=args.max_concurrency),
+                pipeline_cfg=PipelineConfig(
+                    workers=args.workers, extract_workers=args.extract_workers, ocr_concurrency=args.ocr_concurrency,
+                ),
+                client=client,
+                cache_cfg=CacheConfig(enabled=False),
+                use_journal=False,
+                use_search=args.use_search,
+                verbose=args.verbose,
+            )
+            wall = time.perf_counter() - t0
+        found = {p.stem for p in work.iterdir()}
+
+    videos = len(manifest["videos"])
+    return {
+        "videos": videos,
+        "wall_s": round(wall, 3),
+        "videos_per_min": round(videos * 60 / wall, 2) if wall else None,
+        "stage_s": {s: round(timer.seconds.get(s, 0.0), 3) for s in STAGES},
+        "stage_calls": {s: timer.calls.get(s, 0) for s in STAGES},
+        "requests": client.requests,
+        "errors_429": client.errors_429,
+        "bytes_uploaded": client.bytes_uploaded,
+        "prompt_tokens": client.prompt_tokens,
+        "output_tokens": client.output_tokens,
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "peak_rss_children_mb": peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        "titles_found": sum(v["title"] in found for v in manifest["videos"].values()),
+    }
+
+
+def print_report(m: dict) -> None:
+    print(f"{m['videos']} videos in {m['wall_s']:.1f}s  ({m['videos_per_min']} videos/min)")
+    print("stage busy time (summed over threads):")
+    for s in STAGES:
+        print(f"  {s:<9}{m['stage_s'][s]:>9.2f}s  {m['stage_calls'][s]:>6} call(s)")
+    print(f"requests {m['requests']} ({m['errors_429']} rejected with 429), "
+          f"{m['bytes_uploaded'] / 1024:.0f} KiB uploaded, "
+          f"{m['prompt_tokens']} prompt / {m['output_tokens']} output tokens")
+    print(f"peak RSS {m['peak_rss_mb']} MB (ffmpeg children {m['peak_rss_children_mb']} MB), "
+          f"titles found {m['titles_found']}/{m['videos']}")
+
+
+def _get(metrics: dict, dotted: str):
+    for part in dotted.split("."):
+        metrics = metrics.get(part) if isinstance(metrics, dict) else None
+    return metrics
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float, run_args: dict) -> bool:
+    """Print deltas against `baseline`; False if any compared metric regressed past `tolerance`."""
+    ok = True
+    print(f"vs baseline {baseline['meta'].get('version')} ({baseline['meta'].get('date')}):")
+    old_args = baseline["meta"].get("args", {})
+    differ = sorted(k for k in set(old_args) | set(run_args) if old_args.get(k) != run_args.get(k))
+    if differ:
+        print(f"  note: baseline was recorded with different {', '.join(differ)}; deltas may not be like for like")
+    for name, higher_is_better in COMPARED.items():
+        new, old = _get(metrics, name), _get(baseline["metrics"], name)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        ok = ok and not flag
+        print(f"  {name:<18}{old:>12g} -> {new:<12g}{change:+8.1%}  {flag}")
+    return ok
+
+
+def version() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=Path(__file__).resolve().parents[1],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus = ap.add_argument_group("corpus")
+    corpus.add_argument("--corpus", type=Path, help="Corpus directory (generated if it has no manifest.json).")
+    corpus.add_argument("-n", type=int, default=8, help="Videos to generate.")
+    corpus.add_argument("--duration", type=float, default=240.0)
+    corpus.add_argument("--credits-sec", type=float, default=60.0)
+    corpus.add_argument("--size", type=parse_size, default=(1280, 720))
+    corpus.add_argument("--seed", type=int, default=1)
+    backend = ap.add_argument_group("backend")
+    backend.add_argument("--real", action="store_true", help="Use the real Gemini API (GEMINI_API_KEY).")
+    backend.add_argument("--latency", type=float, default=0.5, help="Fake: seconds per request.")
+    backend.add_argument("--jitter", type=float, default=0.3, help="Fake: extra random latency, up to this many seconds.")
+    backend.add_argument("--server-rpm", type=int, default=0, help="Fake: quota enforced with 429s (0 = unlimited).")
+    run_opts = ap.add_argument_group("pipeline")
+    run_opts.add_argument("--rpm", type=int, default=0, help="Client-side request budget (rlcl --rpm).")
+    run_opts.add_argument("--max-concurrency", type=int, default=8)
+    run_opts.add_argument("--workers", type=int, default=4)
+    run_opts.add_argument("--extract-workers", type=int, default=2)
+    run_opts.add_argument("--ocr-concurrency", type=int, default=4)
+    run_opts.add_argument("--ocr-cfg", help='OCRConfig overrides as JSON, e.g. \'{"ocr_lookahead": 4}\'.')
+    run_opts.add_argument("--use-search", action="store_true")
+    run_opts.add_argument("--verbose", action="store_true", help="Show the pipeline's own per-file output.")
+    out = ap.add_argument_group("baselines")
+    out.add_argument("--save", type=Path, help="Write metrics as a JSON baseline.")
+    out.add_argument("--compare", type=Path, help="Compare against a JSON baseline; exit 1 on regression.")
+    out.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%).")
+    args = ap.parse_args(argv)
+
+    corpus_dir, manifest = ensure_corpus(args)
+    metrics = run(args, corpus_dir, manifest)
+    print_report(metrics)
+
+    # options that shape the run (not where results go), JSON-friendly
+    run_args = {
+        k: (str(v) if isinstance(v, Path) else list(v) if isinstance(v, tuple) else v)
+        for k, v in vars(args).items() if k not in ("save", "compare", "tolerance", "verbose")
+    }
+    if args.save:
+        meta = {
+            "version": version(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": run_args,
+        }
+        args.save.write_text(json.dumps({"meta": meta, "metrics": metrics}, indent=2))
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        if not args.compare.exists():
+            print(f"No baseline at {args.compare}", file=sys.stderr)
+            return 2
+        baseline = json.loads(args.compare.read_text())
+        return 0 if compare(metrics, baseline, args.tolerance, run_args) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
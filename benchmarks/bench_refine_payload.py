@@ -0,0 +1,103 @@
+"""
+Refine payload size and signal retention: the old per-key alphabetical trim
+(`map_trim`, 12 values per key) against `build_payload` at a few token budgets.
+
+    python benchmarks/bench_refine_payload.py
+    python benchmarks/bench_refine_payload.py --crew 300 --budgets 200 400 800
+
+Credits maps are synthetic (synth_credits.make_credits plus `--crew` low-signal
+roles), read through a noisy "OCR": headings in varying case and aliases
+("DIRECTED BY", "Director"), and names with digit-for-letter and "rn"/"m"
+confusions. "signal" is the share of director, writer and cast names that
+reach the payload (any spelling); "dupes" counts extra spellings sent for
+names already present.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.merge import map_trim  # noqa: E402
+from rollcall.payload import _name_form, build_payload, payload_tokens  # noqa: E402
+
+from synth_credits import make_credits  # noqa: E402  (sibling script)
+
+ALIASES = {
+    "Directed by": ["Directed by", "DIRECTED BY", "Director", "A Film by"],
+    "Screenplay by": ["Screenplay by", "SCREENPLAY BY", "Screenplay"],
+    "Music by": ["Music by", "MUSIC", "Original Score by"],
+}
+CREW = ["Key Grip", "Best Boy Electric", "Catering", "Driver", "Payroll Accountant", "Set Dresser",
+        "Boom Operator", "Location Manager", "Assistant Editor", "Stunt Coordinator", "Colorist"]
+SIGNAL_ROLES = ("Directed by", "Screenplay by")
+
+
+def noisy(name: str, rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.15:
+        return name.upper()
+    if r < 0.25:
+        return name.replace("o", "0", 1)
+    if r < 0.3:
+        return name.replace("m", "rn", 1)
+    return name
+
+
+def ocr_map(rng: random.Random, crew: int) -> tuple[dict[str, set[str]], set[str]]:
+    """(credits map as OCR would accumulate it, folded names that identify the title)"""
+    title, year, credits = make_credits(rng)
+    out: dict[str, set[str]] = {}
+    signal: set[str] = set()
+    for role, names in credits:
+        is_cast = " the " in role  # synth_credits cast rows: "Jane the Pilot" -> actor
+        if role in SIGNAL_ROLES or is_cast:
+            signal.update(_name_form(n) for n in names)
+        for _ in range(rng.randrange(1, 4)):  # the same card read from several frames
+            key = rng.choice(ALIASES.get(role, [role]))
+            out.setdefault(key, set()).update(noisy(n, rng) for n in names)
+    for i in range(crew):
+        role = f"{rng.choice(CREW)} {i // len(CREW) + 1}" if i >= len(CREW) else CREW[i]
+        out.setdefault(role, set()).update(f"{rng.choice('ABCDEFG')}. Crewperson{i}" for _ in range(rng.randrange(1, 3)))
+    return out, signal
+
+
+def score(payload: dict[str, list[str]], signal: set[str]) -> tuple[float, int]:
+    sent = [_name_form(v) for vs in payload.values() for v in vs]
+    kept = signal & set(sent)
+    dupes = sum(1 for f in sent if f in signal) - len(kept)
+    return len(kept) / len(signal) if signal else 1.0, dupes
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=50, help="Credits maps to generate.")
+    ap.add_argument("--crew", type=int, default=150, help="Low-signal crew roles per map.")
+    ap.add_argument("--seed", type=int, default=3)
+    ap.add_argument("--budgets", type=int, nargs="+", default=[200, 400, 800])
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    maps = [ocr_map(rng, args.crew) for _ in range(args.n)]
+    variants = [("map_trim(12)", lambda m: map_trim(m, per_key=12))]
+    variants += [(f"build_payload({b})", lambda m, b=b: build_payload(m, budget=b)) for b in args.budgets]
+
+    print(f"{args.n} maps, {args.crew} crew roles each")
+    for name, build in variants:
+        t0 = time.perf_counter()
+        payloads = [build(m) for m, _ in maps]
+        ms = (time.perf_counter() - t0) * 1000 / len(maps)
+        tokens = sum(payload_tokens(p) for p in payloads) / len(payloads)
+        scores = [score(p, sig) for p, (_, sig) in zip(payloads, maps)]
+        signal = sum(s for s, _ in scores) / len(scores)
+        dupes = sum(d for _, d in scores) / len(scores)
+        print(f"{name:<20} ~{tokens:>7.0f} tok  signal={signal:.3f}  dupes={dupes:5.1f}  {ms:6.2f} ms/map")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""
+Recall vs frames for adaptive sampling (`--sampling adaptive`) against uniform
+`--fps`, on the synthetic corpus (see synth_credits.py), where the time every
+credited name is on screen is known. No API calls.
+
+    python benchmarks/bench_sampling.py
+    python benchmarks/bench_sampling.py --corpus corpus/ --fps 1/3 1/2 1 --coarse 4 6 8
+
+Each video is sampled from 10 s before its credits to the end, and frames go
+through the pipeline's precheck and dedup. Reported per setting and credit
+style (scroll/cards):
+
+- decoded: frames decoded (stream + seeks);
+- ocr: frames that would be sent to OCR;
+- recall: share of credited names fully on screen in at least one OCR'd frame;
+- secs: wall time to decode and precheck.
+
+The early stop is off (every window is read to the end), so this measures
+what each sampler can see, not where a run would stop.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.config import OCRConfig, default_cache_dir  # noqa: E402
+from rollcall.sampling import AdaptiveSampler  # noqa: E402
+from rollcall.utils.ffmpeg_utils import FramePool, stream_frames  # noqa: E402
+from rollcall.utils.image_utils import FrameDeduper, image_has_text, text_likelihood  # noqa: E402
+
+from synth_credits import _lines, make_corpus, parse_size  # noqa: E402  (sibling script)
+
+LEAD_IN = 10.0  # seconds of feature sampled before the credits
+# encoded card changes land a few frames off their nominal times; the 0.5 s
+# blank between cards never passes the precheck, so the slack is safe
+CARD_SLACK = 0.5
+
+
+# ---- ground truth ----------------------------------------------------------------
+
+def _spans(meta: dict, manifest: dict) -> list[tuple[tuple[str, str], float, float]]:
+    """((role, name), first, last) seconds during which each credited name is fully on screen."""
+    w, h = manifest["size"]
+    start, length = meta["credits_start"], manifest["credits_sec"]
+    title = meta["title"].rsplit(" (", 1)[0]
+    credits = [(role, names) for role, names in meta["credits"]]
+    out = []
+    if meta["style"] == "cards":
+        # mirrors synth_credits.render_cards (per_card=2) and encode's overlay timing
+        groups = [credits[i:i + 2] for i in range(0, len(credits), 2)]
+        each = length / (len(groups) + 1)
+        for k, group in enumerate(groups, start=1):
+            for role, names in group:
+                a, b = start + k * each - CARD_SLACK, start + (k + 1) * each - 0.5 + CARD_SLACK
+                out += [((role, n), a, b) for n in names]
+        return out
+    # mirrors synth_credits.render_scroll and the overlay's y = H - t*speed
+    fs = h // 28
+    lines = _lines(title, credits)
+    speed = (h + int(len(lines) * fs * 1.6) + fs) / length
+    role = ""
+    for i, (line_role, name) in enumerate(lines[1:], start=1):
+        role = line_role or role
+        if name:
+            y = i * int(fs * 1.6)
+            out.append(((role, name), start + (y + fs) / speed, start + (y + h) / speed))
+    return out
+
+
+def visible(spans, t: float) -> set[tuple[str, str]]:
+    return {item for item, a, b in spans if a <= t <= b}
+
+
+# ---- samplers ---------------------------------------------------------------------
+
+def sample(path: Path, meta: dict, manifest: dict, setting: tuple[str, str], cfg: OCRConfig) -> dict:
+    size = tuple(manifest["size"])
+    start = max(0.0, meta["credits_start"] - LEAD_IN)
+    pool = FramePool(size, 4)
+    kind, value = setting
+    if kind == "uniform":
+        # exact: frame k at start + k/fps, so its timestamp is known (the pipeline's
+        # uniform stream samples the same rate, half an interval later)
+        frames, step = stream_frames(path, start, value, size, exact=True, pool=pool), float(1 / Fraction(value))
+        sampler = None
+    else:
+        sampler = AdaptiveSampler(path, start, None, manifest["duration"], size, cfg, pool=pool)
+        frames = iter(sampler)
+    spans = _spans(meta, manifest)
+    dedup = FrameDeduper(max_distance=cfg.dedup_distance, scroll_crop=False)
+    decoded = sent = 0
+    seen: set = set()
+    t0 = time.perf_counter()
+    try:
+        for k, frame in enumerate(frames):
+            decoded += 1
+            t = sampler.times[k] if sampler is not None else start + k * step
+            keep = image_has_text(frame, cfg.variation_threshold) and text_likelihood(frame).score >= cfg.text_threshold
+            if keep and not dedup.check(frame).skip:
+                sent += 1
+                seen |= visible(spans, t)
+            pool.release(frame)
+    finally:
+        frames.close()
+    return {
+        "decoded": decoded, "ocr": sent, "seen": len(seen), "names": len({item for item, _, _ in spans}),
+        "secs": time.perf_counter() - t0,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", type=Path, help="Corpus directory (generated if it has no manifest.json).")
+    ap.add_argument("-n", type=int, default=8, help="Videos to generate.")
+    ap.add_argument("--duration", type=float, default=240.0)
+    ap.add_argument("--credits-sec", type=float, default=60.0)
+    ap.add_argument("--size", type=parse_size, default=(1280, 720))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--fps", nargs="+", default=["1/3", "1/2", "1"], help="Uniform settings (ffmpeg fps expressions).")
+    ap.add_argument("--coarse", nargs="+", type=float, default=[6.0, 4.0], help="Adaptive coarse steps (s).")
+    ap.add_argument("--fine", type=float, default=1.5, help="Adaptive fine step (s).")
+    ap.add_argument("--max-frames", type=int, default=120, help="Adaptive frame budget per video.")
+    ap.add_argument("--dedup-distance", type=int, default=OCRConfig().dedup_distance, help="As rlcl --dedup-distance.")
+    ap.add_argument("--json", type=Path, help="Also write the results as JSON.")
+    args = ap.parse_args(argv)
+
+    w, h = args.size
+    corpus = args.corpus or default_cache_dir() / f"bench-corpus-n{args.n}-d{args.duration:g}-{w}x{h}-s{args.seed}"
+    if not (corpus / "manifest.json").exists():
+        print(f"Generating {args.n} synthetic videos in {corpus} ...")
+        make_corpus(corpus, args.n, seed=args.seed, duration=args.duration, credits_sec=args.credits_sec, size=args.size)
+    manifest = json.loads((corpus / "manifest.json").read_text(encoding="utf-8"))
+
+    settings = [("uniform", f) for f in args.fps] + [("adaptive", f"{c:g}") for c in args.coarse]
+    results: dict[str, dict[str, dict]] = {}
+    print(f"{'setting':<16}{'style':<8}{'decoded':>9}{'ocr':>7}{'recall':>9}{'secs':>8}")
+    for kind, value in settings:
+        cfg = OCRConfig(dedup_distance=args.dedup_distance)
+        if kind == "adaptive":
+            cfg.coarse_step_sec, cfg.fine_step_sec, cfg.max_frames = float(value), args.fine, args.max_frames
+        label = f"fps {value}" if kind == "uniform" else f"adaptive {value}s"
+        by_style: dict[str, dict] = {}
+        for name, meta in manifest["videos"].items():
+            r = sample(corpus / name, meta, manifest, (kind, value), cfg)
+            total = by_style.setdefault(meta["style"], dict.fromkeys(r, 0))
+            for k, v in r.items():
+                total[k] += v
+        for style, r in sorted(by_style.items()):
+            print(f"{label:<16}{style:<8}{r['decoded']:>9}{r['ocr']:>7}{r['seen'] / max(1, r['names']):>9.1%}{r['secs']:>8.1f}")
+        results[label] = by_style
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
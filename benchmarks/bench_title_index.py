@@ -0,0 +1,166 @@
+"""
+Offline title index: build time, lookup latency and how often a lookup can
+stand in for refine, on a synthetic IMDb-style catalog.
+
+    python benchmarks/bench_title_index.py
+    python benchmarks/bench_title_index.py --films 20000 --series 200 --queries 1000
+
+The catalog (films plus series with episodes, people drawn with a skewed
+popularity so some names are on hundreds of titles) is written as
+title.basics/title.episode/name.basics/title.crew/title.principals TSVs and
+indexed with `build_index`. Queries are credits maps of random titles as OCR
+would read them (a partial set of roles, headings and names with OCR noise).
+"hit" means the index answered alone; "correct" is the share of those answers
+that match the catalog title; "in top 5" covers the ambiguous lookups that
+refine receives as hints.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.title_index import TitleIndex, build_index  # noqa: E402
+
+from bench_refine_payload import ALIASES, noisy  # noqa: E402  (sibling script)
+from synth_credits import FIRST, LAST, TITLE_WORDS  # noqa: E402
+
+CREW_ROLES = [("director", "Directed by", 1), ("writer", "Screenplay by", 2), ("producer", "Produced by", 2),
+              ("composer", "Music by", 1), ("editor", "Edited by", 1), ("cinematographer", "Director of Photography", 1)]
+CHARACTERS = ["Pilot", "Baker", "Sailor", "Clerk", "Doctor", "Detective", "Nurse", "Mayor", "Teacher"]
+
+
+def _people(n: int, rng: random.Random) -> list[str]:
+    seen: set[str] = set()
+    while len(seen) < n:
+        seen.add(f"{rng.choice(FIRST)} {chr(65 + rng.randrange(26))}. {rng.choice(LAST)}{rng.randrange(100)}")
+    out = sorted(seen)
+    rng.shuffle(out)  # popularity (by index) independent of the name
+    return out
+
+
+def make_catalog(out: Path, films: int, series: int, episodes: int, rng: random.Random) -> dict[str, dict]:
+    """Write the TSVs into `out`; returns {tconst: {"guess", "credits": [(heading, role, [names])]}}."""
+    people = _people(max(2000, films * 4), rng)
+    cum, total = [], 0.0
+    for i in range(len(people)):
+        total += 1.0 / (i + 1) ** 0.8  # a few very busy people
+        cum.append(total)
+    ids = range(len(people))
+
+    def pick(k: int) -> list[int]:
+        return list(set(rng.choices(ids, cum_weights=cum, k=k)))
+
+    basics, eps, crew, principals, truth = [], [], [], [], {}
+
+    def add(tconst: str, kind: str, title: str, year: int, guess: str, cast_pool: list[int] | None = None) -> None:
+        credits, ordering = [], 0
+        for role, heading, k in CREW_ROLES:
+            ids = pick(rng.randrange(1, k + 1))
+            credits.append((heading, role, ids))
+        cast = (cast_pool or []) + pick(rng.randrange(3, 7))
+        for nid in cast:
+            credits.append((f"{rng.choice(FIRST)} the {rng.choice(CHARACTERS)}", "actor", [nid]))
+        basics.append(f"{tconst}\t{kind}\t{title}\t{title}\t0\t{year}\t\\N\t90\tDrama")
+        crew.append(f"{tconst}\t{','.join(f'nm{i:07d}' for i in credits[0][2])}\t{','.join(f'nm{i:07d}' for i in credits[1][2])}")
+        for _, role, ids in credits:
+            for nid in ids:
+                ordering += 1
+                cat = "actress" if role == "actor" and nid % 2 else role
+                principals.append(f"{tconst}\t{ordering}\tnm{nid:07d}\t{cat}\t\\N\t\\N")
+        truth[tconst] = {"guess": guess, "credits": [(h, [people[i] for i in ids]) for h, _, ids in credits]}
+
+    n = 0
+    for _ in range(films):
+        n += 1
+        title, year = " ".join(rng.sample(TITLE_WORDS, 2)) + f" {n}", rng.randrange(1950, 2025)
+        add(f"tt{n:08d}", "movie", title, year, f"{title} ({year})")
+    for s in range(series):
+        n += 1
+        parent, title = f"tt{n:08d}", f"{rng.choice(TITLE_WORDS)} Street {s}"
+        basics.append(f"{parent}\ttvSeries\t{title}\t{title}\t0\t2000\t\\N\t45\tDrama")
+        regulars = pick(4)
+        for e in range(episodes):
+            n += 1
+            season, ep = e // 10 + 1, e % 10 + 1
+            add(f"tt{n:08d}", "tvEpisode", f"Episode #{season}.{ep}", 2000 + season, f"{title}_S{season:02d}E{ep:02d}", regulars)
+            eps.append(f"tt{n:08d}\t{parent}\t{season}\t{ep}")
+
+    def write(name: str, header: str, rows: list[str]) -> None:
+        (out / f"{name}.tsv").write_text(header + "\n" + "\n".join(rows) + "\n", encoding="utf-8")
+
+    write("title.basics", "tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres", basics)
+    write("title.episode", "tconst\tparentTconst\tseasonNumber\tepisodeNumber", eps)
+    write("name.basics", "nconst\tprimaryName\tbirthYear\tdeathYear\tprimaryProfession\tknownForTitles",
+          [f"nm{i:07d}\t{name}\t\\N\t\\N\t\\N\t\\N" for i, name in enumerate(people)])
+    write("title.crew", "tconst\tdirectors\twriters", crew)
+    write("title.principals", "tconst\tordering\tnconst\tcategory\tjob\tcharacters", principals)
+    return truth
+
+
+def query(credits: list[tuple[str, list[str]]], rng: random.Random, seen: float) -> dict[str, set[str]]:
+    """What OCR collected: each credit row read with probability `seen`, with noise."""
+    out: dict[str, set[str]] = {}
+    for heading, names in credits:
+        if rng.random() < seen:
+            out.setdefault(rng.choice(ALIASES.get(heading, [heading])), set()).update(noisy(n, rng) for n in names)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--films", type=int, default=5000)
+    ap.add_argument("--series", type=int, default=50)
+    ap.add_argument("--episodes", type=int, default=20, help="Episodes per series.")
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--seen", type=float, default=0.6, help="Share of credit rows OCR reads per query.")
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="title_index_") as tmp:
+        tsv, db = Path(tmp) / "tsv", Path(tmp) / "titles.sqlite3"
+        tsv.mkdir()
+        truth = make_catalog(tsv, args.films, args.series, args.episodes, rng)
+
+        t0 = time.perf_counter()
+        build_index(db, tsv)
+        built = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        build_index(db, tsv)
+        rebuilt = time.perf_counter() - t0
+        print(f"{len(truth)} titles: build {built:.2f}s, incremental no-op {rebuilt * 1000:.1f} ms, "
+              f"{db.stat().st_size / 1024 / 1024:.1f} MB")
+
+        idx = TitleIndex(db)
+        picks = rng.sample(sorted(truth), min(args.queries, len(truth)))
+        hits = correct = top5 = 0
+        lat: list[float] = []
+        for tconst in picks:
+            want = truth[tconst]["guess"]
+            credits = query(truth[tconst]["credits"], rng, args.seen)
+            t0 = time.perf_counter()
+            found = idx.lookup(credits)
+            lat.append((time.perf_counter() - t0) * 1000)
+            if found.confident:
+                hits += 1
+                correct += found.guess == want
+            elif want in (c.guess for c in found.candidates):
+                top5 += 1
+        idx.close()
+
+    lat.sort()
+    n = len(picks)
+    print(f"{n} lookups: p50 {lat[n // 2]:.2f} ms, p99 {lat[min(n - 1, int(n * 0.99))]:.2f} ms")
+    print(f"hit {hits / n:.1%} (correct {correct / max(1, hits):.1%}), "
+          f"ambiguous with answer in top 5 {top5 / n:.1%}, refine calls avoided {hits}/{n}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
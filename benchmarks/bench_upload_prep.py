@@ -0,0 +1,146 @@
+"""
+Bytes, image tokens, latency and OCR agreement for each upload-preparation
+setting (grayscale, border crop, text-height downscale, PNG/JPEG/WebP).
+
+    python benchmarks/bench_upload_prep.py                     # synthetic credit frames, encode only
+    python benchmarks/bench_upload_prep.py --frames frames/ --ocr
+    python benchmarks/bench_upload_prep.py --frames frames/ --ocr --fake --latency 0.5
+
+With --ocr every setting is sent through OCRService (cache disabled). Accuracy
+is the share of key→value pairs read from the full-size PNG baseline that the
+setting also recovers, so it measures what the preparation loses.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.config import GeminiConfig, UploadConfig  # noqa: E402
+from rollcall.utils.image_utils import prepare_upload  # noqa: E402
+
+SETTINGS = {
+    "png-full": UploadConfig(grayscale=False, crop_borders=False, text_height=0, format="png"),
+    "png-gray": UploadConfig(grayscale=True, crop_borders=False, text_height=0, format="png"),
+    "png-gray-crop": UploadConfig(grayscale=True, crop_borders=True, text_height=0, format="png"),
+    "png-gray-crop-h24": UploadConfig(grayscale=True, crop_borders=True, text_height=24, format="png"),
+    "jpeg90-gray-crop-h24": UploadConfig(grayscale=True, crop_borders=True, text_height=24, format="jpeg", quality=90),
+    "jpeg75-gray-crop-h24": UploadConfig(grayscale=True, crop_borders=True, text_height=24, format="jpeg", quality=75),
+    "jpeg90-gray-crop-h16": UploadConfig(grayscale=True, crop_borders=True, text_height=16, format="jpeg", quality=90),
+    "webp90-gray-crop-h24": UploadConfig(grayscale=True, crop_borders=True, text_height=24, format="webp", quality=90),
+    "webp75-gray-crop-h24": UploadConfig(grayscale=True, crop_borders=True, text_height=24, format="webp", quality=75),
+}
+
+
+def image_tokens(size: tuple[int, int]) -> int:
+    """Gemini 2.x image cost: 258 tokens if both sides <= 384 px, else 258 per 768 px tile."""
+    w, h = size
+    if w <= 384 and h <= 384:
+        return 258
+    return math.ceil(w / 768) * math.ceil(h / 768) * 258
+
+
+def load_frames(args) -> list[np.ndarray]:
+    if args.frames:
+        paths = sorted(p for p in args.frames.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+        frames = []
+        for p in paths[: args.limit or None]:
+            with Image.open(p) as im:
+                frames.append(np.asarray(im.convert("RGB")))
+        return frames
+    from eval_text_detector import fixtures  # sibling script
+    return [np.asarray(img) for img, label in fixtures(args.limit * 2 or 40, args.seed) if label]
+
+
+def pairs_of(result: dict) -> set[tuple[str, str]]:
+    return {(e["key"].casefold(), v.casefold()) for e in result.get("entries", []) for v in e.get("values", [])}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=Path, help="Directory of credit frames (default: synthetic fixtures).")
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=5)
+    ap.add_argument("--settings", nargs="+", choices=list(SETTINGS), default=list(SETTINGS))
+    ap.add_argument("--ocr", action="store_true", help="Also OCR every prepared frame.")
+    ap.add_argument("--fake", action="store_true", help="OCR against the offline FakeClient.")
+    ap.add_argument("--latency", type=float, default=0.5, help="Per-request latency for --fake.")
+    ap.add_argument("--model", default=GeminiConfig().model_name)
+    ap.add_argument("--max-tokens", type=int, default=768)
+    ap.add_argument("--json", type=Path, help="Also write results to this file.")
+    args = ap.parse_args(argv)
+
+    frames = load_frames(args)
+    if not frames:
+        print("No frames.", file=sys.stderr)
+        return 1
+    print(f"{len(frames)} frames")
+
+    ocr = requester = None
+    if args.ocr:
+        from rollcall.services.ocr_pairs import OCRService
+        from rollcall.services.requester import GeminiRequester
+        if args.fake:
+            from rollcall.services.fake_client import FakeClient
+            client = FakeClient(latency=args.latency)
+        else:
+            from rollcall.services.genai_client import make_client
+            client = make_client()
+        requester = GeminiRequester(client, max_concurrency=1)
+        ocr = OCRService(client, args.model, requester=requester)
+
+    rows, baseline = [], None
+    try:
+        for name in args.settings:
+            up = SETTINGS[name]
+            t0 = time.perf_counter()
+            encoded = [
+                prepare_upload(f, grayscale=up.grayscale, crop_borders=up.crop_borders,
+                               text_height=up.text_height, fmt=up.format, quality=up.quality)
+                for f in frames
+            ]
+            encode_ms = (time.perf_counter() - t0) * 1000 / len(frames)
+            sizes = []
+            for raw, _ in encoded:
+                with Image.open(io.BytesIO(raw)) as im:
+                    sizes.append(im.size)
+            row = {
+                "setting": name,
+                "bytes_per_frame": sum(len(raw) for raw, _ in encoded) // len(encoded),
+                "image_tokens_per_frame": sum(image_tokens(s) for s in sizes) / len(sizes),
+                "encode_ms": round(encode_ms, 2),
+            }
+            if ocr is not None:
+                t0 = time.perf_counter()
+                found = [pairs_of(ocr.extract_pairs(raw, max_tokens=args.max_tokens, mime_type=mime)) for raw, mime in encoded]
+                row["ocr_s_per_frame"] = round((time.perf_counter() - t0) / len(frames), 3)
+                if baseline is None:
+                    baseline = found
+                expected = sum(len(b) for b in baseline)
+                row["accuracy"] = round(sum(len(b & f) for b, f in zip(baseline, found)) / expected, 3) if expected else None
+            rows.append(row)
+            extra = f"  ocr={row['ocr_s_per_frame']:.2f}s  acc={row['accuracy']}" if ocr is not None else ""
+            print(
+                f"{name:<22} {row['bytes_per_frame']:>9} B  ~{row['image_tokens_per_frame']:>6.0f} img tok  "
+                f"{row['encode_ms']:>7.1f} ms{extra}"
+            )
+    finally:
+        if requester is not None:
+            requester.close()
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
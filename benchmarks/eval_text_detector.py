@@ -0,0 +1,176 @@
+"""
+Precision/recall of the OCR precheck: the old grayscale-extrema test
+(`image_has_text`) against `text_likelihood` at a few score thresholds, plus
+per-frame latency.
+
+    python benchmarks/eval_text_detector.py
+    python benchmarks/eval_text_detector.py --frames labeled/ --thresholds 0.2 0.3 0.5
+
+Without --frames a synthetic fixture set is generated: credit cards, scrolling
+blocks and small end titles (positives) against black frames, fades, logos and
+textured "final shots" (negatives), at 1920x1080 and 1280x720. --frames adds
+real frames from `labeled/text/*` and `labeled/no_text/*`.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rollcall.utils.image_utils import image_has_text, text_likelihood  # noqa: E402
+
+NAMES = [
+    "Directed by", "Produced by", "Screenplay", "Music by", "Edited by", "Casting by",
+    "Jane Doe", "John Q. Public", "Mara Lindqvist", "Oluwaseun Adeyemi", "Chen Wei", "José Álvarez",
+    "Director of Photography", "Production Designer", "Costume Designer", "Executive Producers",
+]
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+def _scene(rng: random.Random, size: tuple[int, int]) -> Image.Image:
+    """Smooth colour blobs plus a little grain: stands in for a final shot."""
+    w, h = size
+    small = np.array([[[rng.randrange(256) for _ in range(3)] for _ in range(16)] for _ in range(9)], dtype=np.uint8)
+    img = Image.fromarray(small).resize(size, Image.BICUBIC)
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.randrange(3, 9)):
+        x, y = rng.randrange(w), rng.randrange(h)
+        r = rng.randrange(h // 20, h // 4)
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=tuple(rng.randrange(256) for _ in range(3)))
+    img = img.filter(ImageFilter.GaussianBlur(rng.uniform(1.5, 6)))
+    grain = np.asarray(img, dtype=np.int16) + np.random.default_rng(rng.randrange(1 << 30)).integers(-6, 7, (h, w, 1))
+    return Image.fromarray(np.clip(grain, 0, 255).astype(np.uint8))
+
+
+def _background(rng: random.Random, size: tuple[int, int]) -> Image.Image:
+    kind = rng.choice(["black", "black", "dark", "scene"])
+    if kind == "black":
+        return Image.new("RGB", size, "black")
+    if kind == "dark":
+        return Image.new("RGB", size, (rng.randrange(10, 40),) * 3)
+    return Image.fromarray((np.asarray(_scene(rng, size)) * 0.45).astype(np.uint8))
+
+
+def positive(rng: random.Random, size: tuple[int, int]) -> Image.Image:
+    w, h = size
+    img = _background(rng, size)
+    draw = ImageDraw.Draw(img)
+    kind = rng.choice(["card", "scroll", "title"])
+    if kind == "card":  # a label with one or two names, centred
+        fs = h // rng.randrange(22, 32)
+        lines = [rng.choice(NAMES[:6])] + rng.sample(NAMES[6:12], rng.randrange(1, 3))
+        y = rng.randrange(h // 4, h // 2)
+        for line in lines:
+            draw.text((w // 2, y), line, fill="white", font=_font(fs), anchor="mt")
+            y += int(fs * 1.5)
+    elif kind == "scroll":  # two columns of role / name, possibly cut off at the top
+        fs = h // rng.randrange(30, 45)
+        y = rng.randrange(-h // 3, h // 3)
+        while y < h:
+            draw.text((w // 2 - fs, y), rng.choice(NAMES), fill="white", font=_font(fs), anchor="rt")
+            draw.text((w // 2 + fs, y), rng.choice(NAMES[6:12]), fill="white", font=_font(fs), anchor="lt")
+            y += int(fs * 1.6)
+    else:  # one small line, e.g. a copyright notice or "The End"
+        fs = h // rng.randrange(30, 40)
+        draw.text((w // 2, rng.randrange(h // 3, h - fs * 2)), rng.choice(NAMES), fill="white", font=_font(fs), anchor="mt")
+    return img
+
+
+def negative(rng: random.Random, size: tuple[int, int]) -> Image.Image:
+    w, h = size
+    kind = rng.choice(["black", "fade", "logo", "scene", "scene"])
+    if kind == "black":
+        return Image.new("RGB", size, (rng.randrange(0, 4),) * 3)
+    if kind == "fade":  # dimmed final shot
+        return Image.fromarray((np.asarray(_scene(rng, size)) * rng.uniform(0.05, 0.3)).astype(np.uint8))
+    if kind == "logo":  # bold shapes on black
+        img = Image.new("RGB", size, "black")
+        draw = ImageDraw.Draw(img)
+        r = rng.randrange(h // 8, h // 4)
+        draw.ellipse([w // 2 - r, h // 2 - r, w // 2 + r, h // 2 + r], outline="white", width=max(4, r // 6))
+        draw.rectangle([w // 2 - r // 2, h // 2 - r // 6, w // 2 + r // 2, h // 2 + r // 6], fill=(200, 160, 40))
+        return img
+    return _scene(rng, size)
+
+
+def fixtures(n: int, seed: int) -> list[tuple[Image.Image, bool]]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        size = rng.choice([(1920, 1080), (1280, 720)])
+        label = i % 2 == 0
+        out.append(((positive if label else negative)(rng, size), label))
+    return out
+
+
+def labeled_dir(root: Path) -> list[tuple[Image.Image, bool]]:
+    out = []
+    for sub, label in (("text", True), ("no_text", False)):
+        for p in sorted((root / sub).glob("*")):
+            if p.suffix.lower() in (".png", ".jpg", ".jpeg"):
+                with Image.open(p) as im:
+                    out.append((im.convert("RGB"), label))
+    return out
+
+
+def evaluate(name: str, predict, data: list[tuple[np.ndarray, bool]]) -> dict:
+    tp = fp = fn = tn = 0
+    t0 = time.perf_counter()
+    for frame, label in data:
+        pred = predict(frame)
+        tp += pred and label
+        fp += pred and not label
+        fn += label and not pred
+        tn += not pred and not label
+    ms = (time.perf_counter() - t0) * 1000 / max(1, len(data))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{name:<24} precision={precision:.3f} recall={recall:.3f}  sent={tp + fp:<4} {ms:6.2f} ms/frame")
+    return dict(name=name, precision=precision, recall=recall, tp=tp, fp=fp, fn=fn, tn=tn, ms=ms)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=Path, help="Directory with text/ and no_text/ subfolders of real frames.")
+    ap.add_argument("-n", type=int, default=200, help="Synthetic fixtures to generate (0 = none).")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--thresholds", type=float, nargs="+", default=[0.2, 0.3, 0.5, 0.7])
+    ap.add_argument("--dump", type=Path, help="Write the synthetic fixtures here as text/ and no_text/ PNGs.")
+    args = ap.parse_args(argv)
+
+    data = fixtures(args.n, args.seed) if args.n else []
+    if args.dump:
+        for i, (img, label) in enumerate(data):
+            d = args.dump / ("text" if label else "no_text")
+            d.mkdir(parents=True, exist_ok=True)
+            img.save(d / f"{i:04d}.png")
+    if args.frames:
+        data += labeled_dir(args.frames)
+    if not data:
+        print("No fixtures.", file=sys.stderr)
+        return 1
+    # frames reach the precheck as decoded RGB arrays in streaming mode
+    arrays = [(np.asarray(img), label) for img, label in data]
+    print(f"{len(arrays)} frames ({sum(lbl for _, lbl in arrays)} with text)")
+
+    evaluate("image_has_text", lambda f: image_has_text(f), arrays)
+    for thr in args.thresholds:
+        evaluate(f"text_likelihood>={thr}", lambda f, t=thr: text_likelihood(f).score >= t, arrays)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+"""
+Generate a corpus of synthetic "films" with known titles: a few minutes of
+scene footage (lavfi `gradients`) followed by end credits, either a scroll or
+a sequence of cards, plus a manifest.json describing every file.
+
+    python benchmarks/synth_credits.py corpus/ -n 8
+    python benchmarks/synth_credits.py corpus/ -n 4 --duration 600 --size 1920x1080
+
+Credit text is rendered with Pillow and composited with ffmpeg's `overlay`
+filter, so no `drawtext` (libfreetype) build is needed. Files are named
+video_000.mp4, video_001.mkv, ... so nothing about the title leaks into the name.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from eval_text_detector import _font  # sibling script
+
+TITLE_WORDS = [
+    "Silent", "Harbor", "Midnight", "Glass", "River", "Paper", "Northern", "Lantern",
+    "Echo", "Winter", "Orchard", "Signal", "Hollow", "Copper", "Distant", "Tide",
+]
+FIRST = ["Jane", "John", "Mara", "Oluwaseun", "Chen", "José", "Anika", "Tomás", "Priya", "Lars", "Noor", "Kenji"]
+LAST = ["Doe", "Public", "Lindqvist", "Adeyemi", "Wei", "Álvarez", "Okafor", "Novak", "Sato", "Moreau", "Haddad", "Byrne"]
+ROLES = [
+    "Directed by", "Produced by", "Screenplay by", "Music by", "Edited by", "Casting by",
+    "Director of Photography", "Production Designer", "Costume Designer", "Executive Producers",
+]
+EXTS = (".mp4", ".mkv")
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+
+
+def make_credits(rng: random.Random) -> tuple[str, int, list[tuple[str, list[str]]]]:
+    """(title, year, [(role, [names])]); "Directed by" always comes first."""
+    title = " ".join(rng.sample(TITLE_WORDS, 2))
+    year = rng.randrange(1975, 2025)
+    roles = ["Directed by"] + rng.sample(ROLES[1:], rng.randrange(5, len(ROLES)))
+    credits = [(role, [_name(rng) for _ in range(rng.randrange(1, 4))]) for role in roles]
+    cast = [(f"{rng.choice(FIRST)} the {rng.choice(['Pilot', 'Baker', 'Sailor', 'Clerk'])}", [_name(rng)]) for _ in range(6)]
+    return title, year, credits + cast
+
+
+def _lines(title: str, credits: list[tuple[str, list[str]]]) -> list[tuple[str, str]]:
+    out = [("", title.upper()), ("", "")]
+    for role, names in credits:
+        out.append((role, names[0]))
+        out += [("", n) for n in names[1:]]
+        out.append(("", ""))
+    return out
+
+
+def render_scroll(title: str, credits, size: tuple[int, int]) -> Image.Image:
+    """One tall strip of two-column credits (role right-aligned, name left-aligned)."""
+    w, h = size
+    fs = h // 28
+    lines = _lines(title, credits)
+    strip = Image.new("RGB", (w, int(len(lines) * fs * 1.6) + fs), "black")
+    draw = ImageDraw.Draw(strip)
+    draw.text((w // 2, 0), lines[0][1], fill="white", font=_font(fs), anchor="mt")  # the title, centred
+    y = 0
+    for role, name in lines[1:]:
+        y += int(fs * 1.6)
+        if role:
+            draw.text((w // 2 - fs, y), role, fill="white", font=_font(fs), anchor="rt")
+        if name:
+            draw.text((w // 2 + fs, y), name, fill="white", font=_font(fs), anchor="lt")
+    return strip
+
+
+def render_cards(title: str, credits, size: tuple[int, int], per_card: int = 2) -> list[Image.Image]:
+    """A title card, then `per_card` roles per centred card; transparent outside the text."""
+    w, h = size
+    fs = h // 22
+    groups = [[("", [title.upper()])]] + [credits[i:i + per_card] for i in range(0, len(credits), per_card)]
+    cards = []
+    for group in groups:
+        card = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(card)
+        rows = [(role, n) for role, names in group for n in ([role] if role else []) + names]
+        y = (h - len(rows) * int(fs * 1.5)) // 2
+        for _, text in rows:
+            draw.text((w // 2, y), text, fill="white", font=_font(fs), anchor="mt")
+            y += int(fs * 1.5)
+        cards.append(card)
+    return cards
+
+
+def encode(out: Path, size: tuple[int, int], fps: int, feature_sec: float, credits_sec: float,
+           style: str, overlays: list[Path], seed: int) -> None:
+    w, h = size
+    args = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        # gradients is slow per pixel; render small and upscale, it is smooth anyway
+        "-f", "lavfi", "-i", f"gradients=s={w // 4}x{h // 4}:r={fps}:d={feature_sec}:seed={seed}:speed=0.02",
+        "-f", "lavfi", "-i", f"color=black:s={w}x{h}:r={fps}:d={credits_sec}",
+    ]
+    for p in overlays:
+        args += ["-i", str(p)]
+    # decode each overlay PNG once and repeat it, rather than re-reading it every frame
+    graph = "".join(
+        f"[{k + 2}]loop=loop=-1:size=1,setpts=N/({fps}*TB)[i{k}];" for k in range(len(overlays))
+    ) + f"[0]scale={w}:{h}[scene];"
+
+    if style == "scroll":
+        with Image.open(overlays[0]) as im:
+            strip_h = im.height
+        speed = (h + strip_h) / credits_sec
+        graph += f"[1][i0]overlay=x=0:y='H-t*{speed:.3f}':shortest=1[c]"
+    else:
+        each = credits_sec / len(overlays)
+        chain, prev = [], "1"
+        for k in range(len(overlays)):
+            a, b = k * each, (k + 1) * each - 0.5
+            label = "c" if k == len(overlays) - 1 else f"o{k}"
+            chain.append(f"[{prev}][i{k}]overlay=enable='between(t,{a:.2f},{b:.2f})':shortest=1[{label}]")
+            prev = label
+        graph += ";".join(chain)
+    graph += ";[scene][c]concat=n=2:v=1:a=0,format=yuv420p[v]"
+
+    args += [
+        "-filter_complex", graph, "-map", "[v]",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "28", "-g", str(fps * 2),
+        str(out),
+    ]
+    subprocess.run(args, check=True)
+
+
+def make_corpus(out_dir: Path, n: int, *, seed: int = 1, duration: float = 240.0, credits_sec: float = 60.0,
+                size: tuple[int, int] = (1280, 720), fps: int = 10) -> dict:
+    """Write `n` videos plus manifest.json into `out_dir`; returns the manifest."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = {"seed": seed, "duration": duration, "credits_sec": credits_sec, "size": list(size), "fps": fps, "videos": {}}
+    with tempfile.TemporaryDirectory(prefix="synth_") as tmp:
+        for i in range(n):
+            title, year, credits = make_credits(rng)
+            style = "scroll" if i % 2 == 0 else "cards"
+            images = [render_scroll(title, credits, size)] if style == "scroll" else render_cards(title, credits, size)
+            overlays = []
+            for k, img in enumerate(images):
+                p = Path(tmp) / f"{i:03d}_{k:02d}.png"
+                img.save(p)
+                overlays.append(p)
+            name = f"video_{i:03d}{EXTS[i % len(EXTS)]}"
+            encode(out_dir / name, size, fps, duration - credits_sec, credits_sec, style, overlays, seed + i)
+            manifest["videos"][name] = {
+                "title": f"{title} ({year})",
+                "style": style,
+                "credits_start": duration - credits_sec,
+                "credits": [[role, names] for role, names in credits],
+            }
+            print(f"  {name}: {title} ({year}), {style} credits")
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out", type=Path, help="Output directory.")
+    ap.add_argument("-n", type=int, default=8, help="Number of videos.")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--duration", type=float, default=240.0, help="Seconds per video.")
+    ap.add_argument("--credits-sec", type=float, default=60.0, help="Seconds of credits at the end.")
+    ap.add_argument("--size", type=parse_size, default=(1280, 720), help="WxH, e.g. 1920x1080.")
+    ap.add_argument("--fps", type=int, default=10)
+    args = ap.parse_args(argv)
+    if args.credits_sec >= args.duration:
+        ap.error("--credits-sec must be shorter than --duration")
+    make_corpus(args.out, args.n, seed=args.seed, duration=args.duration, credits_sec=args.credits_sec,
+                size=args.size, fps=args.fps)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
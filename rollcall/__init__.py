@@ -1,7 +1,16 @@
 # rollcall/__init__.py
 from __future__ import annotations
 
-__all__ = ["process_media_directory", "OCRConfig", "GeminiConfig"]
+__all__ = ["process_media_directory", "OCRConfig", "GeminiConfig", "PipelineConfig"]
 __version__ = "0.1.0"
 
-from .core import process_media_directory, OCRConfig, GeminiConfig  # noqa: E402
+from .config import OCRConfig, GeminiConfig, PipelineConfig  # noqa: E402
+
+
+def __getattr__(name: str):
+    # rollcall.core pulls in numpy, PIL and the pipeline; load it on first use so
+    # `import rollcall` (and the CLI's --help) stays cheap.
+    if name == "process_media_directory":
+        from .core import process_media_directory
+        return process_media_directory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .types import OCRResult
+from .utils.sqlite_utils import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr (
+    key       TEXT PRIMARY KEY,
+    value     TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ocr_last_used ON ocr(last_used);
+"""
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def ocr_cache_key(
+    digest: str, *, model: str, version: str, max_tokens: int, fallback_key: str = "text", mode: str = "single",
+) -> str:
+    """Everything that can change the OCR answer for the same image bytes (`mode`: "single" or a batch mode)."""
+    raw = "|".join([digest, model, version, str(max_tokens), fallback_key, mode])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    path: Path
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int = 0
+    misses: int = 0
+
+
+class OCRCache:
+    """
+    Content-addressed store of normalized OCRResult objects in a single SQLite file.
+
+    - Keys come from `ocr_cache_key` (image digest + model + prompt/schema version
+      + max_tokens + request mode), so changing any of them never serves a stale
+      answer, and a frame read alone is never answered with a batch read.
+    - LRU eviction by byte budget: `last_used` is bumped on every hit and the
+      oldest rows are dropped once the stored payload exceeds `max_bytes`.
+    - Safe to share: one connection guarded by a lock per process, WAL mode and a
+      busy timeout across processes.
+    """
+
+    PRUNE_EVERY = 64  # puts between budget checks
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._db = connect(self.path, _SCHEMA)
+
+    def get(self, key: str, *fallbacks: str) -> Optional[OCRResult]:
+        """The value under `key`, else under the first of `fallbacks` present (one hit or miss)."""
+        with self._lock:
+            for key in (key, *fallbacks):
+                row = self._db.execute("SELECT value FROM ocr WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    break
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE ocr SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(self, key: str, value: OCRResult) -> None:
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr(key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob.encode("utf-8")), now, now),
+            )
+            self._puts += 1
+            if self._puts % self.PRUNE_EVERY == 0:
+                self._prune_locked(self.max_bytes)
+
+    def _total_bytes(self) -> int:
+        return int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM ocr").fetchone()[0])
+
+    def _prune_locked(self, max_bytes: int) -> int:
+        total = self._total_bytes()
+        removed = 0
+        while total > max_bytes:
+            rows = self._db.execute("SELECT key, size FROM ocr ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                break
+            drop = []
+            for key, size in rows:
+                if total <= max_bytes:
+                    break
+                drop.append((key,))
+                total -= size
+            self._db.executemany("DELETE FROM ocr WHERE key = ?", drop)
+            removed += len(drop)
+        return removed
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Evict least-recently-used entries down to `max_bytes`; returns rows removed."""
+        with self._lock:
+            removed = self._prune_locked(self.max_bytes if max_bytes is None else max_bytes)
+            if removed:
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return removed
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            entries = int(self._db.execute("SELECT COUNT(*) FROM ocr").fetchone()[0])
+            return CacheStats(self.path, entries, self._total_bytes(), self.max_bytes, self.hits, self.misses)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -2,20 +2,45 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+import time
 import typer
 
 # Prefer package-relative import; fall back to absolute when running this file directly in VS Code
 try:
-    from .core import process_media_directory, OCRConfig, GeminiConfig
+    # rollcall.core (numpy, PIL, the pipeline) is imported by `run` itself, so --help,
+    # `status`, `cache` and `index` start fast; google.genai loads on the first request.
+    from .config import OCRConfig, GeminiConfig, PipelineConfig, CacheConfig, UploadConfig, ScanConfig, MetricsConfig
+    from .config import IndexConfig, LocalOCRConfig, MetadataConfig, QueueConfig, SeriesConfig, WatchConfig
+    from .cache import OCRCache
+    from .title_index import TitleIndex, build_index, parse_credit_args
+    from .services.ocr_pairs import BATCH_MODES
+    from .config import LOCAL_OCR_ENGINES, SAMPLING_MODES, UPLOAD_FORMATS, VIDEO_EXTS
+    from .scanner import iter_media
+    from .journal import JOURNAL_NAME, Journal, journal_status
+    from .workqueue import QUEUE_DIR, file_key, queue_status
 except ImportError:
     # allow "Run > Python File" without a launch.json
     import sys
     from pathlib import Path as _Path
     sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))  # add project root
-    from rollcall.core import process_media_directory, OCRConfig, GeminiConfig  # type: ignore
+    from rollcall.config import OCRConfig, GeminiConfig, PipelineConfig, CacheConfig, UploadConfig, ScanConfig, MetricsConfig  # type: ignore
+    from rollcall.config import IndexConfig, LocalOCRConfig, MetadataConfig, QueueConfig, SeriesConfig, WatchConfig  # type: ignore
+    from rollcall.cache import OCRCache  # type: ignore
+    from rollcall.title_index import TitleIndex, build_index, parse_credit_args  # type: ignore
+    from rollcall.services.ocr_pairs import BATCH_MODES  # type: ignore
+    from rollcall.config import LOCAL_OCR_ENGINES, SAMPLING_MODES, UPLOAD_FORMATS, VIDEO_EXTS  # type: ignore
+    from rollcall.scanner import iter_media  # type: ignore
+    from rollcall.journal import JOURNAL_NAME, Journal, journal_status  # type: ignore
+    from rollcall.workqueue import QUEUE_DIR, file_key, queue_status  # type: ignore
 
 app = typer.Typer(add_completion=False, help="RollCall: OCR end credits and rename unlabeled media files.")
+cache_app = typer.Typer(add_completion=False, help="Inspect or trim the persistent OCR result cache.")
+app.add_typer(cache_app, name="cache")
+index_app = typer.Typer(add_completion=False, help="Build or query the offline title index.")
+app.add_typer(index_app, name="index")
+
+_MB = 1024 * 1024
 
 
 @app.command(name="run")
@@ -37,20 +62,143 @@ def app_run(
     # behavior
     dry_run: bool = typer.Option(False, "--dry-run", help="Show planned renames without changing files."),
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Suppress non-error output."),
+    force: bool = typer.Option(False, "--force", help="Reprocess files the journal marks as finished or partial."),
+    journal: bool = typer.Option(True, "--journal/--no-journal", help="Record per-file progress in the directory."),
+    # scanning
+    recursive: bool = typer.Option(True, "--recursive/--no-recursive", help="Descend into subdirectories."),
+    include: List[str] = typer.Option([], "--include", help='Only process files matching this glob (repeatable), e.g. "Season */*".'),
+    exclude: List[str] = typer.Option([], "--exclude", help='Skip files/directories matching this glob (repeatable), e.g. "Extras".'),
+    ext: List[str] = typer.Option([], "--ext", help="Media extension to pick up (repeatable; default .mp4 .mkv .avi .mov)."),
+    min_size_mb: float = typer.Option(0.0, "--min-size-mb", min=0.0, help="Skip files smaller than this (samples, trailers)."),
+    skip_named: bool = typer.Option(
+        True, "--skip-named/--all-names", help='Skip files already named like "Title_S01E02" or "Title (1999)".'
+    ),
     # OCR & sampling
     fps: str = typer.Option("1/3", "--fps", help='FFmpeg fps filter expression, e.g. "1/3".'),
+    sampling: str = typer.Option(
+        "uniform", "--sampling", help='"uniform" (--fps) or "adaptive" (coarse pass, seeks only where credits change).'
+    ),
+    coarse_step: float = typer.Option(6.0, "--coarse-step", min=0.5, help="Adaptive: seconds between coarse samples."),
+    fine_step: float = typer.Option(1.5, "--fine-step", min=0.1, help="Adaptive: closest spacing of extra samples."),
+    max_frames: int = typer.Option(120, "--max-frames", min=2, help="Adaptive: frames decoded per video at most."),
     variation_threshold: float = typer.Option(
         0.0, "--variation-threshold", help="Pixel-variation threshold for quick text precheck."
     ),
-    ocr_delay: float = typer.Option(0.0, "--ocr-delay", help="Delay between OCR requests (seconds)."),
+    text_threshold: float = typer.Option(
+        0.3, "--text-threshold", min=0.0, max=1.0, help="Min text-likelihood score to OCR a frame (0 disables)."
+    ),
+    crop_to_text: bool = typer.Option(
+        False, "--crop-to-text/--no-crop-to-text", help="Send only the detected text regions of each frame."
+    ),
+    ocr_delay: float = typer.Option(0.0, "--ocr-delay", help="Extra delay between OCR requests (seconds); prefer --rpm/--tpm."),
     long_tail_sec: int = typer.Option(210, "--long-tail-sec", help="Tail sample for videos > 1 hour (seconds)."),
     short_tail_sec: int = typer.Option(90, "--short-tail-sec", help="Tail sample for videos ≤ 1 hour (seconds)."),
+    locate: bool = typer.Option(
+        True, "--locate/--no-locate", help="Find the credits via chapters or a keyframe scan instead of a fixed tail."
+    ),
+    locate_scan_sec: int = typer.Option(900, "--locate-scan-sec", min=1, help="How far back from the end to scan for credits."),
     max_no_update: int = typer.Option(10, "--max-no-update", help="Stop after this many unchanged guesses."),
+    refine_new_keys: int = typer.Option(
+        1, "--refine-new-keys", min=0, help="Refine the title once this many new credit keys appear (0 = ignore keys)."
+    ),
+    refine_new_values: int = typer.Option(
+        2, "--refine-new-values", min=0, help="...or this many new credit values (both 0 = refine after every frame)."
+    ),
+    refine_token_budget: int = typer.Option(
+        400, "--refine-token-budget", min=0,
+        help="Approximate tokens of credits sent to refine/search, most identifying keys first (0 = no limit).",
+    ),
+    dedup_distance: int = typer.Option(
+        12, "--dedup-distance", help="Skip frames within this Hamming distance of an OCR'd frame (-1 disables)."
+    ),
+    stream: bool = typer.Option(
+        True, "--stream/--no-stream", help="Decode frames into memory instead of PNGs in a temp dir."
+    ),
+    ocr_batch_size: int = typer.Option(1, "--ocr-batch-size", min=1, help="Frames per OCR request."),
+    ocr_batch_mode: str = typer.Option(
+        "parts", "--ocr-batch-mode", help='Batching: "parts" (one image part per frame) or "sheet" (contact sheet).'
+    ),
+    # local OCR tier
+    local_ocr: Optional[str] = typer.Option(
+        None, "--local-ocr", help='Read frames with a local engine ("tesseract") first; Gemini gets the rest.'
+    ),
+    local_min_confidence: float = typer.Option(
+        80.0, "--local-min-confidence", min=0.0, max=100.0,
+        help="Lowest line confidence (0-100) a local read may have before the frame goes to Gemini.",
+    ),
+    local_workers: int = typer.Option(0, "--local-workers", min=0, help="Local OCR processes at once (0 = one per core)."),
+    # upload preparation
+    grayscale: bool = typer.Option(False, "--grayscale/--color", help="Upload frames in grayscale."),
+    crop_borders: bool = typer.Option(
+        False, "--crop-borders/--no-crop-borders", help="Cut letterbox bars and empty black margins before upload."
+    ),
+    text_height: int = typer.Option(0, "--text-height", min=0, help="Downscale so text lines are ~N px tall (0 = keep size)."),
+    upload_format: str = typer.Option("png", "--upload-format", help='Upload encoding: "png", "jpeg" or "webp".'),
+    upload_quality: int = typer.Option(90, "--upload-quality", min=1, max=100, help="JPEG/WebP quality."),
+    ocr_lookahead: int = typer.Option(
+        1, "--ocr-lookahead", min=1, help="OCR requests in flight per video (merged in frame order)."
+    ),
+    scroll_crop: bool = typer.Option(
+        True, "--scroll-crop/--no-scroll-crop", help="Send only the newly revealed strip of scrolling credits."
+    ),
+    # pipeline
+    workers: int = typer.Option(4, "--workers", min=1, help="Files probed/prechecked/identified concurrently."),
+    extract_workers: int = typer.Option(2, "--extract-workers", min=1, help="Concurrent ffmpeg frame extractions."),
+    ocr_concurrency: int = typer.Option(4, "--ocr-concurrency", min=1, help="OCR requests in flight across all files."),
     # model
     model: str = typer.Option("gemini-2.5-flash", "--model", help="Gemini model name."),
+    # request budget (shared by OCR, refine and search)
+    rpm: int = typer.Option(0, "--rpm", min=0, help="Gemini requests per minute (0 = unlimited)."),
+    tpm: int = typer.Option(0, "--tpm", min=0, help="Gemini tokens per minute (0 = unlimited)."),
+    max_concurrency: int = typer.Option(8, "--max-concurrency", min=1, help="Gemini requests in flight at once."),
+    max_retries: int = typer.Option(5, "--max-retries", min=0, help="Retries on 429/5xx with jittered backoff."),
     # token caps (separate for OCR vs refine)
     ocr_max_tokens: int = typer.Option(256, "--ocr-max-tokens", help="Max tokens for OCR responses."),
     refine_max_tokens: int = typer.Option(64, "--refine-max-tokens", help="Max tokens for refine/search responses."),
+    # OCR result cache
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse OCR results for frames seen in earlier runs."),
+    cache_path: Optional[Path] = typer.Option(None, "--cache-path", help="OCR cache file (default: ~/.cache/rollcall/ocr.sqlite3)."),
+    cache_max_mb: int = typer.Option(256, "--cache-max-mb", min=1, help="OCR cache size budget (MB, LRU eviction)."),
+    # metadata fast path
+    metadata: bool = typer.Option(
+        True, "--metadata/--no-metadata", help="Try container tags and subtitle credit cues before decoding frames."
+    ),
+    trust_title_tag: bool = typer.Option(
+        False, "--trust-title-tag", help="Accept a film 'title' tag with a year as the name, without OCR."
+    ),
+    subtitle_tail_sec: float = typer.Option(
+        480.0, "--subtitle-tail-sec", min=0.0, help="Read subtitle cues from this many seconds before the end (0 = off)."
+    ),
+    # season packs
+    series: bool = typer.Option(
+        True, "--series/--no-series", help="Match files to shows identified earlier in the run by recurring credits."
+    ),
+    series_min_shared: int = typer.Option(3, "--series-min-shared", min=1, help="Recurring names needed to match a show."),
+    series_max_no_update: int = typer.Option(
+        3, "--series-max-no-update", min=1, help="Stop after this many unchanged guesses once only the episode was left."
+    ),
+    group_episodes: bool = typer.Option(
+        False, "--group-episodes", help="Place files matched to a show but without an episode number in one request."
+    ),
+    # offline title index
+    index: bool = typer.Option(True, "--index/--no-index", help="Resolve titles from the offline index before asking refine."),
+    index_path: Optional[Path] = typer.Option(None, "--index-path", help="Title index file (default: ~/.cache/rollcall/titles.sqlite3)."),
+    # instrumentation
+    metrics_json: Optional[Path] = typer.Option(None, "--metrics-json", help="Write a JSON run report (timings, tokens, counters)."),
+    metrics_prom: Optional[Path] = typer.Option(None, "--metrics-prom", help="Write a Prometheus textfile (e.g. for node_exporter)."),
+    profile: Optional[Path] = typer.Option(None, "--profile", help="cProfile the pipeline; write merged pstats here."),
+    # watch mode (`rlcl watch DIR` is `rlcl run --watch DIR`)
+    watch: bool = typer.Option(False, "--watch", help="Keep running; identify files as soon as they finish copying."),
+    settle_sec: float = typer.Option(5.0, "--settle-sec", min=0.0, help="Watch: queue a file once its size/mtime held this long."),
+    poll_sec: float = typer.Option(2.0, "--poll-sec", min=0.1, help="Watch: rescan interval when polling."),
+    inotify: bool = typer.Option(True, "--inotify/--no-inotify", help="Watch: wake on filesystem events (Linux) instead of polling."),
+    # shared library (several processes/hosts on one directory)
+    queue: bool = typer.Option(False, "--queue", help="Lease each file first, so several workers can share the directory."),
+    worker: Optional[str] = typer.Option(None, "--worker", help="Queue: this worker's name in `rlcl status` (default: host-pid)."),
+    lease_sec: float = typer.Option(120.0, "--lease-sec", min=5.0, help="Queue: take over leases not renewed for this long."),
+    queue_wait: bool = typer.Option(
+        True, "--queue-wait/--no-queue-wait", help="Queue: after the scan, wait on files other workers hold."
+    ),
     # web-grounded fallback
     use_search: bool = typer.Option(
         False,
@@ -61,19 +209,54 @@ def app_run(
     """
     Run RollCall on a media directory.
     """
+    if ocr_batch_mode not in BATCH_MODES:
+        raise typer.BadParameter(f"expected one of {', '.join(BATCH_MODES)}", param_hint="--ocr-batch-mode")
+    if sampling not in SAMPLING_MODES:
+        raise typer.BadParameter(f"expected one of {', '.join(SAMPLING_MODES)}", param_hint="--sampling")
+    if local_ocr is not None and local_ocr not in LOCAL_OCR_ENGINES:
+        raise typer.BadParameter(f"expected one of {', '.join(LOCAL_OCR_ENGINES)}", param_hint="--local-ocr")
+    if upload_format not in UPLOAD_FORMATS:
+        raise typer.BadParameter(f"expected one of {', '.join(UPLOAD_FORMATS)}", param_hint="--upload-format")
     ocr_cfg = OCRConfig(
         delay_seconds=ocr_delay,
         variation_threshold=variation_threshold,
+        text_threshold=text_threshold,
+        crop_to_text=crop_to_text,
         fps_expr=fps,
+        sampling=sampling,
+        coarse_step_sec=coarse_step,
+        fine_step_sec=fine_step,
+        max_frames=max_frames,
         long_video_tail_sec=long_tail_sec,
         short_video_tail_sec=short_tail_sec,
+        locate_credits=locate,
+        locate_scan_sec=locate_scan_sec,
         max_no_update=max_no_update,
+        refine_new_keys=refine_new_keys,
+        refine_new_values=refine_new_values,
+        refine_token_budget=refine_token_budget,
+        dedup_distance=dedup_distance,
+        scroll_crop=scroll_crop,
+        stream_frames=stream,
+        ocr_batch_size=ocr_batch_size,
+        ocr_batch_mode=ocr_batch_mode,
+        ocr_lookahead=ocr_lookahead,
+    )
+    # GeminiConfig carries the model name and request budget; other knobs are set in core for simplicity.
+    gemini_cfg = GeminiConfig(
+        model_name=model,
+        rpm=rpm,
+        tpm=tpm,
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+    )
+    pipeline_cfg = PipelineConfig(
+        workers=workers,
+        extract_workers=extract_workers,
+        ocr_concurrency=ocr_concurrency,
     )
-    # GeminiConfig currently carries model name; other knobs are set in core for simplicity.
-    gemini_cfg = GeminiConfig(model_name=model)
 
-    process_media_directory(
-        directory=directory,
+    run = dict(
         api_key=api_key,
         ocr_cfg=ocr_cfg,
         gemini_cfg=gemini_cfg,
@@ -82,11 +265,271 @@ def app_run(
         ocr_max_tokens=ocr_max_tokens,
         refine_max_tokens=refine_max_tokens,
         use_search=use_search,
+        pipeline_cfg=pipeline_cfg,
+        cache_cfg=CacheConfig(enabled=cache, path=cache_path, max_bytes=cache_max_mb * _MB),
+        upload_cfg=UploadConfig(
+            grayscale=grayscale,
+            crop_borders=crop_borders,
+            text_height=text_height,
+            format=upload_format,
+            quality=upload_quality,
+        ),
+        metrics_cfg=MetricsConfig(json_path=metrics_json, prometheus_path=metrics_prom, profile_path=profile),
+        index_cfg=IndexConfig(enabled=index, path=index_path),
+        series_cfg=SeriesConfig(
+            enabled=series,
+            min_shared=series_min_shared,
+            max_no_update=series_max_no_update,
+            group_episodes=group_episodes,
+        ),
+        metadata_cfg=MetadataConfig(
+            enabled=metadata,
+            trust_title=trust_title_tag,
+            subtitles=subtitle_tail_sec > 0,
+            subtitle_tail_sec=subtitle_tail_sec,
+        ),
+        local_ocr_cfg=LocalOCRConfig(engine=local_ocr, min_confidence=local_min_confidence, workers=local_workers),
+        scan_cfg=_scan_config(recursive, include, exclude, ext, min_size_mb, skip_named),
+        use_journal=journal,
+        force=force,
+        queue_cfg=QueueConfig(enabled=queue, worker=worker, lease_sec=lease_sec, wait=queue_wait),
     )
+    # relative unless run as a plain file (see the imports at the top); an ImportError from
+    # inside core (numpy, PIL missing) is raised as it is
+    if watch:
+        if __package__:
+            from .watch import watch_directory
+        else:
+            from rollcall.watch import watch_directory  # type: ignore
+        watch_directory(directory, watch_cfg=WatchConfig(settle_sec=settle_sec, poll_sec=poll_sec, inotify=inotify), **run)
+        return
+    if __package__:
+        from .core import process_media_directory
+    else:
+        from rollcall.core import process_media_directory  # type: ignore
+    process_media_directory(directory, **run)
+
+
+def _scan_config(recursive: bool, include: List[str], exclude: List[str], ext: List[str], min_size_mb: float, skip_named: bool) -> ScanConfig:
+    exts = frozenset(("." + e.lstrip(".")).lower() for e in ext) if ext else frozenset(VIDEO_EXTS)
+    return ScanConfig(
+        recursive=recursive,
+        include=tuple(include),
+        exclude=tuple(exclude),
+        exts=exts,
+        min_size=int(min_size_mb * _MB),
+        skip_named=skip_named,
+    )
+
+
+@app.command(
+    name="watch",
+    context_settings={"allow_extra_args": True, "ignore_unknown_options": True},
+    add_help_option=False,
+)
+def app_watch(ctx: typer.Context):
+    """
+    Keep watching a directory; identify files as soon as they finish copying.
+
+    Takes every `run` option (see `rlcl watch --help`).
+    """
+    # entrypoint() rewrites `watch` to `run --watch`; this covers app() called directly
+    app(["run", "--watch", *ctx.args])
+
+
+@app.command(name="status")
+def app_status(
+    directory: Path = typer.Argument(
+        ..., exists=True, file_okay=False, dir_okay=True, resolve_path=True, help="Media directory."
+    ),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="List every file with its stage."),
+):
+    """
+    Summarize what the journal knows about a media directory, and with `--queue`
+    workers, what each one holds and how far the shared run has got.
+    """
+    path = directory / JOURNAL_NAME
+    shared = (directory / QUEUE_DIR).is_dir()
+    if not path.exists() and not shared:
+        typer.echo("No journal yet; nothing has been processed here.")
+        raise typer.Exit()
+    # every media file, including ones already named; their journal entries say "renamed"
+    media = list(iter_media(directory, ScanConfig(skip_named=False)))
+    typer.echo(f"{len(media)} media file(s) in {directory}")
+    if path.exists():
+        _journal_summary(Journal(path), media, verbose)
+    if shared:
+        _queue_summary(directory, media, verbose)
+
+
+def _journal_summary(j: Journal, media: list[Path], verbose: bool) -> None:
+    rows = journal_status(j, media)
+    j.close()
+    counts: dict[str, int] = {}
+    for _, e in rows:
+        stage = e.stage if e else "new"
+        counts[stage] = counts.get(stage, 0) + 1
+    for stage in ("renamed", "identified", "ocr", "failed", "skipped", "new"):
+        if counts.get(stage):
+            typer.echo(f"  {stage:<11}{counts[stage]}")
+    for p, e in rows:
+        if verbose or (e and e.stage in ("ocr", "failed")):
+            detail = (e.error or e.guess or "") if e else ""
+            if e and e.stage == "ocr":
+                detail = f"after frame {e.frames_done}, guess {e.guess or '-'}"
+            typer.echo(f"  [{e.stage if e else 'new'}] {p.name}" + (f": {detail}" if detail else ""))
+
+
+def _queue_summary(directory: Path, media: list[Path], verbose: bool) -> None:
+    st = queue_status(directory)
+    keys = {file_key(directory, p) for p in media}
+    pending = len(keys - st.done - st.leased)
+    expired = sum(1 for lease in st.leases if lease.expired)
+    running = [w for w in st.workers if w.state == "running"]
+    typer.echo(
+        f"Queue: {len(running)} worker(s) running; {len(st.done & keys)} done, {len(st.leases)} leased"
+        + (f" ({expired} expired)" if expired else "") + f", {pending} pending"
+    )
+    for w in st.workers:
+        if not verbose and w.state == "exited":
+            continue
+        counts = ", ".join(f"{n} {k}" for k, n in sorted(w.counts.items()))
+        typer.echo(
+            f"  {w.worker:<24}{w.state:<9}heartbeat {w.heartbeat_age:5.0f}s ago"
+            + (f", {w.leases} lease(s)" if w.state == "running" else "") + (f"; {counts}" if counts else "")
+        )
+    exited = sum(1 for w in st.workers if w.state == "exited")
+    if exited and not verbose:
+        typer.echo(f"  ({exited} exited worker(s); -v lists them)")
+    for lease in sorted(st.leases, key=lambda l: l.path):
+        if verbose or lease.expired:
+            typer.echo(f"  [{'expired' if lease.expired else 'leased'}] {lease.path}: {lease.worker}, renewed {lease.age:.0f}s ago")
+
+
+def _open_cache(path: Optional[Path], max_mb: int) -> OCRCache:
+    cfg = CacheConfig(path=path, max_bytes=max_mb * _MB)
+    return OCRCache(cfg.resolved_path(), cfg.max_bytes)
+
+
+@cache_app.command(name="stats")
+def cache_stats(
+    cache_path: Optional[Path] = typer.Option(None, "--cache-path", help="OCR cache file."),
+):
+    """
+    Show OCR cache location, entry count and size.
+    """
+    cache = _open_cache(cache_path, 256)
+    st = cache.stats()
+    cache.close()
+    typer.echo(f"Path:    {st.path}")
+    typer.echo(f"Entries: {st.entries}")
+    typer.echo(f"Size:    {st.bytes / _MB:.1f} MB")
+
+
+@cache_app.command(name="prune")
+def cache_prune(
+    cache_path: Optional[Path] = typer.Option(None, "--cache-path", help="OCR cache file."),
+    max_mb: int = typer.Option(256, "--max-mb", min=0, help="Evict least-recently-used entries down to this size."),
+):
+    """
+    Evict least-recently-used OCR cache entries down to a size budget.
+    """
+    cache = _open_cache(cache_path, max_mb)
+    removed = cache.prune()
+    st = cache.stats()
+    cache.close()
+    typer.echo(f"Removed {removed} entr{'y' if removed == 1 else 'ies'}; {st.entries} left ({st.bytes / _MB:.1f} MB).")
+
+
+def _open_index(path: Optional[Path]) -> TitleIndex:
+    resolved = IndexConfig(path=path).resolved_path()
+    if not resolved.exists():
+        typer.echo(f"No title index at {resolved}; build one with `rlcl index build TSV_DIR`.", err=True)
+        raise typer.Exit(1)
+    return TitleIndex(resolved)
+
+
+@index_app.command(name="build")
+def index_build(
+    tsv_dir: Path = typer.Argument(
+        ..., exists=True, file_okay=False, dir_okay=True, resolve_path=True,
+        help="Directory with IMDb-style title.basics/title.episode/name.basics/title.crew/title.principals .tsv(.gz).",
+    ),
+    index_path: Optional[Path] = typer.Option(None, "--index-path", help="Title index file."),
+    rebuild: bool = typer.Option(False, "--rebuild", help="Start from an empty index instead of updating it."),
+):
+    """
+    Import catalog TSVs into the title index; unchanged files are skipped.
+    """
+    path = IndexConfig(path=index_path).resolved_path()
+    last: dict[str, int] = {}
+
+    def progress(source: str, rows: int) -> None:
+        if rows - last.get(source, 0) >= 1_000_000:
+            last[source] = rows
+            typer.echo(f"  {source}: {rows:,} rows ...")
+
+    imported = build_index(path, tsv_dir, rebuild=rebuild, progress=progress)
+    if not imported:
+        typer.echo(f"{path} is up to date.")
+    for source, rows in imported.items():
+        typer.echo(f"Imported {source}: {rows:,} rows")
+
+
+@index_app.command(name="stats")
+def index_stats(
+    index_path: Optional[Path] = typer.Option(None, "--index-path", help="Title index file."),
+):
+    """
+    Show title index location, row counts and when each source was imported.
+    """
+    idx = _open_index(index_path)
+    counts, sources = idx.stats(), idx.sources()
+    idx.close()
+    typer.echo(f"Path:     {idx.path} ({idx.path.stat().st_size / _MB:.1f} MB)")
+    for table, n in counts.items():
+        typer.echo(f"{table.capitalize() + ':':<10}{n:,}")
+    for name, rows, imported in sources:
+        typer.echo(f"  {name:<17}{rows:>12,} rows, imported {time.strftime('%Y-%m-%d %H:%M', time.localtime(imported))}")
+
+
+@index_app.command(name="lookup")
+def index_lookup(
+    credits: List[str] = typer.Argument(..., help='Credits as KEY=NAME[, NAME...], e.g. "Directed by=Jane Doe".'),
+    index_path: Optional[Path] = typer.Option(None, "--index-path", help="Title index file."),
+):
+    """
+    Resolve a few credits against the title index and show the scored candidates.
+    """
+    try:
+        credits_map = parse_credit_args(credits)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="CREDITS")
+    idx = _open_index(index_path)
+    t0 = time.perf_counter()
+    found = idx.lookup(credits_map)
+    ms = (time.perf_counter() - t0) * 1000
+    idx.close()
+    typer.echo(f"{found.guess or 'AMBIGUOUS'} ({ms:.1f} ms)")
+    for c in found.candidates:
+        typer.echo(f"  {c.score:7.3f}  {c.guess}  [{', '.join(c.people)}]")
+
+
+def _default_to_run(argv: list[str]) -> list[str]:
+    # Keep `rlcl [OPTIONS] DIRECTORY` working now that there are several commands.
+    if len(argv) > 1 and argv[1] == "watch":
+        return [argv[0], "run", "--watch", *argv[2:]]
+    commands = {c.name for c in app.registered_commands} | {g.name for g in app.registered_groups}
+    commands |= {"--help", "-h"}
+    if len(argv) > 1 and argv[1] not in commands:
+        return [argv[0], "run", *argv[1:]]
+    return argv
 
 
 def entrypoint():
     # console_script target in pyproject.toml: rlcl = "rollcall.cli:entrypoint"
+    import sys
+    sys.argv = _default_to_run(sys.argv)
     app()
 
 
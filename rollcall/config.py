@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Final, Iterable, Set
+from pathlib import Path
+from typing import Final, Iterable, Optional, Set
 import os
 
 
@@ -10,12 +11,24 @@ import os
 # File types we consider as media inputs
 VIDEO_EXTS: Final[Set[str]] = {".mp4", ".mkv", ".avi", ".mov"}
 
+# How frames are picked inside the credits window (see rollcall/sampling.py)
+SAMPLING_MODES: Final[tuple[str, ...]] = ("uniform", "adaptive")
+
 # Environment variables checked for the Gemini API key (in order)
 API_KEY_ENV_ORDER: Final[tuple[str, ...]] = (
     "GEMINI_API_KEY",      # preferred for the google-genai SDK
     "GOOGLE_API_KEY",      # fallback (older name)
 )
 
+# Rough characters per text token, for estimating prompt size before the API counts it
+CHARS_PER_TOKEN: Final[int] = 4
+
+
+def default_cache_dir() -> Path:
+    """$XDG_CACHE_HOME/rollcall, else ~/.cache/rollcall."""
+    base = os.getenv("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "rollcall"
+
 
 def resolve_api_key() -> str | None:
     """
@@ -38,16 +51,86 @@ class OCRConfig:
     - delay_seconds: sleep between OCR calls to avoid rate limits.
     - variation_threshold: quick grayscale-extrema check; if (hi - lo) <= threshold,
       we assume the frame is blank/solid and skip OCR.
+    - text_threshold: minimum `text_likelihood` score (0..1) for a frame to be OCR'd;
+      catches fades, logos and final shots the extrema check lets through (0 disables).
+    - crop_to_text: send only the bounding box of the detected text regions.
     - fps_expr: ffmpeg fps filter expression; e.g., "1/3" = one frame every 3 seconds.
-    - long_video_tail_sec / short_video_tail_sec: how far back from the end to sample.
+    - sampling: "uniform" (every frame `fps_expr` gives) or "adaptive": one frame per
+      `coarse_step_sec`, plus seeks down to `fine_step_sec` apart only where a new card
+      appears or a crawl outruns the coarse step, at most `max_frames` per video
+      (streaming only; see rollcall/sampling.py).
+    - long_video_tail_sec / short_video_tail_sec: how far back from the end to sample
+      when the credits can't be located.
+    - locate_credits: find the credits window from chapter markers, else a coarse
+      keyframe scan of the last `locate_scan_sec` (one sample per `locate_step_sec`;
+      text frames up to `locate_max_gap_sec` apart count as one credits run).
     - max_no_update: early-stop if the title guess doesn’t change after N iterations.
+    - refine_new_keys / refine_new_values: only ask for a new title once the trimmed
+      credits map gained this many keys, or this many values, since the last refine
+      (frames below both count as unchanged guesses; both 0 = refine every frame).
+    - refine_token_budget: approximate tokens for the credits payload sent to refine
+      and search; keys are canonicalized, names de-duplicated and the most
+      identifying keys packed first (see rollcall/payload.py; 0 = no packing).
+    - dedup_distance: skip frames whose perceptual hash is within this many bits of
+      a frame already OCR'd for the same video (< 0 disables).
+    - scroll_crop: for scrolling credits, send only the newly revealed strip.
+    - stream_frames: decode frames from the ffmpeg pipe into memory instead of
+      writing PNGs to a temp dir (falls back to PNGs if the size can't be probed).
+    - ocr_batch_size: frames per OCR request (1 = one request per frame).
+    - ocr_batch_mode: "parts" (one image part per frame) or "sheet" (labeled contact sheet).
+    - ocr_lookahead: OCR requests in flight per video; results still merge in frame
+      order, and the window shrinks to the frames left before the early stop.
     """
     delay_seconds: float = 0.0
     variation_threshold: float = 0.0
+    text_threshold: float = 0.3
+    crop_to_text: bool = False
     fps_expr: str = "1/3"
+    sampling: str = "uniform"
+    coarse_step_sec: float = 6.0
+    fine_step_sec: float = 1.5
+    max_frames: int = 120
     long_video_tail_sec: int = 210   # > 1 hour → last ~3.5 minutes
     short_video_tail_sec: int = 90   # ≤ 1 hour → last ~1.5 minutes
+    locate_credits: bool = True
+    locate_scan_sec: int = 900
+    locate_step_sec: float = 10.0
+    locate_max_gap_sec: float = 60.0
     max_no_update: int = 10
+    refine_new_keys: int = 1
+    refine_new_values: int = 2
+    refine_token_budget: int = 400
+    dedup_distance: int = 12
+    scroll_crop: bool = True
+    stream_frames: bool = True
+    ocr_batch_size: int = 1
+    ocr_batch_mode: str = "parts"
+    ocr_lookahead: int = 1
+
+
+# engines for the local OCR tier (see rollcall/services/local_ocr.py)
+LOCAL_OCR_ENGINES: Final[tuple[str, ...]] = ("tesseract",)
+
+
+@dataclass(slots=True)
+class LocalOCRConfig:
+    """
+    Local OCR tried before each Gemini OCR request (see rollcall/services/local_ocr.py).
+
+    - engine: one of LOCAL_OCR_ENGINES, or None to send every frame to Gemini.
+    - min_confidence: every text line must average at least this word confidence
+      (0..100) for the local read to be used; otherwise the frame goes to Gemini.
+    - max_unparsed: lines per frame allowed to read as neither a heading nor names
+      (copyright notices, logos, misreads) before escalating.
+    - workers: local OCR processes at once (0 = one per CPU core).
+    - lang / command: Tesseract language(s) and executable.
+    """
+    engine: Optional[str] = None
+    min_confidence: float = 80.0
+    max_unparsed: int = 0
+    workers: int = 0
+    lang: str = "eng"
+    command: str = "tesseract"
 
 
 @dataclass(slots=True)
@@ -55,11 +138,231 @@ class GeminiConfig:
     """
     Model knobs for google-genai calls. Token limits are usually passed per-call
     (e.g., ocr_max_tokens / refine_max_tokens) in core.py.
+
+    Request budget shared by every OCR/refine/search call in a run:
+    - rpm / tpm: requests- and tokens-per-minute quota (0 = unlimited).
+    - max_concurrency: requests in flight at once.
+    - max_retries: retries on 429/5xx (jittered exponential backoff, honours retry hints).
     """
     model_name: str = "gemini-2.5-flash"
     temperature: float = 0.0
     top_p: float = 1.0
     top_k: int = 1
+    rpm: int = 0
+    tpm: int = 0
+    max_concurrency: int = 8
+    max_retries: int = 5
+
+
+@dataclass(slots=True)
+class PipelineConfig:
+    """
+    Worker counts for the staged pipeline (probe → extract → precheck → OCR/refine → rename).
+
+    - workers: files probed, prechecked and identified concurrently.
+    - extract_workers: concurrent ffmpeg frame extractions.
+    - ocr_concurrency: OCR requests in flight across all files.
+    - queue_size: bound on files waiting between two stages (limits temp disk use).
+    - frame_buffers: decoded frames held in memory per streaming file.
+    """
+    workers: int = 4
+    extract_workers: int = 2
+    ocr_concurrency: int = 4
+    queue_size: int = 4
+    frame_buffers: int = 4
+
+
+# name -> (PIL format, MIME type)
+UPLOAD_FORMATS: Final = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+@dataclass(slots=True)
+class UploadConfig:
+    """
+    How frames are prepared right before upload (see image_utils.prepare_upload).
+    The defaults send frames as decoded (full-size colour PNG); each option trades
+    bytes and image tokens against legibility, so measure it first with
+    `benchmarks/bench_upload_prep.py --ocr` on your own frames.
+
+    - grayscale: drop colour; credits are nearly always light text on dark.
+    - crop_borders: cut letterbox bars and the empty black around the text.
+    - text_height: downscale so text lines are about this many px tall (0 = keep size).
+    - format: "png", "jpeg" or "webp"; `quality` applies to the lossy formats.
+    """
+    grayscale: bool = False
+    crop_borders: bool = False
+    text_height: int = 0
+    format: str = "png"
+    quality: int = 90
+
+    @property
+    def identity(self) -> bool:
+        """True when frames go up exactly as decoded (lossless PNG, full size, colour)."""
+        return self.format == "png" and not (self.grayscale or self.crop_borders or self.text_height > 0)
+
+
+@dataclass(slots=True)
+class ScanConfig:
+    """
+    Which files under the media directory are processed (see rollcall/scanner.py).
+
+    - recursive: descend into subdirectories (e.g. Show/Season 01/).
+    - include / exclude: glob patterns matched against the path relative to the
+      media directory or the bare name; excluded directories are not descended.
+    - exts: media extensions (lowercase, with the dot).
+    - min_size: skip files smaller than this many bytes (samples, trailers).
+    - skip_named: skip files already named like RollCall output
+      ("Title_SxxEyy", "Title (YYYY)").
+    - follow_symlinks: descend into symlinked directories.
+    """
+    recursive: bool = True
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    exts: frozenset[str] = frozenset(VIDEO_EXTS)
+    min_size: int = 0
+    skip_named: bool = True
+    follow_symlinks: bool = False
+
+
+@dataclass(slots=True)
+class CacheConfig:
+    """
+    Persistent OCR result cache (see rollcall/cache.py).
+
+    - enabled: look up/store OCR results by frame content + model + prompt version.
+    - path: SQLite file; defaults to <default_cache_dir()>/ocr.sqlite3.
+    - max_bytes: LRU eviction budget for stored results.
+    """
+    enabled: bool = True
+    path: Optional[Path] = None
+    max_bytes: int = 256 * 1024 * 1024
+
+    def resolved_path(self) -> Path:
+        return self.path or default_cache_dir() / "ocr.sqlite3"
+
+
+@dataclass(slots=True)
+class MetadataConfig:
+    """
+    Identification from container tags and subtitle text before any frame is
+    decoded (see rollcall/metadata.py).
+
+    - enabled: try tags, then subtitle cues, before extracting frames.
+    - trust_title: accept a film `title` tag (with a year, not a release name)
+      without OCR; otherwise it is only a hint for refine.
+    - subtitles: read text subtitle tracks for credit cues.
+    - subtitle_tail_sec: how much of the end of the file to read cues from.
+    - max_subtitle_streams: text tracks tried per file.
+    - min_names / min_keys: director/writer/creator/cast names, under at least
+      `min_keys` different headings, the cues must yield to refine from them
+      alone and skip OCR; with fewer they seed the frame pipeline (unless the
+      title index names the title from them).
+    """
+    enabled: bool = True
+    trust_title: bool = False
+    subtitles: bool = True
+    subtitle_tail_sec: float = 480.0
+    max_subtitle_streams: int = 2
+    min_names: int = 4
+    min_keys: int = 2
+
+
+@dataclass(slots=True)
+class SeriesConfig:
+    """
+    Reusing show context across sibling episodes in one run (see rollcall/series.py).
+
+    - enabled: match files to series identified earlier in the run by shared
+      recurring credits, and tell refine which show it is.
+    - min_shared: recurring names a file must share with a series to join it.
+    - max_no_update: early stop once the guess is an episode of the matched series
+      and unchanged this many times (instead of OCRConfig.max_no_update).
+    - group_episodes: files matched to a series but left without an episode number
+      are placed together at the end, one request per `group_size` files.
+    """
+    enabled: bool = True
+    min_shared: int = 3
+    max_no_update: int = 3
+    group_episodes: bool = False
+    group_size: int = 12
+
+
+@dataclass(slots=True)
+class IndexConfig:
+    """
+    Offline title index consulted before refine (see rollcall/title_index.py).
+
+    - enabled: use the index if one has been built (`rlcl index build`).
+    - path: SQLite file; defaults to <default_cache_dir()>/titles.sqlite3.
+    - min_people: distinct credited names the best title must share with the credits.
+    - min_margin: the best title must score this many times the runner-up;
+      otherwise refine is asked, with the top candidates as hints.
+    """
+    enabled: bool = True
+    path: Optional[Path] = None
+    min_people: int = 2
+    min_margin: float = 2.0
+
+    def resolved_path(self) -> Path:
+        return self.path or default_cache_dir() / "titles.sqlite3"
+
+
+@dataclass(slots=True)
+class MetricsConfig:
+    """
+    Run instrumentation outputs (see rollcall/logging.py); all off by default.
+
+    - json_path: JSON run report (per-file timings, counters, latency histograms).
+    - prometheus_path: Prometheus textfile, e.g. for node_exporter's textfile collector.
+    - profile_path: cProfile the pipeline stages and frame decoding; merged pstats output.
+    """
+    json_path: Optional[Path] = None
+    prometheus_path: Optional[Path] = None
+    profile_path: Optional[Path] = None
+
+
+@dataclass(slots=True)
+class WatchConfig:
+    """
+    `rlcl watch`: one long-lived run over an ingest directory (see rollcall/watch.py).
+
+    - settle_sec: a file is queued once its size and mtime have not changed for
+      this long (files already that old when first seen are queued after one rescan).
+    - poll_sec: rescan interval when polling.
+    - inotify: wake on filesystem events where available (Linux), so a file is
+      seen the moment it lands; polling is then a safety net every `rescan_sec`.
+    """
+    settle_sec: float = 5.0
+    poll_sec: float = 2.0
+    inotify: bool = True
+    rescan_sec: float = 60.0
+
+
+@dataclass(slots=True)
+class QueueConfig:
+    """
+    Several rlcl processes, on one host or many, sharing a library (see rollcall/workqueue.py).
+
+    - enabled: claim each file with a lease under `<directory>/.rollcall-queue` before
+      processing it; files leased or finished by another worker are skipped.
+    - worker: name in the progress view (default: host-pid).
+    - lease_sec: a lease not renewed for this long is taken over (its worker died);
+      leases are renewed every `heartbeat_sec` (a sixth of it).
+    - wait: once the scan is done, wait on files other workers hold and take over the
+      ones whose leases expire, instead of exiting.
+    """
+    enabled: bool = False
+    worker: Optional[str] = None
+    lease_sec: float = 120.0
+    wait: bool = True
+
+    @property
+    def heartbeat_sec(self) -> float:
+        return max(1.0, self.lease_sec / 6)
 
 
 # ---- Helpers for callers -----------------------------------------------------
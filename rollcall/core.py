@@ -1,98 +1,873 @@
 from pathlib import Path
-import shutil, tempfile, time
-from typing import Optional
+from dataclasses import dataclass, field
+import collections, itertools, queue, shutil, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 
-from .config import OCRConfig, GeminiConfig, resolve_api_key, VIDEO_EXTS, is_media_file
-from .services.genai_client import make_client
+import numpy as np
+
+from .config import OCRConfig, GeminiConfig, PipelineConfig, CacheConfig, UploadConfig, ScanConfig, MetricsConfig, IndexConfig, SeriesConfig, MetadataConfig, LocalOCRConfig, QueueConfig, resolve_api_key
+from .cache import OCRCache
+from .journal import (
+    Journal, JournalEntry, fingerprint, open_journal,
+    STAGE_OCR, STAGE_IDENTIFIED, STAGE_RENAMED, STAGE_SKIPPED, STAGE_FAILED,
+)
+from .locate import locate_credits as _locate_credits
+from .logging import metrics, profiler, write_json_report, write_prometheus
+from .pipeline import Stage, run_pipeline
+from .scanner import iter_media
+from .series import SeriesTracker, split_episode
+from .services.genai_client import LazyClient
 from .services.ocr_pairs import OCRService
+from .services.local_ocr import make_local_ocr
 from .services.guess import GuesserService
+from .services.requester import GeminiRequester
+from .title_index import open_title_index
 from .utils.ffmpeg_utils import (
-    ffprobe_duration_seconds as _ffprobe_duration_seconds,
-    tail_start_time as _tail_start_time,
+    probe_media as _probe_media,
+    duration_from_probe as _duration_from_probe,
+    video_size as _video_size,
     extract_frames as _extract_frames,
+    stream_frames as _stream_frames,
+    FramePool,
 )
-from .utils.image_utils import image_has_text
-from .merge import merge_pair_entries, map_trim
+from .utils.image_utils import image_has_text, text_likelihood, prepare_upload, FrameDeduper, Box, UPLOAD_FORMATS
+from .merge import merge_pair_entries, map_delta
+from .metadata import read_metadata, enough_credits
+from .payload import build_payload
+from .sampling import AdaptiveSampler
+from .types import OCRResult
+from .utils.fs_utils import rename_noreplace
+from .workqueue import WorkQueue
 
-def process_media_directory(
-    directory: Path,
-    api_key: Optional[str] = None,
-    ocr_cfg: Optional[OCRConfig] = None,
-    gemini_cfg: Optional[GeminiConfig] = None,
-    dry_run: bool = False,
-    verbose: bool = True,
-    ocr_max_tokens: int = 768,
-    refine_max_tokens: int = 64,
-    use_search: bool = True,
-) -> None:
-    ocr_cfg = ocr_cfg or OCRConfig()
-    gemini_cfg = gemini_cfg or GeminiConfig()
-    client = make_client(api_key)
 
-    ocr = OCRService(client, model=gemini_cfg.model_name)
-    guess = GuesserService(client, model=gemini_cfg.model_name)
+_END = object()
+WATCH_REPORT_FILES = 1000  # `paths=` runs (rlcl watch): per-file report rows kept
 
-    with tempfile.TemporaryDirectory(prefix="rollcall_") as tmpdir:
-        frames_dir = Path(tmpdir)
 
-        for entry in sorted(directory.iterdir()):
-            if not entry.is_file() or entry.suffix.lower() not in {".mp4", ".mkv", ".avi", ".mov"}:
-                continue
-            if verbose:
-                print(f"Processing {entry.name} ...")
+def _intersect(a: Optional[Box], b: Optional[Box]) -> Optional[Box]:
+    """Overlap of two crop boxes (None = whole frame); falls back to `a` if disjoint."""
+    if a is None or b is None:
+        return b if a is None else a
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    return box if box[0] < box[2] and box[1] < box[3] else a
 
-            duration = _ffprobe_duration_seconds(entry)
-            if not duration:
-                if verbose: print("  Skipping (no duration found).")
-                continue
 
-            start_time = _tail_start_time(duration, ocr_cfg)
-            for f in frames_dir.glob("*"): f.unlink(missing_ok=True)
-            _extract_frames(entry, frames_dir, start_time, ocr_cfg.fps_expr)
+class _FrameFeed:
+    """
+    Streaming mode: decodes one file's frames on a background thread, drops the
+    ones failing the precheck, and queues the rest for identify. Buffers come
+    from a FramePool, so a consumer that falls behind throttles ffmpeg.
+    """
 
-            credits_map: dict[str, set[str]] = {}
-            current_guess: Optional[str] = None
-            no_update_count = 0
+    def __init__(
+        self,
+        frames: Iterator[np.ndarray],
+        pool: FramePool,
+        *,
+        keep: Callable[[np.ndarray], bool],
+        on_exit: Callable[[], None],
+    ):
+        self.pool = pool
+        self._q: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=profiler.wrap(self._run), args=(frames, keep, on_exit), daemon=True)
+        self._thread.start()
+
+    def _run(self, frames: Iterator[np.ndarray], keep: Callable[[np.ndarray], bool], on_exit: Callable[[], None]) -> None:
+        try:
+            for frame in frames:
+                if keep(frame):
+                    self._q.put(frame)
+                else:
+                    self.pool.release(frame)
+        except Exception as e:
+            self._q.put(e)
+        finally:
+            self._q.put(_END)
+            on_exit()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            item = self._q.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def release(self, frame: np.ndarray) -> None:
+        self.pool.release(frame)
+
+    def close(self) -> None:
+        self.pool.close()  # unblocks the decoder, which then stops ffmpeg
+
+
+@dataclass(slots=True)
+class MediaJob:
+    """Per-file state carried between pipeline stages."""
+    path: Path
+    fp: Optional[str] = None                 # journal fingerprint
+    fp_stat: tuple[int, int] = (0, 0)        # (size, mtime_ns) at fingerprint time
+    resume: Optional[JournalEntry] = None    # partial OCR state from a previous run
+    replay: Optional[JournalEntry] = None    # finished in a previous run; nothing to do
+    probe: Optional[dict] = None
+    duration: Optional[float] = None
+    start_time: float = 0.0
+    end_time: Optional[float] = None         # None = sample to the end of the file
+    feed: Optional[_FrameFeed] = None
+    frames_dir: Optional[Path] = None
+    frames: list[Path] = field(default_factory=list)
+    credits_map: dict[str, set[str]] = field(default_factory=dict)
+    guess: Optional[str] = None
+    series: Optional[str] = None             # show matched from sibling files (series.py)
+    hint_title: Optional[str] = None         # unverified container title tag (metadata.py)
+    sampler: Optional[AdaptiveSampler] = None  # adaptive sampling state (sampling.py)
+    ocr_saved: int = 0
+    ocr_discarded: int = 0                   # speculative OCR results unused after early stop
+    ocr_sent: int = 0                        # frames handed to OCR (cache hits included)
+    started: float = 0.0                     # time.monotonic() on entering the pipeline
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per stage
+    logs: list[str] = field(default_factory=list)
+
+    def log(self, msg: str) -> None:
+        self.logs.append(msg)
 
-            for frame_file in sorted(frames_dir.glob("frame_*.png")):
-                if not image_has_text(frame_file, ocr_cfg.variation_threshold):
-                    continue
 
-                obj = ocr.extract_pairs(frame_file, max_tokens=ocr_max_tokens)
+class MediaProcessor:
+    """
+    Runs the staged pipeline over media files. Stages overlap across files, so
+    ffmpeg can decode file N+1 while file N's frames are being OCR'd; within a
+    file, OCR and refine stay sequential because refine drives the early stop.
+    Renames happen on the calling thread in input order, matching a serial run.
+    """
+
+    def __init__(
+        self,
+        ocr: OCRService,
+        guess: GuesserService,
+        *,
+        ocr_cfg: OCRConfig,
+        pipeline_cfg: PipelineConfig,
+        ocr_max_tokens: int = 768,
+        refine_max_tokens: int = 64,
+        use_search: bool = True,
+        journal: Optional[Journal] = None,
+        force: bool = False,
+        upload_cfg: Optional[UploadConfig] = None,
+        series_cfg: Optional[SeriesConfig] = None,
+        metadata_cfg: Optional[MetadataConfig] = None,
+    ):
+        self.ocr = ocr
+        self.guess = guess
+        self.ocr_cfg = ocr_cfg
+        self.pipeline_cfg = pipeline_cfg
+        self.ocr_max_tokens = ocr_max_tokens
+        self.refine_max_tokens = refine_max_tokens
+        self.use_search = use_search
+        self.journal = journal
+        self.force = force
+        self.upload_cfg = upload_cfg or UploadConfig()
+        self._upload_mime = UPLOAD_FORMATS[self.upload_cfg.format][1]
+        self.series_cfg = series_cfg or SeriesConfig()
+        self.series = SeriesTracker(min_shared=self.series_cfg.min_shared) if self.series_cfg.enabled else None
+        self.metadata_cfg = metadata_cfg or MetadataConfig()
+        self._ocr_slots = threading.BoundedSemaphore(max(1, pipeline_cfg.ocr_concurrency))
+        self._extract_slots = threading.BoundedSemaphore(max(1, pipeline_cfg.extract_workers))
+        self._tmp_root: Optional[str] = None
+        self._spec_pool: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self.ocr_saved = 0  # OCR calls avoided by dedup, across files
+
+    # ---- stages --------------------------------------------------------------
+
+    def probe(self, job: MediaJob) -> bool:
+        if self.journal is not None and not self._consult_journal(job):
+            return False
+
+        job.probe = _probe_media(job.path)
+        job.duration = _duration_from_probe(job.probe)
+        if not job.duration:
+            job.log("  Skipping (no duration found).")
+            self._record(job, STAGE_SKIPPED)
+            return False
+        if self.metadata_cfg.enabled and job.resume is None and self._from_metadata(job):
+            if self.series is not None:
+                self.series.observe(job.guess, job.credits_map)
+            self._identified(job)
+            return False  # identified without decoding a frame
+        return True
+
+    def _from_metadata(self, job: MediaJob) -> bool:
+        """True when container tags or subtitle credit cues identified the file."""
+        md = read_metadata(job.path, job.probe, job.duration or 0.0, self.metadata_cfg)
+        if md.guess:
+            job.guess = md.guess
+            job.log(f"  Metadata: tags say '{md.guess}'; skipping OCR.")
+            metrics.inc("metadata_total", outcome="tags")
+            return True
+        job.hint_title = md.title
+        if md.credits:
+            job.credits_map = md.credits
+            if self.series is not None:
+                job.series = self.series.match(job.credits_map)
+            guess = None
+            if enough_credits(md.credits, self.metadata_cfg):
+                guess = self.guess.refine_title(
+                    self._payload(job), max_tokens=self.refine_max_tokens, previous=md.title, series=job.series,
+                )
+            elif self.guess.index is not None:
+                guess = self.guess.index.lookup(job.credits_map).guess  # a confident offline match only
+            if guess and guess != "UNKNOWN_TITLE":
+                job.guess = guess
+                job.log(f"  Metadata: subtitle credits -> '{guess}'; skipping OCR.")
+                metrics.inc("metadata_total", outcome="subtitles")
+                return True
+            job.log(f"  Metadata: {sum(map(len, md.credits.values()))} credit name(s) from subtitles; reading frames.")
+        metrics.inc("metadata_total", outcome="frames")
+        return False
+
+    def extract(self, job: MediaJob) -> bool:
+        size = _video_size(job.probe) if self.ocr_cfg.stream_frames else None
+        if size:
+            # streaming: decode continues in the background while identify OCRs
+            # the first frames; the slot is held until ffmpeg exits
+            self._extract_slots.acquire()
+            try:
+                self._locate(job)
+            except BaseException:
+                self._extract_slots.release()
+                raise
+            pool = FramePool(size, self.pipeline_cfg.frame_buffers)
+            if self.ocr_cfg.sampling == "adaptive":
+                job.sampler = AdaptiveSampler(
+                    job.path, job.start_time, job.end_time, job.duration, size, self.ocr_cfg, pool=pool,
+                )
+                frames = iter(job.sampler)
+            else:
+                frames = _stream_frames(
+                    job.path, job.start_time, self.ocr_cfg.fps_expr, size, end_time=job.end_time, pool=pool,
+                )
+            job.feed = _FrameFeed(
+                frames, pool,
+                keep=self._has_text,
+                on_exit=self._extract_slots.release,
+            )
+            return True
+
+        with self._extract_slots:
+            self._locate(job)
+            job.frames_dir = Path(tempfile.mkdtemp(prefix="job_", dir=self._tmp_root))
+            _extract_frames(job.path, job.frames_dir, job.start_time, self.ocr_cfg.fps_expr, job.end_time)
+        return True
+
+    def _locate(self, job: MediaJob) -> None:
+        assert job.duration is not None
+        window = _locate_credits(job.path, job.probe, job.duration, self.ocr_cfg)
+        job.start_time, job.end_time = window.start, window.end
+        if window.source != "tail":
+            job.log(f"  Credits window: {window.describe()}")
+
+    def precheck(self, job: MediaJob) -> bool:
+        if job.feed is not None:
+            return True  # streaming frames are prechecked on the decode thread
+        assert job.frames_dir is not None
+        job.frames = [
+            f for f in sorted(job.frames_dir.glob("frame_*.png"))
+            if self._has_text(f)
+        ]
+        return True
+
+    def _has_text(self, frame: Union[Path, np.ndarray]) -> bool:
+        metrics.inc("frames_total", outcome="sampled")
+        thr = self.ocr_cfg.text_threshold
+        keep = image_has_text(frame, self.ocr_cfg.variation_threshold) and (
+            thr <= 0 or text_likelihood(frame).score >= thr
+        )
+        if not keep:
+            metrics.inc("frames_total", outcome="no_text")
+        return keep
+
+    def identify(self, job: MediaJob) -> bool:
+        try:
+            self._ocr_and_refine(job)
+        finally:
+            self._cleanup(job)
+
+        if (not job.guess or job.guess == "UNKNOWN_TITLE") and self.use_search and not self.needs_episode(job):
+            job.log("  Local guess unknown. Trying search-backed fallback...")
+            job.guess = self.guess.search_fallback(self._payload(job), max_tokens=self.refine_max_tokens)
+        if self.series is not None:
+            self.series.observe(job.guess, job.credits_map)
+        self._identified(job)
+        return True
+
+    def _identified(self, job: MediaJob) -> None:
+        """Journal `job`'s guess as final, unless the episode is still left to `resolve_episodes`."""
+        if not self.needs_episode(job):
+            self._record(job, STAGE_IDENTIFIED)
+
+    def _ocr_and_refine(self, job: MediaJob) -> None:
+        no_update_count = job.resume.no_update if job.resume else 0
+        dedup = FrameDeduper(max_distance=self.ocr_cfg.dedup_distance, scroll_crop=self.ocr_cfg.scroll_crop)
+        # the payload the current guess was refined from
+        refined: dict[str, list[str]] = self._payload(job) if job.resume else {}
+        refines = skipped = 0
+        results = self._ocr_results(
+            job, self._images(job, dedup), budget=lambda: self._max_no_update(job) - no_update_count,
+        )
+        try:
+            for i, obj in results:
                 if obj.get("entries"):
-                    merge_pair_entries(credits_map, obj)
+                    merge_pair_entries(job.credits_map, obj)
                 else:
                     continue
+                if self.series is not None and job.series is None:
+                    job.series = self.series.match(job.credits_map)
+                    if job.series:
+                        metrics.inc("series_matches_total")
+                        job.log(f"  Series: credits match '{job.series}' from sibling files.")
+                if self.needs_episode(job):
+                    # the grouped request places the episode: no refines, only a few
+                    # more frames for the credits that tell this episode apart
+                    no_update_count += 1
+                    self._record(job, STAGE_OCR, frames_done=i + 1, no_update=no_update_count)
+                    if no_update_count >= self._max_no_update(job):
+                        break
+                    continue
 
-                # (trim large maps to keep token use sane)
-                trimmed = map_trim(credits_map, per_key=12)
+                # ranked, de-duplicated and packed to the token budget
+                trimmed = self._payload(job)
 
-                new_guess = guess.refine_title(trimmed, max_tokens=refine_max_tokens, previous=current_guess)
-                if new_guess == current_guess and new_guess != "UNKNOWN_TITLE":
+                if job.guess is None or self._refine_due(*map_delta(refined, trimmed)):
+                    new_guess = self.guess.refine_title(
+                        trimmed, max_tokens=self.refine_max_tokens, previous=job.guess or job.hint_title, series=job.series,
+                    )
+                    refined, refines = trimmed, refines + 1
+                else:
+                    # nothing material changed: refine would answer as before
+                    new_guess, skipped = job.guess, skipped + 1
+                if new_guess == job.guess and new_guess != "UNKNOWN_TITLE":
                     no_update_count += 1
                 else:
-                    current_guess, no_update_count = new_guess, 0
+                    job.guess, no_update_count = new_guess, 0
+                self._record(job, STAGE_OCR, frames_done=i + 1, no_update=no_update_count)
 
-                if no_update_count >= ocr_cfg.max_no_update:
+                if no_update_count >= self._max_no_update(job):
                     break
 
-                time.sleep(ocr_cfg.delay_seconds)
+                time.sleep(self.ocr_cfg.delay_seconds)
+
+            # small deltas held back above still get one last look
+            trimmed = self._payload(job)
+            if job.guess is not None and not self.needs_episode(job) and any(map_delta(refined, trimmed)):
+                job.guess = self.guess.refine_title(
+                    trimmed, max_tokens=self.refine_max_tokens, previous=job.guess or job.hint_title, series=job.series,
+                )
+                refines += 1
+            if skipped:
+                job.log(f"  Refine: {refines} request(s), {skipped} skipped (no material change).")
+        finally:
+            results.close()  # cancels speculative requests once the guess is stable
+            if job.ocr_discarded:
+                job.log(f"  Speculative OCR: {job.ocr_discarded} result(s) discarded after early stop.")
+            # each skipped frame saves one OCR call (and the refine it would trigger)
+            job.ocr_saved = dedup.skipped
+            metrics.inc("frames_total", dedup.skipped, outcome="duplicate")
+            with self._stats_lock:
+                self.ocr_saved += dedup.skipped
+            if job.sampler is not None:
+                job.log(f"  Sampling: {job.sampler.coarse} coarse frame(s) every {job.sampler.step:g}s, {job.sampler.seeks} seek(s).")
+            if dedup.skipped or dedup.cropped:
+                job.log(f"  Dedup: skipped {dedup.skipped} near-duplicate frame(s), cropped {dedup.cropped} scrolled frame(s).")
+
+    def _max_no_update(self, job: MediaJob) -> int:
+        """Unchanged guesses before the early stop; fewer once only the episode was left to find."""
+        if self.needs_episode(job):
+            return min(self.ocr_cfg.max_no_update, self.series_cfg.max_no_update)
+        ep = split_episode(job.guess)
+        if job.series and ep and ep[0] == job.series:
+            return min(self.ocr_cfg.max_no_update, self.series_cfg.max_no_update)
+        return self.ocr_cfg.max_no_update
+
+    def needs_episode(self, job: MediaJob) -> bool:
+        """Matched to a series but not placed in it; resolved by `resolve_episodes` in group mode."""
+        if not (self.series_cfg.group_episodes and job.series):
+            return False
+        ep = split_episode(job.guess)
+        return ep is None or ep[0] != job.series
+
+    def resolve_episodes(self, jobs: list[MediaJob]) -> None:
+        """
+        Place `jobs` (see `needs_episode`) with one request per series and
+        `group_size` files. A file the grouped request fails on or leaves out
+        gets a refine of its own; if that does not place it in the series
+        either, its guess is dropped, so it is neither renamed nor journaled as
+        final and the next run tries again.
+        """
+        assert self.series is not None
+        by_series: dict[str, list[MediaJob]] = {}
+        for job in jobs:
+            by_series.setdefault(job.series, []).append(job)
+        size = max(1, self.series_cfg.group_size)
+        for series, group in by_series.items():
+            for i in range(0, len(group), size):
+                chunk = group[i:i + size]
+                # labels are unique per request; the same file name can recur across season folders
+                labels = {f"{k + 1}:{job.path.name}": job for k, job in enumerate(chunk)}
+                try:
+                    found = self.guess.resolve_episodes(
+                        series,
+                        {label: self.series.distinctive(series, self._payload(job)) for label, job in labels.items()},
+                        taken=self.series.taken(series),
+                        max_tokens=self.refine_max_tokens,
+                    )
+                except Exception as e:
+                    print(f"  Grouped episode request failed: {e}")
+                    found = {}
+                for label, job in labels.items():
+                    if label in found:
+                        job.log(f"  Series: placed as {found[label]} with {len(chunk) - 1} sibling(s) in one request.")
+                        job.guess = found[label]
+                    else:
+                        self._place_alone(job)
+                    if self.needs_episode(job):
+                        job.log(f"  Series: no episode of {series} found; leaving the file for the next run.")
+                        job.guess = None
+                        continue
+                    self.series.observe(job.guess, job.credits_map)
+                    self._record(job, STAGE_IDENTIFIED)
+
+    def _place_alone(self, job: MediaJob) -> None:
+        try:
+            job.guess = self.guess.refine_title(
+                self._payload(job), max_tokens=self.refine_max_tokens, previous=job.guess, series=job.series,
+            )
+        except Exception as e:
+            job.log(f"  Series: refine failed: {e}")
+
+    def _payload(self, job: MediaJob) -> dict[str, list[str]]:
+        return build_payload(job.credits_map, budget=self.ocr_cfg.refine_token_budget)
 
-            if (not current_guess or current_guess == "UNKNOWN_TITLE") and use_search:
-                if verbose: print("  Local guess unknown. Trying search-backed fallback...")
-                trimmed = map_trim(credits_map, per_key=12)
-                current_guess = guess.search_fallback(trimmed, max_tokens=refine_max_tokens)
+    def _refine_due(self, new_keys: int, new_values: int) -> bool:
+        """Whether the credits map grew enough since the last refine to ask again."""
+        by_keys, by_values = self.ocr_cfg.refine_new_keys, self.ocr_cfg.refine_new_values
+        if by_keys <= 0 and by_values <= 0:
+            return True  # refine after every frame with entries
+        return (by_keys > 0 and new_keys >= by_keys) or (by_values > 0 and new_values >= by_values)
+
+    def _images(self, job: MediaJob, dedup: FrameDeduper) -> Iterator[tuple[int, Union[Path, bytes]]]:
+        """(frame index, upload image) for each frame that survives dedup."""
+        # resume from the journal: frames before `skip` were already merged
+        skip = job.resume.frames_done if job.resume else 0
+        for i, frame in enumerate(self._frames(job)):
+            try:
+                if i < skip:
+                    continue
+                decision = dedup.check(frame)
+                if decision.skip:
+                    continue
+                box = decision.box
+                if self.ocr_cfg.crop_to_text:
+                    box = _intersect(box, text_likelihood(frame).bounds())
+                # encode in memory only now that the frame is actually sent
+                up = self.upload_cfg
+                if isinstance(frame, Path) and box is None and up.identity:
+                    image = frame
+                else:
+                    image, _ = prepare_upload(
+                        frame, box,
+                        grayscale=up.grayscale, crop_borders=up.crop_borders, text_height=up.text_height,
+                        fmt=up.format, quality=up.quality,
+                    )
+            finally:
+                if job.feed is not None:
+                    job.feed.release(frame)
+            job.ocr_sent += 1
+            metrics.inc("frames_total", outcome="ocr")
+            yield i, image
+
+    def _ocr_results(
+        self,
+        job: MediaJob,
+        images: Iterator[tuple[int, Union[Path, bytes]]],
+        budget: Callable[[], int],
+    ) -> Iterator[tuple[int, OCRResult]]:
+        """
+        OCR results in frame order, one request per frame or per batch.
+
+        With `ocr_lookahead` K > 1, up to K requests for the next frames are in
+        flight while earlier results are merged. The window never exceeds
+        `budget()` (frames left before the early stop could fire), and requests
+        still pending when the caller stops are cancelled or their results dropped.
+        """
+        size = max(1, self.ocr_cfg.ocr_batch_size)
+        chunks = iter(lambda: list(itertools.islice(images, size)), [])
+
+        def ocr(batch: list[tuple[int, Union[Path, bytes]]]) -> list[OCRResult]:
+            with self._ocr_slots:
+                if size == 1:
+                    return [self.ocr.extract_pairs(batch[0][1], max_tokens=self.ocr_max_tokens, mime_type=self._upload_mime)]
+                return self.ocr.extract_pairs_batch(
+                    [image for _, image in batch],
+                    max_tokens=self.ocr_max_tokens,
+                    mode=self.ocr_cfg.ocr_batch_mode,
+                    mime_type=self._upload_mime,
+                )
+
+        lookahead = max(1, self.ocr_cfg.ocr_lookahead)
+        if lookahead == 1:
+            for batch in chunks:
+                yield from zip((i for i, _ in batch), ocr(batch))
+            return
+
+        pending: collections.deque = collections.deque()
+        try:
+            while True:
+                window = max(1, min(lookahead, -(-budget() // size)))
+                while len(pending) < window:
+                    batch = next(chunks, None)
+                    if batch is None:
+                        break
+                    pending.append((batch, self._speculate().submit(ocr, batch)))
+                if not pending:
+                    return
+                batch, fut = pending.popleft()
+                yield from zip((i for i, _ in batch), fut.result())
+        finally:
+            for batch, fut in pending:
+                if not fut.cancel():
+                    job.ocr_discarded += len(batch)
+
+    def _speculate(self) -> ThreadPoolExecutor:
+        with self._stats_lock:
+            if self._spec_pool is None:
+                workers = max(1, self.pipeline_cfg.workers) * max(1, self.ocr_cfg.ocr_lookahead)
+                self._spec_pool = ThreadPoolExecutor(workers, thread_name_prefix="rollcall-ocr")
+            return self._spec_pool
+
+    # ---- journal -------------------------------------------------------------
+
+    def _consult_journal(self, job: MediaJob) -> bool:
+        """Returns False when a previous run already finished this file."""
+        assert self.journal is not None
+        job.fp, size, mtime_ns = fingerprint(job.path)
+        job.fp_stat = (size, mtime_ns)
+        entry = None if self.force else self.journal.get(job.fp)
+        if entry is None:
+            return True
+        if entry.final:
+            job.replay, job.guess = entry, entry.guess
+            if self.series is not None:
+                self.series.observe(entry.guess, entry.credits)
+            job.log(f"  Journal: already {entry.stage}; skipping OCR.")
+            return False
+        if entry.stage == STAGE_OCR:
+            job.resume, job.guess, job.credits_map = entry, entry.guess, entry.credits
+            job.log(f"  Journal: resuming after frame {entry.frames_done}.")
+        return True
+
+    def _record(self, job: MediaJob, stage: str, **kw: Any) -> None:
+        if self.journal is None or job.fp is None:
+            return
+        size, mtime_ns = job.fp_stat
+        self.journal.record(
+            job.fp, job.path, stage,
+            size=size, mtime_ns=mtime_ns, guess=job.guess, credits=job.credits_map, **kw,
+        )
+
+    def record_outcome(self, job: MediaJob, *, new_path: Optional[Path] = None, error: Optional[BaseException] = None) -> None:
+        """Called on the rename thread once a job's rename (or failure) is known."""
+        if self.journal is None or job.fp is None:
+            return
+        if error is not None:
+            self._record(job, STAGE_FAILED, error=str(error))
+        elif new_path is not None:
+            self.journal.record(job.fp, new_path, STAGE_RENAMED, guess=job.guess, credits=job.credits_map, renamed_to=new_path)
+
+    def _frames(self, job: MediaJob) -> Iterable[Union[Path, np.ndarray]]:
+        return job.feed if job.feed is not None else job.frames
+
+    def _cleanup(self, job: MediaJob) -> None:
+        if job.feed is not None:
+            job.feed.close()
+            job.feed = None
+        if job.frames_dir is not None:
+            shutil.rmtree(job.frames_dir, ignore_errors=True)
+            job.frames_dir = None
+        job.frames = []
+
+    # ---- driver --------------------------------------------------------------
+
+    def stages(self) -> list[Stage[MediaJob]]:
+        cfg = self.pipeline_cfg
+        return [
+            Stage("probe", self._timed("probe", self.probe), cfg.workers),
+            Stage("extract", self._timed("extract", self.extract), cfg.extract_workers),
+            Stage("precheck", self._timed("precheck", self.precheck), cfg.workers),
+            Stage("identify", self._timed("identify", self.identify), cfg.workers),
+        ]
+
+    @staticmethod
+    def _timed(name: str, fn: Callable[[MediaJob], bool]) -> Callable[[MediaJob], bool]:
+        fn = profiler.wrap(fn)
+
+        def timed(job: MediaJob) -> bool:
+            t0 = time.perf_counter()
+            try:
+                return fn(job)
+            finally:
+                dt = time.perf_counter() - t0
+                job.timings[name] = job.timings.get(name, 0.0) + dt
+                metrics.observe("stage_seconds", dt, stage=name)
+        return timed
+
+    def run(self, paths: Iterable[Path], *, ordered: bool = True) -> Iterator[tuple[MediaJob, Optional[BaseException]]]:
+        """Yields (job, error) per input path, once its guess is final: in input order, else as each finishes."""
+        with tempfile.TemporaryDirectory(prefix="rollcall_") as tmpdir:
+            self._tmp_root = tmpdir
+            jobs = (MediaJob(path=p, started=time.monotonic()) for p in paths)
+            try:
+                for job, err in run_pipeline(
+                    jobs, self.stages(), queue_size=self.pipeline_cfg.queue_size, ordered=ordered,
+                ):
+                    self._cleanup(job)
+                    job.timings["total"] = time.monotonic() - job.started
+                    metrics.observe("file_seconds", job.timings["total"])
+                    yield job, err
+            finally:
+                if self._spec_pool is not None:
+                    self._spec_pool.shutdown(wait=False, cancel_futures=True)
+                    self._spec_pool = None
+
+
+def rename_media(job: MediaJob, *, dry_run: bool, verbose: bool) -> Optional[Path]:
+    entry, current_guess = job.path, job.guess
+    if not current_guess or current_guess == "UNKNOWN_TITLE":
+        if verbose: print("  No usable title. Skipping rename.")
+        return None
+
+    new_name = f"{current_guess}{entry.suffix}"
+    new_path = entry.with_name(new_name)
+    if new_path == entry:
+        if verbose: print(f"  Already named '{new_name}'.")
+        return None
+    if verbose:
+        print(f"  Rename: '{entry.name}' -> '{new_name}'" + (" [DRY RUN]" if dry_run else ""))
+    if not dry_run:
+        try: rename_noreplace(entry, new_path)
+        except FileExistsError:
+            print(f"  Rename skipped: '{new_name}' already exists.")
+            return None
+        except Exception as e:
+            print(f"  Rename failed: {e}")
+            return None
+    return new_path
 
-            if not current_guess or current_guess == "UNKNOWN_TITLE":
-                if verbose: print("  No usable title. Skipping rename.")
-                continue
 
-            new_name = f"{current_guess}{entry.suffix}"
-            new_path = entry.with_name(new_name)
-            if verbose:
-                print(f"  Rename: '{entry.name}' -> '{new_name}'" + (" [DRY RUN]" if dry_run else ""))
+def process_media_directory(
+    directory: Path,
+    api_key: Optional[str] = None,
+    ocr_cfg: Optional[OCRConfig] = None,
+    gemini_cfg: Optional[GeminiConfig] = None,
+    dry_run: bool = False,
+    verbose: bool = True,
+    ocr_max_tokens: int = 768,
+    refine_max_tokens: int = 64,
+    use_search: bool = True,
+    pipeline_cfg: Optional[PipelineConfig] = None,
+    client: Optional[Any] = None,
+    cache_cfg: Optional[CacheConfig] = None,
+    use_journal: bool = True,
+    force: bool = False,
+    upload_cfg: Optional[UploadConfig] = None,
+    scan_cfg: Optional[ScanConfig] = None,
+    metrics_cfg: Optional[MetricsConfig] = None,
+    index_cfg: Optional[IndexConfig] = None,
+    series_cfg: Optional[SeriesConfig] = None,
+    metadata_cfg: Optional[MetadataConfig] = None,
+    local_ocr_cfg: Optional[LocalOCRConfig] = None,
+    queue_cfg: Optional[QueueConfig] = None,
+    paths: Optional[Iterable[Path]] = None,
+    on_file: Optional[Callable[[dict], None]] = None,
+) -> None:
+    """
+    Identify and rename every media file in `directory`.
+
+    `client` overrides `make_client(api_key)`, e.g. with a
+    `services.fake_client.FakeClient` for offline runs. With `use_journal`,
+    progress is recorded in the directory so reruns skip finished files and
+    resume interrupted ones; `force` ignores what the journal says.
+    `metrics_cfg` selects the run report / Prometheus / profile outputs.
+    `index_cfg` points at the offline title index, used when it has been built.
+    `series_cfg` controls reuse of show context across sibling episodes.
+    `metadata_cfg` controls the tag/subtitle fast path tried before decoding frames.
+    `local_ocr_cfg` enables a local OCR engine; Gemini then sees only the frames it
+    could not read confidently.
+    `queue_cfg` lets several processes/hosts share the directory: each file is
+    leased before processing, and the journal moves into the queue, one per host.
+    `paths` replaces the directory scan; it is consumed lazily and may block
+    (`rlcl watch` feeds files as they settle); files are then renamed as each
+    finishes rather than in feed order. `on_file` is called with each
+    file's report row right after it is renamed or given up on.
+    """
+    metrics.reset()
+    metrics_cfg = metrics_cfg or MetricsConfig()
+    if metrics_cfg.profile_path:
+        profiler.start()
+    ocr_cfg = ocr_cfg or OCRConfig()
+    gemini_cfg = gemini_cfg or GeminiConfig()
+    pipeline_cfg = pipeline_cfg or PipelineConfig()
+    cache_cfg = cache_cfg or CacheConfig()
+    client = client if client is not None else LazyClient(api_key)
+    requester = GeminiRequester.from_config(client, gemini_cfg)
+    cache = OCRCache(cache_cfg.resolved_path(), cache_cfg.max_bytes) if cache_cfg.enabled else None
+    index_cfg = index_cfg or IndexConfig()
+    index = open_title_index(
+        index_cfg.resolved_path(), min_people=index_cfg.min_people, min_margin=index_cfg.min_margin,
+    ) if index_cfg.enabled else None
+
+    work_queue = WorkQueue(directory, queue_cfg, dry_run=dry_run) if queue_cfg is not None and queue_cfg.enabled else None
+    if not use_journal:
+        journal = None
+    elif work_queue is not None:
+        journal = open_journal(directory, work_queue.journal_path)  # SQLite must not be shared between hosts
+    else:
+        journal = open_journal(directory)
+
+    local_ocr = make_local_ocr(local_ocr_cfg)
+    ocr = OCRService(client, model=gemini_cfg.model_name, requester=requester, cache=cache, local=local_ocr)
+    guess = GuesserService(client, model=gemini_cfg.model_name, requester=requester, index=index)
+    processor = MediaProcessor(
+        ocr, guess,
+        ocr_cfg=ocr_cfg,
+        pipeline_cfg=pipeline_cfg,
+        ocr_max_tokens=ocr_max_tokens,
+        refine_max_tokens=refine_max_tokens,
+        use_search=use_search,
+        journal=journal,
+        force=force,
+        upload_cfg=upload_cfg,
+        series_cfg=series_cfg,
+        metadata_cfg=metadata_cfg,
+    )
+
+    entries = paths if paths is not None else iter_media(directory, scan_cfg)  # lazy: the pipeline starts on the first file found
+    if work_queue is not None:
+        skipped = (lambda p: on_file({"path": str(p), "outcome": "elsewhere", "renamed_to": None})) if on_file else None
+        entries = work_queue.claim(entries, on_skip=skipped)
+    # per-file rows for the JSON run report; a watch runs indefinitely, so it keeps the latest only
+    files: collections.deque[dict] = collections.deque(maxlen=WATCH_REPORT_FILES if paths is not None else None)
+
+    def finish(job: MediaJob, err: Optional[BaseException]) -> None:
+        if verbose:
+            print(f"Processing {job.path.name} ...")
+            for line in job.logs: print(line)
+        new_path = None
+        if err is not None:
+            print(f"  Failed: {err}")
+            processor.record_outcome(job, error=err)
+            outcome = "failed"
+        elif work_queue is not None and not work_queue.held(job.path):
+            print("  Lease lost to another worker; not renaming.")
+            outcome = "lease_lost"
+        elif job.duration or (job.replay and job.replay.stage != STAGE_SKIPPED):
+            new_path = rename_media(job, dry_run=dry_run, verbose=verbose)
             if not dry_run:
-                try: shutil.move(str(entry), str(new_path))
-                except Exception as e: print(f"  Rename failed: {e}")
+                processor.record_outcome(job, new_path=new_path)
+            outcome = "renamed" if new_path else "unchanged"
+        else:
+            outcome = "skipped"
+        if work_queue is not None:
+            work_queue.finish(job.path, outcome, guess=job.guess, renamed_to=new_path)
+        metrics.inc("files_total", outcome=outcome)
+        files.append({
+            "path": str(job.path), "outcome": outcome, "guess": job.guess,
+            "renamed_to": str(new_path) if new_path else None,
+            "frames_ocr": job.ocr_sent, "frames_deduped": job.ocr_saved,
+            "seconds": {k: round(v, 4) for k, v in job.timings.items()},
+            "error": str(err) if err is not None else None,
+        })
+        if on_file is not None:
+            on_file(files[-1])
+
+    deferred: list[MediaJob] = []  # matched to a series, episode left for one grouped request
+    try:
+        for job, err in processor.run(entries, ordered=paths is None):
+            if err is None and processor.needs_episode(job):
+                deferred.append(job)
+            else:
+                finish(job, err)
+        if deferred:
+            processor.resolve_episodes(deferred)
+            for job in deferred:
+                finish(job, None)
+    finally:
+        requester.close()
+        if local_ocr is not None:
+            local_ocr.close()
+        if journal is not None:
+            journal.close()
+        if work_queue is not None:
+            work_queue.close()
+        if cache is not None:
+            cache.prune()
+            cache.close()
+        if index is not None:
+            index.close()
+        profiler.stop()
+        _export_metrics(metrics_cfg, list(files), model=gemini_cfg.model_name, verbose=verbose)
+
+    if verbose:
+        if processor.ocr_saved: print(f"OCR calls saved by frame dedup: {processor.ocr_saved}")
+        if cache is not None: print(f"OCR cache: {cache.hits} hit(s), {cache.misses} miss(es).")
+        if guess.memo_hits: print(f"Refine calls answered from memo: {guess.memo_hits}")
+        if index is not None: print(f"Title index: {index.hits} confident match(es), {index.misses} deferred to refine.")
+        _print_metrics(gemini_cfg.model_name)
+        print("Processing complete.")
+
+
+def _print_metrics(model: str) -> None:
+    stages = [
+        f"{name} {h.quantile(0.5):.2f}/{h.quantile(0.9):.2f}s"
+        for name in ("probe", "extract", "precheck", "identify")
+        if (h := metrics.histogram("stage_seconds", stage=name)).count
+    ]
+    if stages: print("Stage p50/p90: " + ", ".join(stages))
+    requests = metrics.count("gemini_requests_total")
+    if requests:
+        tokens = {t: int(metrics.count("gemini_tokens_total", type=t)) for t in ("prompt", "image", "output")}
+        cost = metrics.estimated_cost(model)
+        print(
+            f"Gemini: {int(requests)} request(s), {int(metrics.count('gemini_retries_total'))} retried; "
+            f"tokens {tokens['prompt']} prompt ({tokens['image']} image), {tokens['output']} output"
+            + (f"; ~${cost:.4f} at list price" if cost is not None else "")
+        )
+    local = int(metrics.count("ocr_tier_total", tier="local"))
+    if local:
+        accepted = int(metrics.count("ocr_tier_total", tier="local", outcome="accepted"))
+        remote = metrics.histogram("ocr_tier_seconds", tier="gemini")
+        print(
+            f"Local OCR: {accepted}/{local} frame(s) read locally ({accepted / local:.0%}), "
+            f"p50 {metrics.histogram('ocr_tier_seconds', tier='local').quantile(0.5) * 1000:.0f} ms; "
+            f"{local - accepted} escalated to Gemini"
+            + (f" (p50 {remote.quantile(0.5):.2f}s per request)" if remote.count else "")
+        )
+    sampled = int(metrics.count("frames_total", outcome="sampled"))
+    if sampled:
+        print(
+            f"Frames: {sampled} sampled, {int(metrics.count('frames_total', outcome='no_text'))} without text, "
+            f"{int(metrics.count('frames_total', outcome='duplicate'))} duplicate, "
+            f"{int(metrics.count('frames_total', outcome='ocr'))} sent to OCR"
+        )
+
 
-    if verbose: print("Processing complete.")
+def _export_metrics(cfg: MetricsConfig, files: list[dict], *, model: str, verbose: bool) -> None:
+    if cfg.json_path:
+        write_json_report(cfg.json_path, files=files, meta={"model": model, "estimated_cost_usd": metrics.estimated_cost(model)})
+        if verbose: print(f"Run report written to {cfg.json_path}")
+    if cfg.prometheus_path:
+        write_prometheus(cfg.prometheus_path)
+        if verbose: print(f"Metrics written to {cfg.prometheus_path}")
+    if cfg.profile_path:
+        top = profiler.dump(cfg.profile_path)
+        if verbose and top: print(f"Profile written to {cfg.profile_path}\n{top}")
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .utils.sqlite_utils import connect
+
+JOURNAL_NAME = ".rollcall-journal.sqlite3"
+
+# Stages a file moves through. Files in FINAL_STAGES are skipped on rerun, except
+# "identified" ones left without a title, which are retried like failures.
+STAGE_OCR = "ocr"                  # OCR/refine in progress; credits saved so far
+STAGE_IDENTIFIED = "identified"    # guess final, not renamed (dry run / no usable title)
+STAGE_RENAMED = "renamed"
+STAGE_SKIPPED = "skipped"          # no duration, nothing to OCR
+STAGE_FAILED = "failed"
+FINAL_STAGES = frozenset({STAGE_IDENTIFIED, STAGE_RENAMED, STAGE_SKIPPED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    fp          TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    stage       TEXT NOT NULL,
+    guess       TEXT,
+    credits     TEXT NOT NULL DEFAULT '{}',
+    frames_done INTEGER NOT NULL DEFAULT 0,
+    no_update   INTEGER NOT NULL DEFAULT 0,
+    renamed_to  TEXT,
+    error       TEXT,
+    updated     REAL NOT NULL
+);
+"""
+
+SAMPLE_BLOCK = 64 * 1024
+SAMPLE_COUNT = 3   # head, middle, tail
+
+
+def fingerprint(path: Path) -> tuple[str, int, int]:
+    """
+    Cheap identity for a media file that survives renames: size, mtime and a
+    hash of a few sampled blocks (head/middle/tail), never the whole file.
+    Returns (fp, size, mtime_ns).
+    """
+    st = path.stat()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        for i in range(SAMPLE_COUNT):
+            f.seek(max(0, (st.st_size - SAMPLE_BLOCK) * i // max(1, SAMPLE_COUNT - 1)))
+            h.update(f.read(SAMPLE_BLOCK))
+    return h.hexdigest(), st.st_size, st.st_mtime_ns
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    fp: str
+    path: str
+    stage: str
+    guess: Optional[str] = None
+    credits: dict[str, set[str]] = field(default_factory=dict)
+    frames_done: int = 0
+    no_update: int = 0
+    renamed_to: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def final(self) -> bool:
+        if self.stage == STAGE_IDENTIFIED and self.guess in (None, "", "UNKNOWN_TITLE"):
+            return False
+        return self.stage in FINAL_STAGES
+
+
+class Journal:
+    """
+    Per-library record of how far each file got, keyed by `fingerprint`, stored
+    next to the media as .rollcall-journal.sqlite3. Lets reruns skip finished
+    files, resume OCR from the saved credits, and replay dry-run plans.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = connect(self.path, _SCHEMA)
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> "Journal":
+        return cls(directory / JOURNAL_NAME)
+
+    def get(self, fp: str) -> Optional[JournalEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fp, path, stage, guess, credits, frames_done, no_update, renamed_to, error"
+                " FROM files WHERE fp = ?",
+                (fp,),
+            ).fetchone()
+        if row is None:
+            return None
+        credits = {k: set(v) for k, v in json.loads(row[4] or "{}").items()}
+        return JournalEntry(row[0], row[1], row[2], row[3], credits, row[5], row[6], row[7], row[8])
+
+    def record(
+        self,
+        fp: str,
+        path: Path,
+        stage: str,
+        *,
+        size: int = 0,
+        mtime_ns: int = 0,
+        guess: Optional[str] = None,
+        credits: Optional[dict[str, set[str]]] = None,
+        frames_done: int = 0,
+        no_update: int = 0,
+        renamed_to: Optional[Path] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        blob = json.dumps({k: sorted(v) for k, v in (credits or {}).items()}, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO files(fp, path, size, mtime_ns, stage, guess, credits, frames_done, no_update,"
+                " renamed_to, error, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(fp) DO UPDATE SET path = excluded.path, stage = excluded.stage,"
+                " guess = excluded.guess, credits = excluded.credits, frames_done = excluded.frames_done,"
+                " no_update = excluded.no_update, renamed_to = excluded.renamed_to, error = excluded.error,"
+                " updated = excluded.updated,"
+                " size = CASE WHEN excluded.size > 0 THEN excluded.size ELSE files.size END,"
+                " mtime_ns = CASE WHEN excluded.mtime_ns > 0 THEN excluded.mtime_ns ELSE files.mtime_ns END",
+                (fp, str(path), size, mtime_ns, stage, guess, blob, frames_done, no_update,
+                 str(renamed_to) if renamed_to else None, error, time.time()),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def journal_status(journal: Journal, paths: Iterable[Path]) -> list[tuple[Path, Optional[JournalEntry]]]:
+    """Pair each media file with its journal entry (None = never processed)."""
+    out = []
+    for p in paths:
+        try:
+            fp, _, _ = fingerprint(p)
+        except OSError:
+            continue
+        out.append((p, journal.get(fp)))
+    return out
+
+
+def open_journal(directory: Path, path: Optional[Path] = None) -> Optional[Journal]:
+    """Journal for `directory` (kept at `path` if given), or None if it can't be written (read-only share)."""
+    if not os.access(directory, os.W_OK):
+        return None
+    try:
+        return Journal(path) if path is not None else Journal.for_directory(directory)
+    except Exception as e:
+        print(f"[journal] Disabled: {e}")
+        return None
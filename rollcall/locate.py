@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .config import OCRConfig
+from .utils.ffmpeg_utils import chapters_from_probe, stream_frames, tail_start_time, video_size
+from .utils.image_utils import text_likelihood
+
+# Chapter titles that mark the end credits ("End Credits", "Closing Titles", "Outro", ...)
+CREDITS_CHAPTER_RE = re.compile(r"\b(credits?|end\s*titles?|closing|outro|ending)\b", re.I)
+
+SCAN_WIDTH = 480   # px; matches text_likelihood's thumbnail so no second resize
+
+
+@dataclass(slots=True)
+class CreditsWindow:
+    start: float
+    end: Optional[float]       # None = to the end of the file
+    source: str                # "chapters" | "scan" | "tail"
+
+    def describe(self) -> str:
+        end = f"{self.end:.0f}s" if self.end is not None else "end"
+        return f"{self.start:.0f}s–{end} ({self.source})"
+
+
+def chapter_window(probe: Optional[dict], duration: float) -> Optional[CreditsWindow]:
+    """The earliest credits-titled chapter in the last half of the file, if any."""
+    for start, end, title in chapters_from_probe(probe):
+        if start >= duration * 0.5 and CREDITS_CHAPTER_RE.search(title):
+            return CreditsWindow(start, None if end >= duration - 1 else end, "chapters")
+    return None
+
+
+def credits_onset(samples: list[tuple[float, float]], *, threshold: float, max_gap: float, min_run: int) -> Optional[tuple[float, float]]:
+    """
+    (first, last) timestamp of the latest run of text frames in `samples`
+    ((time, score) pairs in time order), where consecutive text frames are at
+    most `max_gap` seconds apart and the run has at least `min_run` of them.
+    Non-text frames after the run (post-credit scenes) are ignored.
+    """
+    hits = [t for t, score in samples if score >= threshold]
+    run: list[float] = []
+    best = None
+    for t in hits:
+        if run and t - run[-1] > max_gap:
+            if len(run) >= min_run:
+                best = (run[0], run[-1])
+            run = []
+        run.append(t)
+    if len(run) >= min_run:
+        best = (run[0], run[-1])
+    return best
+
+
+def scan_window(path: Path, probe: Optional[dict], duration: float, cfg: OCRConfig) -> Optional[CreditsWindow]:
+    """
+    Coarse scan of the last `locate_scan_sec`: decode only keyframes, at
+    SCAN_WIDTH px, one sample every `locate_step_sec`, and score each with
+    `text_likelihood`. The credits window spans the latest dense run of text
+    frames, padded by one step on each side.
+    """
+    size = video_size(probe)
+    if not size:
+        return None
+    w, h = size
+    scan_size = (SCAN_WIDTH, max(2, round(h * SCAN_WIDTH / w / 2) * 2))
+    step = max(1.0, cfg.locate_step_sec)
+    begin = max(0.0, duration - min(cfg.locate_scan_sec, duration * 0.5))
+
+    samples = []
+    frames = stream_frames(path, begin, f"1/{step:g}", scan_size, keyframes_only=True)
+    try:
+        for k, frame in enumerate(frames):
+            samples.append((begin + k * step, text_likelihood(frame).score))
+    finally:
+        frames.close()
+
+    found = credits_onset(
+        samples,
+        threshold=max(cfg.text_threshold, 0.1),
+        max_gap=cfg.locate_max_gap_sec,
+        min_run=2,
+    )
+    if found is None:
+        return None
+    start = max(0.0, found[0] - step)
+    end = found[1] + 2 * step
+    return CreditsWindow(start, None if end >= duration else end, "scan")
+
+
+def locate_credits(path: Path, probe: Optional[dict], duration: float, cfg: OCRConfig) -> CreditsWindow:
+    """Where to sample for credits: chapter markers, else a coarse scan, else the fixed tail."""
+    if cfg.locate_credits:
+        window = chapter_window(probe, duration)
+        if window is None:
+            window = scan_window(path, probe, duration, cfg)
+        if window is not None:
+            return window
+    return CreditsWindow(tail_start_time(duration, cfg), None, "tail")
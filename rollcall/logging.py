@@ -0,0 +1,401 @@
+"""
+Run instrumentation shared by core, the services and ffmpeg_utils.
+
+Everything records into the module-level `metrics` registry (counters, gauges
+and latency histograms, keyed by name + labels); `process_media_directory` resets
+it at the start of a run and exports it at the end as a JSON run report and/or
+a Prometheus textfile (node_exporter textfile-collector format). `profiler`
+optionally runs the pipeline's hot paths under cProfile, one profile per
+thread, merged when dumped.
+"""
+from __future__ import annotations
+
+import bisect
+import cProfile
+import io
+import itertools
+import json
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PROM_PREFIX = "rollcall_"
+# seconds; wide enough for a cache hit (ms) up to a full-length decode (minutes)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# USD per million tokens (input, output) at list price; thinking tokens bill as output.
+# Unknown models get no cost estimate.
+PRICES_PER_MTOK = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+
+HELP = {
+    "stage_seconds": "Time per pipeline stage call.",
+    "file_seconds": "Time from a file entering the pipeline to its guess being final.",
+    "ffmpeg_seconds": "ffprobe/ffmpeg wall time (stream: time spent waiting on decoded frames).",
+    "gemini_request_seconds": "Gemini request latency, including rate-limit waits and retries.",
+    "gemini_requests_total": "Gemini requests by kind.",
+    "gemini_tokens_total": "Tokens reported in usage_metadata, by kind and type.",
+    "gemini_retries_total": "Gemini requests retried, by error code.",
+    "ocr_cache_total": "OCR result cache lookups.",
+    "ocr_tier_total": "Frames by OCR tier and outcome (local: accepted, escalated, error; gemini: requested).",
+    "ocr_batch_missing_total": "Frames missing from a batched OCR answer, re-requested on their own.",
+    "ocr_tier_seconds": "OCR latency per tier (local: per frame; gemini: per request).",
+    "refine_memo_hits_total": "Refine requests answered from the in-run memo.",
+    "metadata_total": "Files by what the tag/subtitle fast path did (tags, subtitles, frames).",
+    "series_matches_total": "Files matched to a series identified earlier in the run.",
+    "title_index_seconds": "Offline title index lookup latency.",
+    "title_index_total": "Offline title index lookups by outcome (hit, ambiguous, miss).",
+    "sampling_seeks_total": "Frames decoded by targeted seeks between coarse samples (adaptive sampling).",
+    "frames_total": "Sampled credit frames by outcome.",
+    "files_total": "Media files by outcome.",
+    "queue_leases_total": "Shared-library lease attempts by outcome (claimed, reclaimed, busy, done, lost).",
+    "watch_files": "rlcl watch: files waiting to settle or in the pipeline, by state.",
+    "watch_latency_seconds": "rlcl watch: time from a file first being seen to its rename.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(kw: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kw.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Quantile resolution: observations are also counted in geometric bins 2**(1/8)
+# apart (~9% wide) from HIST_FLOOR up, so quantiles stay within ~5%.
+HIST_BINS_PER_OCTAVE = 8
+HIST_FLOOR = 1e-4
+HIST_BINS = HIST_BINS_PER_OCTAVE * 30  # up to ~1e5
+
+
+def _hist_bin(value: float) -> int:
+    if value <= HIST_FLOOR:
+        return 0
+    return min(HIST_BINS, 1 + int(HIST_BINS_PER_OCTAVE * math.log2(value / HIST_FLOOR)))
+
+
+class Histogram:
+    """
+    Fixed size however many observations it gets (rlcl watch runs for weeks):
+    counts per BUCKETS bucket for export, fine bins for quantiles, and the
+    count, sum, min and max.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "_bins", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._bins = [0] * (HIST_BINS + 1)
+        self._buckets = [0] * len(BUCKETS)  # per bucket, not cumulative; above the last only in `count`
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._bins[_hist_bin(value)] += 1
+        i = bisect.bisect_left(BUCKETS, value)
+        if i < len(BUCKETS):
+            self._buckets[i] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._bins = [a + b for a, b in zip(self._bins, other._bins)]
+        self._buckets = [a + b for a, b in zip(self._buckets, other._buckets)]
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = min(self.count, max(1, math.ceil(q * self.count)))
+        seen = 0
+        for i, n in enumerate(self._bins):
+            seen += n
+            if seen >= rank:
+                mid = HIST_FLOOR * 2 ** ((i - 0.5) / HIST_BINS_PER_OCTAVE) if i else HIST_FLOOR
+                return min(self.max, max(self.min, mid))
+        return self.max
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Cumulative (upper bound, count) pairs, Prometheus-style."""
+        return list(zip(BUCKETS, itertools.accumulate(self._buckets)))
+
+    def summary(self) -> dict[str, float]:
+        n = self.count
+        return {
+            "count": n,
+            "sum": round(self.total, 4),
+            "mean": round(self.total / n, 4) if n else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p90": round(self.quantile(0.9), 4),
+            "p99": round(self.quantile(0.99), 4),
+            "max": round(self.max, 4) if n else 0.0,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.started = time.time()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not value:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Gauge: the current value of something that goes up and down (e.g. a queue depth)."""
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def gauge(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self.gauges.get((name, _labels(labels)), 0.0)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def count(self, name: str, **labels: Any) -> float:
+        """Sum of a counter over every label set that includes `labels`."""
+        want = set(_labels(labels))
+        with self._lock:
+            return sum(v for (n, ls), v in self.counters.items() if n == name and want <= set(ls))
+
+    def histogram(self, name: str, **labels: Any) -> Histogram:
+        """All observations of `name` whose labels include `labels`, merged."""
+        want = set(_labels(labels))
+        merged = Histogram()
+        with self._lock:
+            for (n, ls), h in self.histograms.items():
+                if n == name and want <= set(ls):
+                    merged.merge(h)
+        return merged
+
+    def record_usage(self, kind: str, resp: Any) -> None:
+        """Token counts from a generate_content response's usage_metadata."""
+        usage = getattr(resp, "usage_metadata", None)
+        if usage is None:
+            return
+        self.inc("gemini_tokens_total", int(getattr(usage, "prompt_token_count", 0) or 0), kind=kind, type="prompt")
+        self.inc("gemini_tokens_total", int(getattr(usage, "candidates_token_count", 0) or 0), kind=kind, type="output")
+        self.inc("gemini_tokens_total", int(getattr(usage, "thoughts_token_count", 0) or 0), kind=kind, type="thoughts")
+        for detail in getattr(usage, "prompt_tokens_details", None) or []:
+            if str(getattr(detail, "modality", "")).upper().endswith("IMAGE"):
+                self.inc("gemini_tokens_total", int(getattr(detail, "token_count", 0) or 0), kind=kind, type="image")
+
+    def estimated_cost(self, model: str) -> Optional[float]:
+        """USD at list price for the tokens recorded so far, or None for an unknown model."""
+        price = PRICES_PER_MTOK.get(model)
+        if price is None:
+            return None
+        prompt = self.count("gemini_tokens_total", type="prompt")
+        output = self.count("gemini_tokens_total", type="output") + self.count("gemini_tokens_total", type="thoughts")
+        return round((prompt * price[0] + output * price[1]) / 1e6, 6)
+
+    # ---- export --------------------------------------------------------------
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items(), key=lambda kv: kv[0])
+            return {
+                "counters": [{"name": n, "labels": dict(ls), "value": v} for (n, ls), v in counters],
+                "gauges": [{"name": n, "labels": dict(ls), "value": v} for (n, ls), v in gauges],
+                "histograms": [{"name": n, "labels": dict(ls), **h.summary()} for (n, ls), h in histograms],
+            }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        def fmt(labels: Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        out: list[str] = []
+        seen: set[str] = set()
+
+        def header(name: str, kind: str) -> None:
+            if name not in seen:
+                seen.add(name)
+                out.append(f"# HELP {PROM_PREFIX}{name} {HELP.get(name, name)}")
+                out.append(f"# TYPE {PROM_PREFIX}{name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                header(name, "counter")
+                out.append(f"{PROM_PREFIX}{name}{fmt(labels)} {value:g}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                header(name, "gauge")
+                out.append(f"{PROM_PREFIX}{name}{fmt(labels)} {value:g}")
+            for (name, labels), hist in sorted(self.histograms.items(), key=lambda kv: kv[0]):
+                header(name, "histogram")
+                for le, n in hist.buckets():
+                    out.append(f"{PROM_PREFIX}{name}_bucket{fmt(labels, (('le', f'{le:g}'),))} {n}")
+                out.append(f"{PROM_PREFIX}{name}_bucket{fmt(labels, (('le', '+Inf'),))} {hist.count}")
+                out.append(f"{PROM_PREFIX}{name}_sum{fmt(labels)} {hist.total:.6f}")
+                out.append(f"{PROM_PREFIX}{name}_count{fmt(labels)} {hist.count}")
+        return "\n".join(out) + "\n"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # the textfile collector may read at any moment; never let it see half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_prometheus(path: Path, registry: Optional[Metrics] = None) -> None:
+    _write_atomic(path, (registry or metrics).prometheus())
+
+
+def write_json_report(path: Path, *, files: list[dict], meta: dict[str, Any], registry: Optional[Metrics] = None) -> None:
+    registry = registry or metrics
+    report = {
+        "meta": {"started": registry.started, "finished": time.time(), **meta},
+        "files": files,
+        **registry.snapshot(),
+    }
+    _write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2, default=str))
+
+
+# 3.12+: cProfile runs on sys.monitoring, which is process-wide and takes one
+# profiler at a time; before that, a Profile only sees the thread that enabled it
+SHARED_PROFILE = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    """
+    cProfile for a multi-threaded run: `wrap(fn)` profiles each call, and
+    `dump()` merges the results. Before Python 3.12 each thread gets its own
+    Profile; from 3.12 one Profile covers every thread and is enabled while
+    any wrapped call is running. A no-op until `start()`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._running = 0  # SHARED_PROFILE: wrapped calls in progress
+
+    def start(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+            self._running = 0
+            self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def wrap(self, fn: F) -> F:
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            if not self.enabled or getattr(self._local, "active", False):
+                return fn(*args, **kwargs)
+            if SHARED_PROFILE:
+                return self._shared(fn, *args, **kwargs)
+            prof = getattr(self._local, "profile", None)
+            if prof is None:
+                prof = self._local.profile = cProfile.Profile()
+                with self._lock:
+                    self._profiles.append(prof)
+            self._local.active = True
+            prof.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+                self._local.active = False
+        return profiled  # type: ignore[return-value]
+
+    def _shared(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            if self._running == 0:
+                if not self._profiles:
+                    self._profiles.append(cProfile.Profile())
+                self._profiles[0].enable()
+            self._running += 1
+        self._local.active = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.active = False
+            with self._lock:
+                self._running -= 1
+                if self._running == 0:
+                    self._profiles[0].disable()
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for prof in profiles[1:]:
+            stats.add(prof)
+        return stats
+
+    def dump(self, path: Path) -> Optional[str]:
+        """Write merged stats to `path` (pstats format) and return the top functions by cumulative time."""
+        stats = self.stats()
+        if stats is None:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(path))
+        buf = io.StringIO()
+        stats.stream = buf
+        stats.sort_stats("cumulative").print_stats(20)
+        return buf.getvalue()
+
+
+metrics = Metrics()
+profiler = Profiler()
@@ -1,4 +1,4 @@
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Mapping, Sequence, Tuple
 from .types import OCRResult, CreditsMap
 
 def merge_pair_entries(agg: Dict[str, Set[str]], obj: OCRResult) -> None:
@@ -14,3 +14,9 @@ def merge_pair_entries(agg: Dict[str, Set[str]], obj: OCRResult) -> None:
 
 def map_trim(credits_map: Dict[str, Set[str]], per_key: int = 12) -> Dict[str, List[str]]:
     return {k: sorted(list(v))[:per_key] for k, v in credits_map.items()}
+
+def map_delta(before: Mapping[str, Sequence[str]], after: Mapping[str, Sequence[str]]) -> Tuple[int, int]:
+    """(new keys, new values) in `after` compared with `before` (map_trim or build_payload output)."""
+    new_keys = sum(1 for k in after if k not in before)
+    new_values = sum(len(set(v) - set(before.get(k, ()))) for k, v in after.items())
+    return new_keys, new_values
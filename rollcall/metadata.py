@@ -0,0 +1,245 @@
+"""
+Identification from what the container already says, before any frame is decoded.
+
+Two sources, cheapest first:
+
+- Tags from the probe the pipeline already made. TV tags (`show` +
+  `season_number` + `episode_sort`/`episode_id`) or a `title` that names an
+  episode ("Show - S01E02") are accepted as they are. A film `title` (+
+  `date`/`year`) is accepted only with `MetadataConfig.trust_title`, because
+  muxers often copy release names or junk into it. Otherwise it is passed to
+  refine as a hint.
+- The tail of a text subtitle track. Cues in the last `subtitle_tail_sec`
+  often transcribe the end credits ("Directed by ..."). They are parsed into a
+  credits map and refined like OCR output. With enough identifying names
+  (`MetadataConfig.min_names` under `min_keys` headings), or a confident title
+  index match, this replaces image OCR entirely; otherwise the map seeds the
+  frame pipeline.
+
+Bitmap subtitles (PGS/VobSub) are skipped. Chapter titles are used by
+locate.py to find the credits, not here.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .config import MetadataConfig
+from .payload import KEY_RULES, canonical_key, key_weight
+from .services.guess import _normalize_guess
+from .utils.ffmpeg_utils import subtitle_text, text_subtitle_streams
+
+EPISODE_IN_TEXT_RE = re.compile(r"^(?P<show>.+?)[\s._-]+S(?P<season>\d{1,2})E(?P<episode>\d{1,2})(?!\d)", re.I)
+EPISODE_ID_RE = re.compile(r"S(\d{1,2})E(\d{1,2})(?!\d)", re.I)
+YEAR_RE = re.compile(r"\b((?:19|20)\d{2})\b")
+# release-name tokens: a title tag carrying these was copied from a file name
+RELEASE_JUNK_RE = re.compile(
+    r"\b(\d{3,4}p|[48]k|bluray|blu-ray|bdrip|brrip|web-?dl|webrip|hdtv|dvdrip|remux|x26[45]|h\.?26[45]|"
+    r"hevc|avc|xvid|aac|ac3|dts|truehd|atmos|hdr|proper|repack)\b",
+    re.I,
+)
+# placeholder titles authoring tools write ("Chapter 1", "Track 01", "Main Feature")
+GENERIC_TITLE_RE = re.compile(r"^(chapter|track|title|video|movie|feature|main( feature| title)?|untitled|disc|dvd|bd)\b[\s\d_-]*$", re.I)
+_MARKUP_RE = re.compile(r"<[^>]+>|\{[^}]*\}")
+HEADING_BY_RE = re.compile(r"^(?P<key>[^\W\d][\w .,&'/-]{0,48}?\bby)\s*:?\s+(?P<names>\S.*)$", re.I)
+HEADING_COLON_RE = re.compile(r"^(?P<key>[^\W\d][\w .&'/-]{1,40}):\s+(?P<names>\S.*)$")
+NAME_SPLIT_RE = re.compile(r"\s*(?:,|;|/|&|\band\b)\s*")
+NAME_PARTICLES = {"de", "da", "del", "der", "van", "von", "la", "le", "di", "du", "y", "bin", "al"}
+# words that make a Title Case line dialogue or a song title, not a name ("I Know Who You Are")
+# (surnames that double as words, such as Will, Love and Do, are left out)
+NOT_NAME_WORDS = {
+    "i", "a", "the", "you", "we", "he", "she", "it", "they", "me", "my", "your", "our", "his", "her",
+    "who", "what", "where", "when", "why", "how", "is", "are", "was", "were", "be", "am", "does", "did",
+    "have", "has", "had", "can't", "not", "yes", "know", "this", "that", "to", "of", "in", "on",
+    "for", "with", "at", "from", "it's", "i'm", "don't", "let's", "oh", "hey",
+}
+
+CANONICAL_KEYS = {canon for _, canon, _ in KEY_RULES}
+STRONG_WEIGHT = 7  # Directed/Created/Written/Screenplay/Teleplay/Story/Cast and up (payload.KEY_RULES)
+
+
+@dataclass(slots=True)
+class Metadata:
+    guess: Optional[str] = None          # confident: use without OCR
+    title: Optional[str] = None          # unverified title tag, a hint for refine
+    source: str = ""                     # "tags" | "subtitles" | ""
+    credits: dict[str, set[str]] = field(default_factory=dict)  # from subtitle cues
+
+
+def probe_tags(probe: Optional[dict]) -> dict[str, str]:
+    """Container tags (lowercased keys), falling back to the first video stream's."""
+    tags: dict[str, str] = {}
+    streams = [s for s in (probe or {}).get("streams") or [] if s.get("codec_type") == "video"]
+    for source in ((probe or {}).get("format") or {}, streams[0] if streams else {}):
+        for k, v in (source.get("tags") or {}).items():
+            if isinstance(v, str) and v.strip():
+                tags.setdefault(k.lower(), v.strip())
+    return tags
+
+
+def _clean(text: str) -> str:
+    if " " not in text:
+        text = re.sub(r"[._]+", " ", text)  # "The.Show.Name" -> "The Show Name"
+    return " ".join(text.split()).strip(" -–:")
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    m = re.match(r"\s*(\d+)", value or "")
+    return int(m.group(1)) if m else None
+
+
+def guess_from_tags(tags: dict[str, str], *, trust_title: bool = False) -> tuple[Optional[str], Optional[str]]:
+    """(confident guess, title hint) from container tags; either may be None."""
+    show = tags.get("show") or tags.get("tvshow") or tags.get("series")
+    season, episode = _int(tags.get("season_number")), _int(tags.get("episode_sort") or tags.get("episode_number"))
+    m = EPISODE_ID_RE.search(tags.get("episode_id", ""))
+    if m and (season is None or episode is None):
+        season, episode = int(m.group(1)), int(m.group(2))
+    if show and season is not None and episode and episode < 100 and season < 100:
+        guess = _normalize_guess(f"{_clean(show)}_S{season:02d}E{episode:02d}")
+        if guess != "UNKNOWN_TITLE":
+            return guess, None
+
+    title = tags.get("title")
+    if not title or GENERIC_TITLE_RE.match(title.strip()):
+        return None, None
+    m = EPISODE_IN_TEXT_RE.match(title)
+    if m:
+        guess = _normalize_guess(f"{_clean(m.group('show'))}_S{int(m.group('season')):02d}E{int(m.group('episode')):02d}")
+        if guess != "UNKNOWN_TITLE":
+            return guess, None
+
+    junk = RELEASE_JUNK_RE.search(title)
+    name = title[:junk.start()] if junk else title
+    year_in_name = YEAR_RE.search(name)
+    year = year_in_name.group(1) if year_in_name else None
+    if year_in_name:
+        name = name[:year_in_name.start()]  # "Heat 1995 ..." / "Heat (1995)"
+    year = year or next((y.group(1) for t in ("year", "date") if (y := YEAR_RE.match(tags.get(t, "")))), None)
+    name = _clean(name.rstrip(" ([-"))
+    hint = _normalize_guess(f"{name} ({year})" if year else name)
+    if hint == "UNKNOWN_TITLE":
+        return None, None
+    if trust_title and year and not junk:
+        return hint, hint
+    return None, hint
+
+
+def srt_cues(text: str) -> list[list[str]]:
+    """Text lines of each SRT cue, markup stripped."""
+    cues = []
+    for block in re.split(r"\n\s*\n", text.replace("\r", "")):
+        lines = [_MARKUP_RE.sub("", ln).strip() for ln in block.split("\n")]
+        lines = [ln for ln in lines if ln and "-->" not in ln and not ln.isdigit()]
+        if lines:
+            cues.append(lines)
+    return cues
+
+
+def is_heading(text: str) -> bool:
+    """A credits heading: a known key ("Music", "Cast") or a short "... by" line."""
+    words = text.rstrip(":").split()
+    if not words or len(words) > 6:
+        return False
+    return canonical_key(text) in CANONICAL_KEYS or (len(words) <= 5 and words[-1].lower() == "by")
+
+
+def _names(text: str) -> list[str]:
+    """Names in a credits line, or [] if it reads like dialogue."""
+    if len(text) > 90 or text.endswith(("?", "!", "...", "…")):
+        return []
+    out = []
+    for part in NAME_SPLIT_RE.split(text):
+        words = part.strip(" .").split()
+        if not 1 <= len(words) <= 5 or any(w.lower().strip(",\"") in NOT_NAME_WORDS for w in words):
+            continue
+        if all(w[:1].isupper() or w.lower() in NAME_PARTICLES for w in words):
+            out.append(" ".join(words))
+    return out
+
+
+def parse_credit_lines(lines: list[str], *, fallback_key: Optional[str] = None) -> tuple[list[tuple[str, list[str]]], int]:
+    """
+    Credit rows in consecutive text lines: "Directed by Jane Doe" and "Music: X"
+    on one line, or a heading line followed by name lines. Name lines with no
+    heading go under `fallback_key` (dropped when None). Returns the rows in
+    order and the number of lines that read as neither heading nor names.
+    """
+    rows: list[tuple[str, list[str]]] = []
+    unparsed = 0
+    key = None
+    for line in lines:
+        m = HEADING_BY_RE.match(line) or HEADING_COLON_RE.match(line)
+        if m and is_heading(m.group("key")):
+            names = _names(m.group("names"))
+            if names:
+                rows.append((m.group("key").rstrip(": ").strip(), names))
+            else:
+                unparsed += 1
+            key = None
+        elif is_heading(line):
+            key = line.rstrip(": ").strip()
+        else:
+            names = _names(line)
+            if names and (key or fallback_key):
+                rows.append((key or fallback_key, names))
+            else:
+                unparsed += 1
+                key = None  # dialogue: the credits block ended
+    return rows, unparsed
+
+
+def credits_from_cues(cues: list[list[str]]) -> dict[str, set[str]]:
+    """Credit rows found within each subtitle cue (see `parse_credit_lines`), merged by heading."""
+    out: dict[str, set[str]] = {}
+    for cue in cues:
+        for key, names in parse_credit_lines(cue)[0]:
+            out.setdefault(key, set()).update(names)
+    return out
+
+
+def credit_signal(credits: dict[str, set[str]]) -> int:
+    """Names under headings that identify a title (director, writers, creators, cast)."""
+    return sum(len(values) for values in _strong(credits).values())
+
+
+def _strong(credits: dict[str, set[str]]) -> dict[str, set[str]]:
+    out: dict[str, set[str]] = {}
+    for key, values in credits.items():
+        canon = canonical_key(key)
+        if key_weight(canon, sorted(values)) >= STRONG_WEIGHT:
+            out.setdefault(canon, set()).update(values)
+    return out
+
+
+def enough_credits(credits: dict[str, set[str]], cfg: MetadataConfig) -> bool:
+    """Whether `credits` name the title well enough to refine from them alone (see MetadataConfig)."""
+    return credit_signal(credits) >= cfg.min_names and len(_strong(credits)) >= cfg.min_keys
+
+
+def read_metadata(path: Path, probe: Optional[dict], duration: float, cfg: Optional[MetadataConfig] = None) -> Metadata:
+    """Tags first; subtitle cues from the tail only when the tags were not enough."""
+    cfg = cfg or MetadataConfig()
+    guess, title = guess_from_tags(probe_tags(probe), trust_title=cfg.trust_title)
+    md = Metadata(guess=guess, title=title, source="tags" if guess else "")
+    if guess or not cfg.subtitles:
+        return md
+
+    streams = text_subtitle_streams(probe)
+    # full (not forced) tracks first, then English/undetermined ones
+    streams.sort(key=lambda s: (
+        bool((s.get("disposition") or {}).get("forced")),
+        (s.get("tags") or {}).get("language", "und") not in ("eng", "en", "und"),
+    ))
+    start = max(0.0, duration - cfg.subtitle_tail_sec)
+    for stream in streams[:max(0, cfg.max_subtitle_streams)]:
+        text = subtitle_text(path, int(stream["index"]), start)
+        for key, names in credits_from_cues(srt_cues(text or "")).items():
+            md.credits.setdefault(key, set()).update(names)
+        if enough_credits(md.credits, cfg):
+            break
+    if md.credits:
+        md.source = "subtitles"
+    return md
@@ -0,0 +1,211 @@
+"""
+Builds the credits payload sent to refine/search from the raw OCR'd credits map.
+
+A long film accumulates hundreds of crew roles, and OCR reads the same heading
+or name several ways ("DIRECTED BY" / "Director", "Jane Doe" / "Jane D0e").
+`build_payload` canonicalizes keys, merges near-duplicate names, ranks keys by
+how much they identify a title, and packs the highest-ranked values into a
+token budget, so refine sees the director, writers and cast first and the
+catering crew only if there is room.
+"""
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Mapping
+
+from .config import CHARS_PER_TOKEN
+
+# (pattern on the normalized key, canonical key, weight); first match wins
+KEY_RULES: list[tuple[re.Pattern, str, float]] = [
+    (re.compile(r"^(title|episode( title)?|series)$"), "Title", 10),
+    (re.compile(r"^((a )?film by|directed( by)?|director|directors)$"), "Directed by", 10),
+    (re.compile(r"^(created( by)?|creators?|series created by|developed( for television)? by)$"), "Created by", 9),
+    (re.compile(r"^(written( by)?|writers?|story and screenplay by)$"), "Written by", 9),
+    (re.compile(r"^(screenplay( by)?|screenwriters?)$"), "Screenplay by", 8),
+    (re.compile(r"^(teleplay( by)?)$"), "Teleplay by", 8),
+    (re.compile(r"^(story( by)?)$"), "Story by", 7),
+    (re.compile(r"^(based on|based upon|from the (novel|book|play))\b.*$"), "Based on", 7),
+    (re.compile(r"^(cast|starring|with|featuring|also starring|guest starring|special guest star)$"), "Cast", 8),
+    (re.compile(r"^(copyright|©.*|\(c\).*)$"), "Copyright", 6),
+    (re.compile(r"^(produced( by)?|producers?)$"), "Produced by", 5),
+    (re.compile(r"^(executive producers?|executive produced by)$"), "Executive Producers", 4),
+    (re.compile(r"^((original )?music( by)?|(original )?score( by)?|composer|music composed by)$"), "Music by", 4),
+    (re.compile(r"^(director of photography|cinematography( by)?|cinematographer)$"), "Director of Photography", 4),
+    (re.compile(r"^((film )?edited( by)?|(film )?editors?)$"), "Edited by", 3),
+    (re.compile(r"^(casting( by)?|casting directors?)$"), "Casting by", 3),
+    (re.compile(r"^(production designer|production design( by)?)$"), "Production Designer", 2),
+    (re.compile(r"^(costume designer|costume design( by)?|costumes( by)?)$"), "Costume Designer", 2),
+]
+
+# roles that say almost nothing about which title this is
+LOW_SIGNAL_RE = re.compile(
+    r"\b(grips?|gaffers?|best boys?|electricians?|catering|craft services?|drivers?|transportation|"
+    r"accountants?|accounting|payroll|assistants?|runners?|security|medics?|nurses?|caterers?|"
+    r"stand-?ins?|utility|loaders?|trainees?|interns?|clearances?|post production|facilities|"
+    r"rigging|dolly|swing|set dressers?|greens|props?|hair|make-?up|wardrobe|special thanks|"
+    r"thanks|filmed (on location )?(at|in)|no animals|dolby|kodak|camera and lenses)\b",
+    re.I,
+)
+
+# words that make a heading a job title rather than a character name
+CREW_WORD_RE = re.compile(
+    r"\b(by|mixer|designer|supervisor|coordinator|manager|editor|operator|artist|technician|producer|"
+    r"director|consultant|engineer|recordist|composer|animator|department|unit|crew|team|services|"
+    r"visual effects|vfx|sound|camera|lighting|stunts?|music|songs?|score|casting|colou?rist|foley|"
+    r"adr|dialogue|publicist|researcher|choreographer|advisor|adviser|dialect|coach|timer|grader)\b",
+    re.I,
+)
+
+DEFAULT_WEIGHT = 2.0    # an unrecognised role heading
+CHARACTER_WEIGHT = 6.0  # "Character Name" -> actor rows, i.e. the cast list
+LOW_WEIGHT = 0.5
+FIRST_PASS = 3          # values per key before any key gets more
+
+# common OCR confusions, applied only when comparing names
+_OCR_FOLD = str.maketrans({"0": "o", "1": "l", "5": "s", "|": "l", "!": "l", "$": "s"})
+# letter pairs OCR misreads as each other; a fuzzy match may swap one of them, nothing else
+_OCR_SWAPS = frozenset(frozenset(p) for p in ("ce", "co", "eo", "il", "ij", "lt", "ft", "nh", "nu", "mn", "uv", "vy", "gq", "bh"))
+# keys whose values are sent verbatim: a title or copyright line differing in one
+# character ("Episode 11" / "Episode 12") is a different title, not a misread
+VERBATIM_KEYS = frozenset({"Title", "Copyright"})
+
+
+def _norm_key(key: str) -> str:
+    k = " ".join(key.replace("’", "'").split()).casefold()
+    return k.rstrip(":.-–— ").strip()
+
+
+def canonical_key(key: str) -> str:
+    """The canonical heading for `key` ("DIRECTED BY:" -> "Directed by"), else `key` tidied up."""
+    norm = _norm_key(key)
+    for pattern, canon, _ in KEY_RULES:
+        if pattern.match(norm):
+            return canon
+    tidy = " ".join(key.split()).rstrip(":").strip()
+    # OCR often returns headings in caps; cast rows ("DETECTIVE ROSS") read better in title case
+    return tidy.title() if tidy.isupper() else tidy
+
+
+def _looks_like_character(key: str, values: List[str]) -> bool:
+    # two-column cast rows become {"Character": ["Actor"]}
+    return (
+        len(values) == 1 and len(key.split()) <= 4 and key[:1].isupper()
+        and not LOW_SIGNAL_RE.search(key) and not CREW_WORD_RE.search(key)
+    )
+
+
+def key_weight(key: str, values: List[str]) -> float:
+    """How much `key` (canonical) narrows down the title; higher is sent first."""
+    norm = _norm_key(key)
+    for pattern, canon, weight in KEY_RULES:
+        if canon == key or pattern.match(norm):
+            return weight
+    if LOW_SIGNAL_RE.search(key):
+        return LOW_WEIGHT
+    if _looks_like_character(key, values):
+        return CHARACTER_WEIGHT
+    return DEFAULT_WEIGHT
+
+
+def _name_form(value: str) -> str:
+    text = unicodedata.normalize("NFKD", value.casefold().translate(_OCR_FOLD))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.replace("rn", "m")
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _one_ocr_swap(a: str, b: str) -> bool:
+    # equal but for one letter misread as a similar one ("Jane Dce" for "Jane Doe")
+    if len(a) != len(b):
+        return False
+    diff = [(x, y) for x, y in zip(a, b) if x != y]
+    return len(diff) == 1 and frozenset(diff[0]) in _OCR_SWAPS
+
+
+def _digits(value: str) -> str:
+    return "".join(c for c in value if c.isdigit())
+
+
+def _preference(value: str) -> tuple:
+    # prefer mixed case over ALL CAPS, then fewer digits (OCR reads "o" as "0"), then the
+    # longer (truncated reads are shorter, and "rn" read as "m" is shorter), then stable order
+    return (not any(c.islower() for c in value), sum(c.isdigit() for c in value), -len(value), value)
+
+
+def merge_names(values: Iterable[str], *, min_fuzzy_len: int = 10) -> List[str]:
+    """
+    Collapse OCR variants of the same name: equal after case/accent/punctuation
+    folding and common digit-for-letter confusions, or (for names of at least
+    `min_fuzzy_len` characters with the same digits) one confusable letter
+    apart ("Jane Dce"). Short names must match exactly after folding, so "John
+    Doe" and "Joan Doe" stay apart, and dropped letters never merge, so "Sara
+    Jones" and "Sarah Jones" do too. Returns the preferred spelling of each
+    group, sorted.
+    """
+    groups: list[tuple[str, str, list[str]]] = []  # (folded form, digits, variants)
+    for value in sorted({" ".join(str(v).split()) for v in values if str(v).strip()}, key=_preference):
+        form, digits = _name_form(value), _digits(value)
+        for rep, rep_digits, variants in groups:
+            if form == rep or (
+                digits == rep_digits and min(len(form), len(rep)) >= min_fuzzy_len and _one_ocr_swap(form, rep)
+            ):
+                variants.append(value)
+                break
+        else:
+            groups.append((form, digits, [value]))
+    return sorted(min(variants, key=_preference) for _, _, variants in groups)
+
+
+def canonical_map(credits_map: Mapping[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    Keys canonicalized (variants merged) and each key's names de-duplicated.
+    VERBATIM_KEYS values are only de-duplicated, never merged.
+    """
+    merged: Dict[str, set[str]] = {}
+    for key, values in credits_map.items():
+        merged.setdefault(canonical_key(key), set()).update(str(v) for v in values)
+    return {
+        k: sorted({" ".join(x.split()) for x in v if x.strip()}) if k in VERBATIM_KEYS else merge_names(v)
+        for k, v in merged.items() if k
+    }
+
+
+def _tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def payload_tokens(payload: Mapping[str, List[str]]) -> int:
+    """Estimated tokens for `payload` as refine sends it."""
+    return _tokens(json.dumps({"credits": payload}, ensure_ascii=False))
+
+
+def build_payload(credits_map: Mapping[str, Iterable[str]], *, budget: int = 400, per_key: int = 12) -> Dict[str, List[str]]:
+    """
+    The refine/search payload for `credits_map`: canonical keys in rank order
+    (highest identifying power first), each with up to `per_key` names, packed
+    to roughly `budget` tokens. Packing is breadth-first: every key gets its
+    first FIRST_PASS names (in rank order) before any key gets more. `budget`
+    <= 0 disables packing.
+    """
+    canon = canonical_map(credits_map)
+    ranked = sorted(canon, key=lambda k: (-key_weight(k, canon[k]), k))
+    if budget <= 0:
+        return {k: canon[k][:per_key] for k in ranked}
+
+    picked: Dict[str, List[str]] = {}
+    used = _tokens('{"credits": {}}')
+    for limit in (FIRST_PASS, per_key):
+        for key in ranked:
+            have = picked.get(key, [])
+            for value in canon[key][len(have):limit]:
+                # ', "value"' plus, for a new key, '"key": []'
+                cost = _tokens(f', "{value}"') + (0 if have else _tokens(f'"{key}": [], '))
+                if used + cost > budget:
+                    break
+                have = have + [value]
+                used += cost
+            if have:
+                picked[key] = have
+    return {k: picked[k] for k in ranked if k in picked}  # keep rank order after the second pass
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, Iterator, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+_STOP = object()   # end-of-stream marker passed between stages
+_DONE = object()   # item short-circuited by a stage (returned False)
+_POLL = 0.1        # seconds between abort checks while blocked on a queue
+
+
+@dataclass(slots=True)
+class Stage(Generic[T]):
+    """
+    One step of the pipeline.
+
+    - name: label for logs/metrics.
+    - fn: called with each item; return False to skip the remaining stages.
+    - workers: threads servicing this stage.
+    """
+    name: str
+    fn: Callable[[T], Optional[bool]]
+    workers: int = 1
+
+
+class _Countdown:
+    def __init__(self, n: int):
+        self._n = n
+        self._lock = threading.Lock()
+
+    def tick(self) -> bool:
+        """Returns True for the caller that brings the count to zero."""
+        with self._lock:
+            self._n -= 1
+            return self._n == 0
+
+
+def _put(q: queue.Queue, msg, abort: threading.Event) -> bool:
+    while not abort.is_set():
+        try:
+            q.put(msg, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, abort: threading.Event):
+    while not abort.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _STOP
+
+
+def run_pipeline(
+    items: Iterable[T],
+    stages: Sequence[Stage[T]],
+    *,
+    queue_size: int = 4,
+    ordered: bool = True,
+) -> Iterator[tuple[T, Optional[BaseException]]]:
+    """
+    Push `items` through `stages`. Each stage runs on its own thread pool and is
+    joined to the next by a bounded queue, so a slow stage applies back-pressure
+    instead of letting work pile up in memory.
+
+    Yields (item, error) in *input order* regardless of which worker finished
+    first; with `ordered=False`, in completion order instead, so a slow item
+    holds back nothing behind it (for endless feeds). `error` is the exception raised by a stage, if any; such items skip the
+    remaining stages, as do items for which a stage returned False.
+
+    `items` is consumed lazily from a feeder thread, so it may be a generator.
+    Closing the returned iterator early abandons in-flight work.
+    """
+    abort = threading.Event()
+    qs: list[queue.Queue] = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    out: queue.Queue = queue.Queue()
+    downstream = qs[1:] + [out]
+    fanout = [max(1, s.workers) for s in stages[1:]] + [1]
+
+    def feed() -> None:
+        try:
+            for idx, item in enumerate(items):
+                if not _put(qs[0], (idx, item, None), abort):
+                    return
+        except BaseException as e:  # surface iterator failures to the consumer
+            _put(out, e, abort)
+        for _ in range(max(1, stages[0].workers)):
+            _put(qs[0], _STOP, abort)
+
+    def work(i: int, stage: Stage[T], left: _Countdown) -> None:
+        while True:
+            msg = _get(qs[i], abort)
+            if msg is _STOP:
+                if left.tick():
+                    for _ in range(fanout[i]):
+                        _put(downstream[i], _STOP, abort)
+                return
+            idx, item, state = msg
+            if state is None:
+                try:
+                    if stage.fn(item) is False:
+                        state = _DONE
+                except Exception as e:
+                    state = e
+            if not _put(downstream[i], (idx, item, state), abort):
+                return
+
+    threads = [threading.Thread(target=feed, name="rollcall-feed", daemon=True)]
+    for i, stage in enumerate(stages):
+        n = max(1, stage.workers)
+        left = _Countdown(n)
+        threads += [
+            threading.Thread(target=work, args=(i, stage, left), name=f"rollcall-{stage.name}-{w}", daemon=True)
+            for w in range(n)
+        ]
+    for t in threads:
+        t.start()
+
+    pending: dict[int, tuple[T, Optional[BaseException]]] = {}
+    next_idx = 0
+    try:
+        while True:
+            msg = out.get()
+            if msg is _STOP:
+                break
+            if isinstance(msg, BaseException):
+                raise msg
+            idx, item, state = msg
+            pending[idx] = (item, state if isinstance(state, BaseException) else None)
+            if not ordered:
+                yield pending.pop(idx)
+                continue
+            while next_idx in pending:
+                yield pending.pop(next_idx)
+                next_idx += 1
+    finally:
+        abort.set()
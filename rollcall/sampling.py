@@ -0,0 +1,143 @@
+"""
+Adaptive coarse-to-fine sampling of the credits window (`OCRConfig.sampling`).
+
+Uniform sampling (`fps_expr`) must be dense enough for the fastest crawl, so
+long static cards are decoded and prechecked many times over, while a crawl
+faster than the rate still slips between samples. Here the window is first
+sampled every `coarse_step_sec`. Two consecutive samples are *linked* when
+nothing can have been missed between them:
+
+- neither shows text (a gap between credit blocks, a post-credit scene);
+- they show the same card (dHash within SAME_CARD_BITS);
+- the later one is the earlier one scrolled up, with rows still overlapping
+  and text in the overlap (two centred cards can otherwise "align" on their
+  blank margins).
+
+Otherwise a new card appeared or the crawl outran the coarse step, and the
+interval is bisected with targeted seeks until every pair is linked or the
+samples are `fine_step_sec` apart. Frames are yielded in time order, so the
+credits merge, dedup/scroll-crop, the early stop and the journal's frame
+count work exactly as with uniform sampling.
+
+`max_frames` caps the samples decoded per video: the coarse step is widened
+to fit the window into it, and seeks only spend what the coarse pass leaves.
+A card that is shorter than the coarse step and sits between two blank
+frames can be missed.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .config import OCRConfig
+from .logging import metrics
+from .utils.ffmpeg_utils import FramePool, grab_frame, stream_frames
+from .utils.image_utils import dhash, gray_array, hamming, text_likelihood, vertical_shift
+
+# Stricter than dedup's distance: linking two different cards loses whatever
+# was between them, splitting one card only costs a seek.
+SAME_CARD_BITS = 6
+THUMB = (64, 180)          # scroll-shift thumbnail, as FrameDeduper uses
+# a scroll must explain the change far better than dedup's crop needs: similar
+# cards one row-height apart match at ~0.35 of the unshifted error, crawls at < 0.2
+SCROLL_RATIO = 0.25
+
+
+@dataclass(slots=True)
+class _Sample:
+    t: float
+    text: bool
+    hash: int
+    thumb: np.ndarray
+
+
+class AdaptiveSampler:
+    """
+    Iterable of decoded frames for one video's credits window, coarse samples
+    from one ffmpeg stream (buffers from `pool`) with seeks in between where
+    needed. `times` holds the timestamp of every frame yielded so far.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        start: float,
+        end: Optional[float],
+        duration: float,
+        size: tuple[int, int],
+        cfg: OCRConfig,
+        *,
+        pool: FramePool,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.size = size
+        self.cfg = cfg
+        self.pool = pool
+        span = max(0.0, (end if end is not None else duration) - start)
+        budget = max(2, cfg.max_frames)
+        self.step = max(cfg.coarse_step_sec, span / (budget - 1), 0.1)
+        self.seek_budget = max(0, budget - (int(span // self.step) + 1))
+        self.text_threshold = max(cfg.text_threshold, 0.1)
+        self.times: list[float] = []
+        self.coarse = 0
+        self.seeks = 0
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        frames = stream_frames(
+            self.path, self.start, f"1/{self.step:g}", self.size, end_time=self.end, exact=True, pool=self.pool,
+        )
+        prev: Optional[_Sample] = None
+        try:
+            for k, frame in enumerate(frames):
+                cur = self._sample(self.start + k * self.step, frame)
+                self.coarse += 1
+                if prev is not None:
+                    yield from self._between(prev, cur)
+                self.times.append(cur.t)
+                yield frame
+                prev = cur
+        finally:
+            frames.close()
+
+    def _between(self, a: _Sample, b: _Sample) -> Iterator[np.ndarray]:
+        """Frames strictly between `a` and `b`, in order, found by bisection."""
+        if b.t - a.t < 2 * self.cfg.fine_step_sec or self.seek_budget <= 0 or self.pool.closed or self._linked(a, b):
+            return
+        t = (a.t + b.t) / 2
+        self.seek_budget -= 1
+        frame = grab_frame(self.path, t, self.size)
+        if frame is None:
+            return
+        self.seeks += 1
+        metrics.inc("sampling_seeks_total")
+        mid = self._sample(t, frame)
+        yield from self._between(a, mid)
+        self.times.append(t)
+        yield frame
+        yield from self._between(mid, b)
+
+    def _sample(self, t: float, frame: np.ndarray) -> _Sample:
+        return _Sample(
+            t,
+            text_likelihood(frame).score >= self.text_threshold,
+            dhash(frame),
+            gray_array(frame, THUMB),
+        )
+
+    def _linked(self, a: _Sample, b: _Sample) -> bool:
+        if not (a.text or b.text):
+            return True
+        if hamming(a.hash, b.hash) <= SAME_CARD_BITS:
+            return True
+        shift = vertical_shift(a.thumb, b.thumb, max_ratio=SCROLL_RATIO)
+        return bool(shift) and _ink(b.thumb[: b.thumb.shape[0] - shift]) >= 0.5 * _ink(b.thumb) > 0
+
+
+def _ink(gray: np.ndarray) -> float:
+    """Share of pixels far from the background level (text strokes)."""
+    return float((np.abs(gray.astype(np.int16) - int(np.median(gray))) > 40).mean())
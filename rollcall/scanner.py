@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+from .config import ScanConfig, is_media_file
+
+# Names RollCall itself produces (see services/guess.py): "Title_S01E02", "Title (1999)".
+# A bare "Title" is indistinguishable from an unprocessed file, so it is not skipped.
+NAMED_EPISODE_RE = re.compile(r"^.+_S\d{2}E\d{2}$")
+NAMED_MOVIE_RE = re.compile(r"^.+ \((19|20)\d{2}\)$")
+
+
+def already_named(path: Path) -> bool:
+    stem = path.stem
+    return bool(NAMED_EPISODE_RE.match(stem) or NAMED_MOVIE_RE.match(stem))
+
+
+def _matches(rel: str, name: str, patterns: tuple[str, ...]) -> bool:
+    # patterns match either the path relative to the root ("Show/Season 01/*") or the bare name
+    return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def iter_media(root: Path, cfg: ScanConfig | None = None) -> Iterator[Path]:
+    """
+    Lazily walk `root` with os.scandir and yield media files in a stable order
+    (per directory: files by name, then subdirectories by name).
+
+    Only one directory listing is held at a time, so the first file reaches the
+    pipeline without waiting for the whole tree. Dot-entries are skipped, as are
+    unreadable directories. Exclude globs prune whole subtrees; include globs
+    apply to files only.
+    """
+    cfg = cfg or ScanConfig()
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"[scan] Skipping {current}: {e.strerror or e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            rel = Path(entry.path).relative_to(root).as_posix()
+            if cfg.exclude and _matches(rel, entry.name, cfg.exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=cfg.follow_symlinks):
+                    if cfg.recursive:
+                        subdirs.append(Path(entry.path))
+                    continue
+                if not entry.is_file(follow_symlinks=True):
+                    continue
+            except OSError:
+                continue
+
+            path = Path(entry.path)
+            if not is_media_file(path.suffix, exts=cfg.exts):
+                continue
+            if cfg.include and not _matches(rel, entry.name, cfg.include):
+                continue
+            if cfg.skip_named and already_named(path):
+                continue
+            if cfg.min_size > 0:
+                try:
+                    if entry.stat(follow_symlinks=True).st_size < cfg.min_size:
+                        continue
+                except OSError:
+                    continue
+            yield path
+
+        stack.extend(reversed(subdirs))  # depth-first, in name order
@@ -1,25 +1,88 @@
-from google.genai import types
-
-PAIR_SCHEMA = types.Schema(
-    type=types.Type.OBJECT,
-    properties={
-        "entries": types.Schema(
-            type=types.Type.ARRAY,
-            items=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "key":    types.Schema(type=types.Type.STRING),
-                    "values": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
-                },
-                required=["key", "values"],
-            ),
-        )
-    },
-    required=["entries"],
-)
-
-REFINE_SCHEMA = types.Schema(
-    type=types.Type.OBJECT,
-    properties={"title": types.Schema(type=types.Type.STRING)},
-    required=["title"],
-)
\ No newline at end of file
+"""
+Response schemas for the Gemini requests.
+
+Building `types.Schema` objects needs `google.genai`, which is by far the most
+expensive import in the package, so nothing is built at import time: the
+first access to e.g. `schemas.PAIR_SCHEMA` imports the SDK, builds all
+schemas once and caches them as module attributes.
+"""
+from __future__ import annotations
+
+__all__ = ["PAIR_SCHEMA", "REFINE_SCHEMA", "PAIR_BATCH_SCHEMA", "EPISODES_SCHEMA"]
+
+
+def _build() -> dict:
+    from google.genai import types
+
+    PAIR_SCHEMA = types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "entries": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "key":    types.Schema(type=types.Type.STRING),
+                        "values": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
+                    },
+                    required=["key", "values"],
+                ),
+            )
+        },
+        required=["entries"],
+    )
+
+    REFINE_SCHEMA = types.Schema(
+        type=types.Type.OBJECT,
+        properties={"title": types.Schema(type=types.Type.STRING)},
+        required=["title"],
+    )
+
+    # Batched OCR: one request carries several labeled frames; each frame's pairs come
+    # back under its 1-based label so they can be merged in frame order.
+    PAIR_BATCH_SCHEMA = types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "frames": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "frame":   types.Schema(type=types.Type.INTEGER),
+                        "entries": PAIR_SCHEMA.properties["entries"],
+                    },
+                    required=["frame", "entries"],
+                ),
+            )
+        },
+        required=["frames"],
+    )
+
+    # Grouped episode resolution: several files of one series in one request, each
+    # answered under the label it was sent with.
+    EPISODES_SCHEMA = types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "episodes": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "file":  types.Schema(type=types.Type.STRING),
+                        "title": types.Schema(type=types.Type.STRING),
+                    },
+                    required=["file", "title"],
+                ),
+            )
+        },
+        required=["episodes"],
+    )
+
+    return {name: value for name, value in locals().items() if name in __all__}
+
+
+def __getattr__(name: str):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals().update(_build())
+    return globals()[name]
@@ -0,0 +1,99 @@
+"""
+Series context shared by the files of one run.
+
+A season pack is many episodes of one show. Without this, every file
+rediscovers the show from an empty credits map. `SeriesTracker` remembers each
+series identified so far, together with the names credited across its
+episodes. Later files are matched to a series as soon as their credits share
+enough of its recurring names (showrunner, regular cast, composer). Refine is
+then told which show it is, so only the episode is left to work out.
+"""
+from __future__ import annotations
+
+import collections
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .payload import _name_form, canonical_map
+from .types import CreditsMap
+
+EPISODE_RE = re.compile(r"^(.+)_S(\d{2})E(\d{2})$")
+
+
+def split_episode(guess: Optional[str]) -> Optional[tuple[str, int, int]]:
+    """("Show", 1, 2) for "Show_S01E02", else None."""
+    m = EPISODE_RE.match(guess or "")
+    return (m.group(1), int(m.group(2)), int(m.group(3))) if m else None
+
+
+def credit_names(credits_map: CreditsMap) -> set[str]:
+    """Folded full names credited in `credits_map` (bare first names and initials are left out)."""
+    return {
+        form for values in canonical_map(credits_map).values() for v in values
+        if len(form := _name_form(v)) >= 5 and " " in form
+    }
+
+
+@dataclass(slots=True)
+class _Series:
+    name: str
+    episodes: set[tuple[int, int]] = field(default_factory=set)
+    names: collections.Counter = field(default_factory=collections.Counter)  # name -> episodes credited
+
+    def recurring(self) -> set[str]:
+        # with one episode known every name counts; after that, only names seen twice
+        least = 2 if len(self.episodes) >= 2 else 1
+        return {n for n, c in self.names.items() if c >= least}
+
+
+class SeriesTracker:
+    """Thread-safe: identify workers observe and match concurrently."""
+
+    def __init__(self, *, min_shared: int = 3):
+        self.min_shared = min_shared
+        self._series: dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, guess: Optional[str], credits_map: CreditsMap) -> Optional[str]:
+        """Record a final guess; returns its series name if it is an episode."""
+        ep = split_episode(guess)
+        if ep is None:
+            return None
+        name, season, episode = ep
+        names = credit_names(credits_map)
+        with self._lock:
+            series = self._series.setdefault(name, _Series(name))
+            if (season, episode) not in series.episodes:
+                series.episodes.add((season, episode))
+                series.names.update(names)
+        return name
+
+    def match(self, credits_map: CreditsMap) -> Optional[str]:
+        """The known series sharing the most recurring names with `credits_map`, if at least `min_shared`."""
+        with self._lock:
+            if not self._series:
+                return None
+            recurring = {s.name: s.recurring() for s in self._series.values()}
+        names = credit_names(credits_map)
+        best, shared = None, 0
+        for name, rec in recurring.items():
+            n = len(names & rec)
+            if n > shared:
+                best, shared = name, n
+        return best if shared >= max(1, self.min_shared) else None
+
+    def taken(self, series: str) -> list[str]:
+        """Episodes of `series` already identified this run, as "SxxEyy"."""
+        with self._lock:
+            s = self._series.get(series)
+            return [f"S{a:02d}E{b:02d}" for a, b in sorted(s.episodes)] if s else []
+
+    def distinctive(self, series: str, payload: dict[str, list[str]]) -> dict[str, list[str]]:
+        """`payload` minus the series' recurring names: what tells one episode from another."""
+        with self._lock:
+            s = self._series.get(series)
+            rec = s.recurring() if s else set()
+        out = {k: [v for v in vs if _name_form(v) not in rec] for k, vs in payload.items()}
+        return {k: vs for k, vs in out.items() if vs}
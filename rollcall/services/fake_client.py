@@ -0,0 +1,176 @@
+# services/fake_client.py
+"""
+Offline stand-in for `genai.Client`, shaped like what `make_client` returns:
+`client.models.generate_content(...)` and `client.aio.models.generate_content(...)`.
+
+Useful for exercising the request layer (rate limits, retries) without quota.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+Responder = Callable[[str, list, Any], str]
+
+
+@dataclass(slots=True)
+class FakeModalityTokens:
+    modality: str
+    token_count: int
+
+
+@dataclass(slots=True)
+class FakeUsage:
+    prompt_token_count: int = 0
+    candidates_token_count: int = 0
+    total_token_count: int = 0
+    prompt_tokens_details: tuple = ()
+
+
+@dataclass(slots=True)
+class FakeResponse:
+    text: str
+    usage_metadata: FakeUsage
+    candidates: tuple = ()
+
+
+class FakeAPIError(Exception):
+    """Mimics google.genai.errors.APIError's `code` / `details` attributes."""
+
+    def __init__(self, code: int, message: str = "", retry_delay: Optional[float] = None):
+        super().__init__(f"{code} {message}".strip())
+        self.code = code
+        self.details = (
+            {"error": {"details": [{"retryDelay": f"{retry_delay}s"}]}} if retry_delay is not None else None
+        )
+
+
+def _has_image(contents: list) -> bool:
+    return any(getattr(c, "inline_data", None) is not None for c in contents)
+
+
+def is_batch_request(config: Any) -> bool:
+    """True for extract_pairs_batch calls (PAIR_BATCH_SCHEMA has a `frames` array)."""
+    schema = getattr(config, "response_schema", None)
+    return "frames" in (getattr(schema, "properties", None) or {})
+
+
+def batch_size(contents: list) -> int:
+    """Frame count stated in a batch prompt ("... shows N end-credit frames ...")."""
+    for c in contents:
+        m = isinstance(c, str) and re.search(r"(\d+) end-credit frames", c)
+        if m:
+            return int(m.group(1))
+    return 1
+
+
+def default_responder(model: str, contents: list, config: Any) -> str:
+    """No credits found anywhere: empty OCR, UNKNOWN_TITLE for refine/search."""
+    if getattr(config, "tools", None):
+        return "UNKNOWN_TITLE"
+    if is_batch_request(config):
+        n = sum(1 for c in contents if isinstance(c, str) and c.startswith("Image ")) or batch_size(contents)
+        return json.dumps({"frames": [{"frame": i + 1, "entries": []} for i in range(n)]})
+    if _has_image(contents):
+        return json.dumps({"entries": []})
+    return json.dumps({"title": "UNKNOWN_TITLE"})
+
+
+class _Models:
+    def __init__(self, owner: "FakeClient"):
+        self._owner = owner
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None) -> FakeResponse:
+        delay = self._owner._before(model, contents, config)
+        if delay:
+            time.sleep(delay)
+        return self._owner._respond(model, contents, config)
+
+
+class _AsyncModels:
+    def __init__(self, owner: "FakeClient"):
+        self._owner = owner
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None) -> FakeResponse:
+        delay = self._owner._before(model, contents, config)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._owner._respond(model, contents, config)
+
+
+class _Aio:
+    def __init__(self, owner: "FakeClient"):
+        self.models = _AsyncModels(owner)
+
+
+class FakeClient:
+    """
+    - responder(model, contents, config) -> response text.
+    - latency: seconds each call takes.
+    - jitter: extra latency drawn uniformly from [0, jitter) with a seeded RNG.
+    - rpm: server-side quota; calls beyond it within a sliding minute fail with
+      FakeAPIError(429) carrying a retry hint, like the real API (0 = unlimited).
+    - failures: exceptions raised by the first calls, in order (e.g. FakeAPIError(429)).
+    Every call is recorded in `calls` as (model, contents, config); `rejected`
+    counts quota rejections.
+    """
+
+    def __init__(
+        self,
+        responder: Responder = default_responder,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rpm: int = 0,
+        seed: int = 0,
+        failures: Iterable[BaseException] = (),
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.jitter = jitter
+        self.rpm = rpm
+        self.failures = list(failures)
+        self.calls: list[tuple[str, list, Any]] = []
+        self.rejected = 0
+        self._rng = random.Random(seed)
+        self._window: collections.deque[float] = collections.deque()  # accepted call times, last 60 s
+        self._lock = threading.Lock()
+        self.models = _Models(self)
+        self.aio = _Aio(self)
+
+    def _before(self, model: str, contents: Any, config: Any) -> float:
+        contents = list(contents) if isinstance(contents, (list, tuple)) else [contents]
+        with self._lock:
+            self.calls.append((model, contents, config))
+            if self.failures:
+                raise self.failures.pop(0)
+            if self.rpm:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60.0:
+                    self._window.popleft()
+                if len(self._window) >= self.rpm:
+                    self.rejected += 1
+                    raise FakeAPIError(429, "RESOURCE_EXHAUSTED", retry_delay=round(60.0 - (now - self._window[0]), 3))
+                self._window.append(now)
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _respond(self, model: str, contents: Any, config: Any) -> FakeResponse:
+        contents = list(contents) if isinstance(contents, (list, tuple)) else [contents]
+        text = self.responder(model, contents, config)
+        image = sum(258 for c in contents if not isinstance(c, str))
+        prompt = image + sum(len(c) // 4 + 1 for c in contents if isinstance(c, str))
+        out = len(text) // 4 + 1
+        details = (FakeModalityTokens("IMAGE", image),) if image else ()
+        return FakeResponse(text=text, usage_metadata=FakeUsage(prompt, out, prompt + out, details))
+
+
+def make_fake_client(api_key: Optional[str] = None, **kwargs: Any) -> FakeClient:
+    """Signature-compatible with `genai_client.make_client`; `api_key` is ignored."""
+    return FakeClient(**kwargs)
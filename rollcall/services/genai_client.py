@@ -1,10 +1,45 @@
+from __future__ import annotations
+
 import os
-from google import genai
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from google import genai
+
 
 def make_client(api_key: Optional[str] = None) -> genai.Client:
+    # Imported here: google.genai takes ~0.5 s to import, which --help,
+    # status commands and journal replays should not pay.
+    from google import genai
+
     # If the user passed --api-key, honor it. Otherwise the SDK uses GEMINI_API_KEY.
     if api_key:
-        import os
         os.environ.setdefault("GEMINI_API_KEY", api_key)
-    return genai.Client()
\ No newline at end of file
+    return genai.Client()
+
+
+class LazyClient:
+    """
+    Stands in for `make_client(api_key)` until the first request touches it.
+    A run whose files are all answered by the journal, the OCR cache or the
+    title index never imports the SDK; a missing API key then surfaces on the
+    first request instead of at startup.
+    """
+
+    def __init__(self, api_key: Optional[str] = None):
+        self._api_key = api_key
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        with self._lock:
+            if self._client is None:
+                self._client = make_client(self._api_key)
+        return getattr(self._client, name)
@@ -1,13 +1,23 @@
 # services/guess.py
+from __future__ import annotations
+
+import hashlib
 import json
 import re
-from google import genai
-from google.genai import types as gtypes  # ← alias SDK types to avoid collisions
-from ..schemas import REFINE_SCHEMA
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from .. import schemas  # built on first use; importing google.genai is slow
+from ..logging import metrics
 from ..types import CreditsMap
+from .requester import GeminiRequester
+
+if TYPE_CHECKING:
+    from google import genai
+    from ..title_index import TitleIndex
 
 STRICT_EP_RE    = re.compile(r"^.+_S(\d{2})E(\d{2})$")
-STRICT_MOVIE_RE = re.compile(r"^(.+?)(?: \((19|20)\d{2}\))?$")
+STRICT_MOVIE_RE = re.compile(r"^(.+?)(?: \(((?:19|20)\d{2})\))?$")
 
 
 def _normalize_guess(text: str) -> str:
@@ -40,6 +50,7 @@ def _safe_text(resp) -> str:
 
 def _make_search_tool():
     """Return a grounded search tool across SDK variants."""
+    from google.genai import types as gtypes  # ← alias SDK types to avoid collisions; imported late (slow)
     if hasattr(gtypes, "GoogleSearch"):
         return gtypes.Tool(google_search=gtypes.GoogleSearch())
     if hasattr(gtypes, "GoogleSearchRetrieval"):
@@ -47,14 +58,78 @@ def _make_search_tool():
     return None
 
 
+def _memo_key(credits_map: CreditsMap, previous: str | None, max_tokens: int, series: str | None = None) -> str:
+    """Canonical hash of a refine request: key order and value order don't matter."""
+    canon = json.dumps(
+        [{k: sorted(str(x) for x in v) for k, v in credits_map.items()}, previous or "", max_tokens, series or ""],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+def _as_lists(credits_map: CreditsMap) -> dict[str, list[str]]:
+    # build_payload output is already ranked and packed: keep its order; sort raw sets for determinism
+    return {k: [str(x) for x in v] if isinstance(v, list) else sorted(str(x) for x in v) for k, v in credits_map.items()}
+
+
 class GuesserService:
-    def __init__(self, client: genai.Client, model: str = "gemini-2.5-flash"):
+    MEMO_SIZE = 1024  # refine results kept per run (LRU)
+
+    def __init__(
+        self,
+        client: genai.Client,
+        model: str = "gemini-2.5-flash",
+        *,
+        requester: GeminiRequester | None = None,
+        index: "TitleIndex | None" = None,
+    ):
         self.client = client
         self.model = model
+        # shared rate-limited/retrying request layer (one per run)
+        self.requester = requester or GeminiRequester(client)
+        # offline title index; refine is only asked when it is ambiguous
+        self.index = index
+        self.memo_hits = 0
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._memo_lock = threading.Lock()
 
-    def refine_title(self, credits_map: CreditsMap, *, max_tokens: int = 64, previous: str | None = None) -> str:
-        # Trim/sort for determinism and token control
-        payload = {"credits": {k: sorted([str(x) for x in v])[:12] for k, v in credits_map.items()}}
+    def refine_title(
+        self, credits_map: CreditsMap, *, max_tokens: int = 64, previous: str | None = None, series: str | None = None,
+    ) -> str:
+        """
+        `credits_map` is sent as given (see payload.build_payload for ranking and
+        packing). Memoized by the canonical credits payload + `previous`, so
+        repeats cost nothing. With an `index`, a confident local match is
+        returned without a request; an ambiguous one passes its top candidates
+        to refine as hints. `series` is a show sibling files were identified as
+        (see rollcall/series.py); refine then only has to place the episode.
+        """
+        hints: list[str] = []
+        if self.index is not None:
+            found = self.index.lookup(credits_map)
+            if found.guess is not None:
+                return found.guess
+            hints = [c.guess for c in found.candidates]
+        key = _memo_key(credits_map, previous, max_tokens, series)
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                metrics.inc("refine_memo_hits_total")
+                return self._memo[key]
+        title = self._refine_title(credits_map, max_tokens=max_tokens, previous=previous, hints=hints, series=series)
+        with self._memo_lock:
+            self._memo[key] = title
+            if len(self._memo) > self.MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return title
+
+    def _refine_title(
+        self, credits_map: CreditsMap, *, max_tokens: int, previous: str | None, hints: list[str], series: str | None,
+    ) -> str:
+        from google.genai import types as gtypes
+
+        payload = {"credits": _as_lists(credits_map)}
         instr = (
             "Identify the media title from these end-credit key→values.\n"
             "Return JSON with field 'title' only. Formats allowed:\n"
@@ -64,15 +139,23 @@ class GuesserService:
         )
         if previous:
             instr += f"\nPrevious guess: {previous}"
+        if series:
+            instr += (
+                f"\nSibling files with the same recurring credits are episodes of '{series}'; "
+                f"if these credits fit, answer {series}_SxxEyy with this episode's numbers."
+            )
+        if hints:
+            instr += "\nLocal catalog candidates (best first, may all be wrong): " + "; ".join(hints)
 
-        resp = self.client.models.generate_content(
+        resp = self.requester.generate_content(
+            kind="refine",
             model=self.model,
             contents=[instr, json.dumps(payload, ensure_ascii=False)],
             config=gtypes.GenerateContentConfig(
                 temperature=0.0,
                 max_output_tokens=max_tokens,
                 response_mime_type="application/json",  # schemas OK here (no tools)
-                response_schema=REFINE_SCHEMA,
+                response_schema=schemas.REFINE_SCHEMA,
             ),
         )
         try:
@@ -89,7 +172,7 @@ class GuesserService:
         if not tool:
             return "UNKNOWN_TITLE"
 
-        payload = {"credits": {k: sorted([str(x) for x in v])[:12] for k, v in credits_map.items()}}
+        payload = {"credits": _as_lists(credits_map)}
         instr = (
             "Using ONLY grounded web results, identify the media (TV episode or feature film) "
             "that matches these end-credit key→values. Prefer imdb.com, thetvdb.com, tvmaze.com, "
@@ -100,15 +183,63 @@ class GuesserService:
             "If uncertain, return exactly: UNKNOWN_TITLE"
         )
 
+        from google.genai import types as gtypes
+
         cfg = gtypes.GenerateContentConfig(
             temperature=0.0,
             max_output_tokens=max_tokens,
             tools=[tool],  # ← tools enabled; no response_schema / response_mime_type here
         )
 
-        resp = self.client.models.generate_content(
+        resp = self.requester.generate_content(
+            kind="search",
             model=self.model,
             contents=[instr, json.dumps(payload, ensure_ascii=False)],
             config=cfg,
         )
         return _normalize_guess(_safe_text(resp))
+
+    def resolve_episodes(
+        self, series: str, credits: dict[str, CreditsMap], *, taken: list[str] | None = None, max_tokens: int = 64,
+    ) -> dict[str, str]:
+        """
+        One request placing several files of `series` at once. `credits` maps a
+        label (the file name) to what tells that episode apart. Returns label ->
+        "Series_SxxEyy" for the files it could place; anything else is dropped.
+        """
+        if not credits:
+            return {}
+        from google.genai import types as gtypes
+
+        payload = {"series": series, "files": {label: _as_lists(m) for label, m in credits.items()}}
+        instr = (
+            f"Each file below is an episode of the TV series '{series}'; its end-credit key→values "
+            "omit the regular cast and crew. For every file, identify the season and episode.\n"
+            "Return JSON {'episodes': [{'file': <file>, 'title': <title>}]} where title is "
+            f"{series}_SxxEyy, or 'UNKNOWN_TITLE' if unsure. Different files are different episodes."
+        )
+        if taken:
+            instr += "\nAlready identified in this library: " + ", ".join(taken)
+
+        resp = self.requester.generate_content(
+            kind="episodes",
+            model=self.model,
+            contents=[instr, json.dumps(payload, ensure_ascii=False)],
+            config=gtypes.GenerateContentConfig(
+                temperature=0.0,
+                max_output_tokens=max_tokens * len(credits),
+                response_mime_type="application/json",
+                response_schema=schemas.EPISODES_SCHEMA,
+            ),
+        )
+        try:
+            rows = json.loads(resp.text or "{}").get("episodes", [])
+        except Exception:
+            return {}
+        out: dict[str, str] = {}
+        for row in rows:
+            label, title = row.get("file"), _normalize_guess(row.get("title", ""))
+            m = STRICT_EP_RE.match(title)
+            if label in credits and m and title.startswith(f"{series}_S"):
+                out[label] = title
+        return out
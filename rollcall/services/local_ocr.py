@@ -0,0 +1,211 @@
+"""
+Local OCR tier tried before Gemini (see OCRService).
+
+Plain credit cards (light text on a flat background, one heading and a few
+names) are read by a local engine in tens of milliseconds. The engine returns
+text lines with word boxes and confidences; `read_credits` turns them into
+the same key→values entries the Gemini prompt asks for:
+
+- a line split by a wide gap into two cells is a two-column row
+  (character ↔ actor, or "Directed by    Jane Doe");
+- other lines are parsed like subtitle cues (metadata.parse_credit_lines):
+  "Music by X", "Music: X", or a heading followed by name lines, with
+  unlabelled name blocks under `fallback_key`.
+
+A read is used only when every line is confident and understood; otherwise
+the frame is escalated to Gemini. Engines run as one subprocess per frame,
+at most `LocalOCRConfig.workers` at a time, so they spread across cores
+without holding the GIL.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from ..config import LOCAL_OCR_ENGINES, LocalOCRConfig
+from ..logging import metrics
+from ..metadata import is_heading, parse_credit_lines
+from ..types import OCRResult
+
+COLUMN_GAP = 2.5          # a gap this many word heights wide splits a line into cells
+MIN_HEIGHT = 600          # smaller (already downscaled) uploads are upscaled 2x for the engine
+NAME_CHARS_RE = re.compile(r"^[^\W\d_][^\d_|~<>{}\[\]@#$%^*=+\\/]*$")  # no digits or OCR noise symbols
+
+
+@dataclass(slots=True)
+class Word:
+    text: str
+    left: int
+    width: int
+    height: int
+    conf: float  # 0..100
+
+
+@dataclass(slots=True)
+class LocalRead:
+    entries: list[dict]
+    confidence: float  # lowest line confidence, 0..100
+    lines: int
+    unparsed: int      # lines that read as neither a heading nor names
+
+
+class LocalEngine:
+    """A local OCR engine: text lines (words left to right) from an encoded image."""
+
+    name = "local"
+
+    def available(self) -> bool:
+        return True
+
+    def lines(self, raw: bytes) -> list[list[Word]]:
+        raise NotImplementedError
+
+
+class TesseractEngine(LocalEngine):
+    """Tesseract 4+ through its CLI (`tesseract stdin stdout tsv`)."""
+
+    name = "tesseract"
+    PSM = 6  # one uniform block: keeps the two columns of a cast row on one line
+
+    def __init__(self, command: str = "tesseract", lang: str = "eng", timeout: float = 30.0):
+        self.command = command
+        self.lang = lang
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        return shutil.which(self.command) is not None
+
+    def lines(self, raw: bytes) -> list[list[Word]]:
+        proc = subprocess.run(
+            [self.command, "stdin", "stdout", "--psm", str(self.PSM), "-l", self.lang, "tsv"],
+            input=_engine_image(raw),
+            capture_output=True,
+            timeout=self.timeout,
+            env={**os.environ, "OMP_THREAD_LIMIT": "1"},  # one core per process; the pool spreads them
+            check=True,
+        )
+        return parse_tsv(proc.stdout.decode("utf-8", errors="replace"))
+
+
+def _engine_image(raw: bytes) -> bytes:
+    """Dark text on light, at a size Tesseract reads well (uploads are often downscaled)."""
+    from PIL import Image, ImageOps, ImageStat
+
+    with Image.open(io.BytesIO(raw)) as im:
+        gray = im.convert("L")
+    if ImageStat.Stat(gray).mean[0] < 128:
+        gray = ImageOps.invert(gray)  # credits are nearly always light on dark
+    if gray.height < MIN_HEIGHT:
+        gray = gray.resize((gray.width * 2, gray.height * 2), Image.BICUBIC)
+    buf = io.BytesIO()
+    gray.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def parse_tsv(tsv: str) -> list[list[Word]]:
+    """Words of Tesseract TSV output grouped into lines, in reading order."""
+    lines: dict[tuple[str, str, str, str], list[Word]] = {}
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t")
+        if len(cols) < 12 or cols[0] != "5" or not cols[11].strip():
+            continue
+        try:
+            word = Word(cols[11].strip(), int(cols[6]), int(cols[8]), int(cols[9]), float(cols[10]))
+        except ValueError:
+            continue
+        lines.setdefault((cols[1], cols[2], cols[3], cols[4]), []).append(word)
+    return [sorted(words, key=lambda w: w.left) for words in lines.values()]
+
+
+def _cells(words: list[Word]) -> list[str]:
+    height = statistics.median(w.height for w in words)
+    cells, current = [], [words[0]]
+    for prev, word in zip(words, words[1:]):
+        if word.left - (prev.left + prev.width) > COLUMN_GAP * height:
+            cells.append(current)
+            current = []
+        current.append(word)
+    cells.append(current)
+    return [" ".join(w.text for w in cell) for cell in cells]
+
+
+def read_credits(lines: list[list[Word]], *, fallback_key: str = "text") -> LocalRead:
+    """Credit entries from engine lines, with the evidence used to decide on escalation."""
+    entries: list[dict] = []
+    unparsed = 0
+    run: list[str] = []  # consecutive single-cell lines, parsed together
+
+    def flush() -> None:
+        nonlocal unparsed
+        rows, bad = parse_credit_lines(run, fallback_key=fallback_key)
+        entries.extend({"key": k, "values": v} for k, v in rows)
+        unparsed += bad
+        run.clear()
+
+    for words in lines:
+        cells = _cells(words)
+        if len(cells) == 2 and not (run and is_heading(run[-1])) and NAME_CHARS_RE.match(cells[1]):
+            flush()
+            entries.append({"key": cells[0], "values": [cells[1]]})  # left column is the key
+        else:
+            run.append(", ".join(cells))  # under a heading, cells side by side are names
+    flush()
+    if any(not NAME_CHARS_RE.match(v) for e in entries for v in e["values"]):
+        unparsed += 1  # digits or symbols in a name: a misread
+    confidence = min((sum(w.conf for w in ws) / len(ws) for ws in lines), default=0.0)
+    return LocalRead(entries, confidence, len(lines), unparsed)
+
+
+class LocalOCR:
+    """
+    The local tier: runs `engine` on a bounded pool and decides per frame
+    whether its read can stand in for a Gemini request.
+    """
+
+    def __init__(self, engine: LocalEngine, cfg: Optional[LocalOCRConfig] = None):
+        self.engine = engine
+        self.cfg = cfg or LocalOCRConfig()
+        workers = self.cfg.workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ocr-{engine.name}")
+
+    def read_many(self, raws: Sequence[bytes], *, fallback_key: str = "text") -> list[Optional[OCRResult]]:
+        """One result per frame, None where the frame should go to Gemini."""
+        return list(self._pool.map(lambda raw: self._read(raw, fallback_key), raws))
+
+    def _read(self, raw: bytes, fallback_key: str) -> Optional[OCRResult]:
+        t0 = time.perf_counter()
+        try:
+            read = read_credits(self.engine.lines(raw), fallback_key=fallback_key)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            metrics.inc("ocr_tier_total", tier="local", outcome="error")
+            print(f"[{self.engine.name}] {type(e).__name__}: {e}")
+            return None
+        finally:
+            metrics.observe("ocr_tier_seconds", time.perf_counter() - t0, tier="local")
+        ok = read.entries and read.confidence >= self.cfg.min_confidence and read.unparsed <= self.cfg.max_unparsed
+        metrics.inc("ocr_tier_total", tier="local", outcome="accepted" if ok else "escalated")
+        return {"entries": read.entries} if ok else None
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_local_ocr(cfg: Optional[LocalOCRConfig]) -> Optional[LocalOCR]:
+    """The configured local tier, or None (with a note) when it is off or the engine is missing."""
+    if cfg is None or not cfg.engine:
+        return None
+    if cfg.engine != "tesseract":
+        raise ValueError(f"Unknown local OCR engine {cfg.engine!r}; expected one of {LOCAL_OCR_ENGINES}.")
+    engine = TesseractEngine(cfg.command, cfg.lang)
+    if not engine.available():
+        print(f"[ocr] Local engine '{cfg.engine}' not found; every frame goes to Gemini.")
+        return None
+    return LocalOCR(engine, cfg)
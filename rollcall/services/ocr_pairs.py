@@ -1,64 +1,291 @@
+from __future__ import annotations
+
 from pathlib import Path
-import json, re
-from typing import Optional
-from google import genai
-from google.genai import types
-from ..schemas import PAIR_SCHEMA
+import io, json, re
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+from .. import schemas  # built on first use; the SDK and PIL are imported only when a request is made
 from ..types import OCRResult
+from ..cache import OCRCache, content_digest, ocr_cache_key
+from ..logging import metrics
+from .requester import GeminiRequester
+
+if TYPE_CHECKING:
+    from google import genai
+    from .local_ocr import LocalOCR
+
+# Bump whenever the prompt, PAIR_SCHEMA or _normalize_pairs changes, so cached
+# OCR results from older versions are not reused.
+OCR_PROMPT_VERSION = "pairs-v1"
+
+_RULES = """Rules
+- Use the exact on-screen label/heading as the key when present.
+- If multiple names appear under one label (commas/bullets/newlines/columns), put EACH as a separate string in `values`.
+- If a row shows two columns (e.g., character ↔ actor), create entries where LEFT is the key and RIGHT is the single value.
+- If a name block has NO visible label, use the key "{fallback_key}".
+- Preserve capitalization, punctuation (Jr., ASC, CSA), diacritics.
+- Omit unreadable text; do not invent.
+- Return ONLY JSON matching the provided schema.
+"""
+
+BATCH_MODES = ("parts", "sheet")
+SHEET_TILE_WIDTH = 960   # px per contact-sheet tile
+SHEET_COLUMNS = 2
+SHEET_LABEL_HEIGHT = 48
+
+
+def _load(image: Union[Path, bytes], mime_type: str) -> tuple[bytes, str]:
+    # `image` is a frame file or already-encoded bytes (e.g. a cropped strip)
+    if isinstance(image, Path):
+        return image.read_bytes(), ("image/png" if image.suffix.lower() == ".png" else "image/jpeg")
+    return image, mime_type
+
+
+def contact_sheet(images: Sequence[bytes]) -> bytes:
+    """Tile frames into one PNG, each under a large "1", "2", ... label band."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    tiles = []
+    for raw in images:
+        with Image.open(io.BytesIO(raw)) as im:
+            im = im.convert("RGB")
+            h = max(1, round(im.height * SHEET_TILE_WIDTH / im.width))
+            tiles.append(im.resize((SHEET_TILE_WIDTH, h), Image.BILINEAR))
+    cols = min(SHEET_COLUMNS, len(tiles))
+    rows = [tiles[i:i + cols] for i in range(0, len(tiles), cols)]
+    row_heights = [SHEET_LABEL_HEIGHT + max(t.height for t in r) for r in rows]
+    sheet = Image.new("RGB", (cols * SHEET_TILE_WIDTH, sum(row_heights)), "gray")
+    draw = ImageDraw.Draw(sheet)
+    try:
+        font = ImageFont.load_default(size=SHEET_LABEL_HEIGHT - 12)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    y, n = 0, 0
+    for r, rh in zip(rows, row_heights):
+        for c, tile in enumerate(r):
+            n += 1
+            x = c * SHEET_TILE_WIDTH
+            draw.rectangle([x, y, x + SHEET_TILE_WIDTH - 1, y + SHEET_LABEL_HEIGHT - 1], fill="yellow", outline="gray")
+            draw.text((x + 12, y + 6), str(n), fill="black", font=font)
+            sheet.paste(tile, (x, y + SHEET_LABEL_HEIGHT))
+        y += rh
+    buf = io.BytesIO()
+    sheet.save(buf, format="PNG")
+    return buf.getvalue()
 
 class OCRService:
-    def __init__(self, client: genai.Client, model: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        client: genai.Client,
+        model: str = "gemini-2.5-flash",
+        *,
+        requester: Optional[GeminiRequester] = None,
+        cache: Optional[OCRCache] = None,
+        local: Optional[LocalOCR] = None,
+    ):
         self.client = client
         self.model = model
+        # shared rate-limited/retrying request layer (one per run)
+        self.requester = requester or GeminiRequester(client)
+        self.cache = cache
+        # local OCR tier: frames it reads confidently never reach Gemini
+        self.local = local
 
     def extract_pairs(
         self,
-        image_path: Path,
+        image: Union[Path, bytes],
         *,
         max_tokens: int = 768,
         fallback_key: str = "text",
         dump_json_to: Optional[Path] = None,
+        mime_type: str = "image/png",
     ) -> OCRResult:
-        mime = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
-        with open(image_path, "rb") as f:
-            part = types.Part.from_bytes(data = f.read(), mime_type=mime)
+        raw, mime_type = _load(image, mime_type)
 
-        prompt = f"""Extract ALL visible end-credit key→value pairs from this image.
+        cache_key = self._cache_key(raw, max_tokens, fallback_key)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            metrics.inc("ocr_cache_total", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
 
-Rules
-- Use the exact on-screen label/heading as the key when present.
-- If multiple names appear under one label (commas/bullets/newlines/columns), put EACH as a separate string in `values`.
-- If a row shows two columns (e.g., character ↔ actor), create entries where LEFT is the key and RIGHT is the single value.
-- If a name block has NO visible label, use the key "{fallback_key}".
-- Preserve capitalization, punctuation (Jr., ASC, CSA), diacritics.
-- Omit unreadable text; do not invent.
-- Return ONLY JSON matching the provided schema.
-"""
+        data = self._read_local([raw], fallback_key)[0]
+        if data is None:
+            data = self._fetch_one(raw, mime_type, cache_key, max_tokens=max_tokens, fallback_key=fallback_key)
 
-        resp = self.client.models.generate_content(
-            model=self.model,
-            contents=[part, prompt],
-            config=types.GenerateContentConfig(
-                temperature=0.0,
-                max_output_tokens=max_tokens,
-                response_mime_type="application/json",
-                response_schema=PAIR_SCHEMA,
-            ),
+        if dump_json_to:
+            dump_json_to.mkdir(parents=True, exist_ok=True)
+            stem = image.stem if isinstance(image, Path) else "frame"
+            out = dump_json_to / f"{stem}.pairs.json"
+            out.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        return data
+
+    def _fetch_one(
+        self, raw: bytes, mime_type: str, cache_key: Optional[str], *, max_tokens: int, fallback_key: str
+    ) -> OCRResult:
+        """One frame from Gemini, cached only when the answer parsed (a bad response must not stick)."""
+        data = self._request_one(raw, mime_type, max_tokens=max_tokens, fallback_key=fallback_key)
+        if data is None:
+            return {"entries": []}
+        if cache_key is not None:
+            self.cache.put(cache_key, data)
+        return data
+
+    def _request_one(self, raw: bytes, mime_type: str, *, max_tokens: int, fallback_key: str) -> Optional[OCRResult]:
+        """The frame's pairs, or None when the response was truncated or not valid JSON."""
+        from google.genai import types
+
+        part = types.Part.from_bytes(data=raw, mime_type=mime_type)
+
+        prompt = "Extract ALL visible end-credit key→value pairs from this image.\n\n" + _RULES.format(
+            fallback_key=fallback_key
         )
 
+        metrics.inc("ocr_tier_total", tier="gemini", outcome="requested")
+        with metrics.timer("ocr_tier_seconds", tier="gemini"):
+            resp = self.requester.generate_content(
+                kind="ocr",
+                model=self.model,
+                contents=[part, prompt],
+                config=types.GenerateContentConfig(
+                    temperature=0.0,
+                    max_output_tokens=max_tokens,
+                    response_mime_type="application/json",
+                    response_schema=schemas.PAIR_SCHEMA,
+                ),
+            )
+
         try:
-            data: OCRResult = json.loads(resp.text or "{}")
+            data: OCRResult = json.loads(resp.text or "")
         except Exception:
-            data = {"entries": []}
+            return None
+        if not isinstance(data, dict):
+            return None
+        return self._normalize_pairs(data)
+
+    def extract_pairs_batch(
+        self,
+        images: Sequence[Union[Path, bytes]],
+        *,
+        max_tokens: int = 768,
+        fallback_key: str = "text",
+        mode: str = "parts",
+        mime_type: str = "image/png",
+    ) -> list[OCRResult]:
+        """
+        OCR several frames in one request; returns one OCRResult per input, in order.
 
-        data = self._normalize_pairs(data)
+        - mode="parts": each frame is its own image part, preceded by an "Image N" label.
+        - mode="sheet": frames are tiled into one labeled contact sheet (fewer image tokens
+          for small frames, at some cost in legibility).
 
-        if dump_json_to:
-            dump_json_to.mkdir(parents=True, exist_ok=True)
-            out = dump_json_to / f"{image_path.stem}.pairs.json"
-            out.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        `max_tokens` is per frame. Cached frames (read alone or in this `mode`) are
+        answered locally and only the misses are sent; results are cached per
+        frame under a key for this `mode`, so a single-frame run never gets the
+        (possibly less legible) batch read. Frames the answer leaves out (or all of them, if it does not parse) are
+        requested again one at a time.
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown OCR batch mode {mode!r}; expected one of {BATCH_MODES}.")
+        loaded = [_load(im, mime_type) for im in images]
+        results: list[Optional[OCRResult]] = [None] * len(loaded)
+        keys = [self._cache_key(raw, max_tokens, fallback_key) for raw, _ in loaded]
+        batch_keys = [self._cache_key(raw, max_tokens, fallback_key, mode=mode) for raw, _ in loaded]
+        for i, (key, batch_key) in enumerate(zip(keys, batch_keys)):
+            if key is not None:
+                results[i] = self.cache.get(key, batch_key)
+                metrics.inc("ocr_cache_total", result="miss" if results[i] is None else "hit")
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo and self.local is not None:
+            for i, data in zip(todo, self._read_local([loaded[i][0] for i in todo], fallback_key)):
+                results[i] = data
+            todo = [i for i in todo if results[i] is None]
 
-        return data
+        if len(todo) == 1:
+            i = todo[0]
+            results[i] = self._fetch_one(*loaded[i], keys[i], max_tokens=max_tokens, fallback_key=fallback_key)
+        elif todo:
+            from google.genai import types
+
+            rules = _RULES.format(fallback_key=fallback_key)
+            if mode == "sheet":
+                sheet = contact_sheet([loaded[i][0] for i in todo])
+                contents = [
+                    types.Part.from_bytes(data=sheet, mime_type="image/png"),
+                    f"This contact sheet shows {len(todo)} end-credit frames, each under a yellow band "
+                    f"numbered 1 to {len(todo)}. For EACH numbered frame, extract ALL visible end-credit "
+                    "key→value pairs from that frame only.\n"
+                    "Return one item per frame in `frames`, with `frame` set to its number "
+                    "(include frames with no text, with empty `entries`).\n\n" + rules,
+                ]
+            else:
+                contents = []
+                for n, i in enumerate(todo, start=1):
+                    raw, mime = loaded[i]
+                    contents += [f"Image {n}:", types.Part.from_bytes(data=raw, mime_type=mime)]
+                contents.append(
+                    f"The {len(todo)} images above are end-credit frames labeled Image 1 to Image {len(todo)}. "
+                    "For EACH image, extract ALL visible end-credit key→value pairs from that image only.\n"
+                    "Return one item per image in `frames`, with `frame` set to its number "
+                    "(include images with no text, with empty `entries`).\n\n" + rules
+                )
+
+            metrics.inc("ocr_tier_total", len(todo), tier="gemini", outcome="requested")
+            with metrics.timer("ocr_tier_seconds", tier="gemini"):
+                resp = self.requester.generate_content(
+                    kind="ocr_batch",
+                    model=self.model,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        temperature=0.0,
+                        max_output_tokens=max_tokens * len(todo),
+                        response_mime_type="application/json",
+                        response_schema=schemas.PAIR_BATCH_SCHEMA,
+                    ),
+                )
+            try:
+                frames = json.loads(resp.text or "").get("frames") or []
+            except Exception:
+                frames = []  # truncated or not JSON: every frame is retried on its own below
+
+            by_label: dict[int, list] = {}
+            for f in frames if isinstance(frames, list) else []:
+                try:
+                    label, entries = int(f.get("frame")), f.get("entries") or []
+                except (TypeError, ValueError, AttributeError):
+                    continue
+                if isinstance(entries, list):
+                    by_label.setdefault(label, []).extend(entries)
+            for n, i in enumerate(todo, start=1):
+                if n not in by_label:
+                    # left out of the answer: ask for it alone rather than cache "no text"
+                    metrics.inc("ocr_batch_missing_total")
+                    results[i] = self._fetch_one(*loaded[i], keys[i], max_tokens=max_tokens, fallback_key=fallback_key)
+                    continue
+                results[i] = self._normalize_pairs({"entries": by_label[n]})
+                if batch_keys[i] is not None:
+                    self.cache.put(batch_keys[i], results[i])
+
+        return [r if r is not None else {"entries": []} for r in results]
+
+    def _read_local(self, raws: Sequence[bytes], fallback_key: str) -> list[Optional[OCRResult]]:
+        """Local tier results, None where a frame has to go to Gemini (all None without a local tier)."""
+        if self.local is None:
+            return [None] * len(raws)
+        reads = self.local.read_many(raws, fallback_key=fallback_key)
+        return [self._normalize_pairs(r) if r is not None else None for r in reads]
+
+    def _cache_key(self, raw: bytes, max_tokens: int, fallback_key: str, *, mode: str = "single") -> Optional[str]:
+        if self.cache is None:
+            return None
+        return ocr_cache_key(
+            content_digest(raw),
+            model=self.model,
+            version=OCR_PROMPT_VERSION,
+            max_tokens=max_tokens,
+            fallback_key=fallback_key,
+            mode=mode,
+        )
 
     _split_re = re.compile(r"[;\n•·]|,(?=\s*[A-Z])")
 
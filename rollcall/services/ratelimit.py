@@ -0,0 +1,152 @@
+# services/ratelimit.py
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from typing import Any, Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute / 60` tokens per second.
+
+    `acquire(n)` may drive the balance negative for requests larger than the
+    bucket; later callers then wait for the debt to be repaid. `rate_scale`
+    lets the limiter shrink the effective rate after a 429 and grow it back.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate_scale = 1.0
+        self._stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity * self.rate_scale / 60.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self, n: float = 1.0) -> None:
+        async with self._lock:  # FIFO-ish: one waiter refills at a time
+            while True:
+                self._refill()
+                if self.tokens >= min(n, self.capacity):
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((min(n, self.capacity) - self.tokens) / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (delta > 0) or refund (delta < 0) tokens after the fact."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+    """
+    Shared request budget for every Gemini call in the process:
+
+    - rpm / tpm: requests- and tokens-per-minute buckets (0 disables a bucket).
+    - max_concurrency: requests in flight.
+    - cool-down: after a 429 every caller waits out the server's retry hint, and
+      the rpm/tpm rate is halved, then recovered additively on each success.
+    """
+
+    MIN_SCALE = 0.1
+    RECOVERY_STEP = 0.05
+
+    def __init__(self, *, rpm: int = 0, tpm: int = 0, max_concurrency: int = 8):
+        self.rpm = TokenBucket(rpm) if rpm > 0 else None
+        self.tpm = TokenBucket(tpm) if tpm > 0 else None
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._cool_until = 0.0
+
+    def _buckets(self) -> list[TokenBucket]:
+        return [b for b in (self.rpm, self.tpm) if b is not None]
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self._slots.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._slots.release()
+
+    async def wait(self, est_tokens: int) -> None:
+        delay = self._cool_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.rpm is not None:
+            await self.rpm.acquire(1)
+        if self.tpm is not None:
+            await self.tpm.acquire(est_tokens)
+
+    def settle(self, est_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Reconcile the token estimate with `usage_metadata` and recover rate."""
+        if self.tpm is not None and actual_tokens is not None:
+            self.tpm.adjust(actual_tokens - est_tokens)
+        for b in self._buckets():
+            b.rate_scale = min(1.0, b.rate_scale + self.RECOVERY_STEP)
+
+    def throttle(self, retry_after: float) -> None:
+        self._cool_until = max(self._cool_until, time.monotonic() + retry_after)
+        for b in self._buckets():
+            b.rate_scale = max(self.MIN_SCALE, b.rate_scale / 2)
+
+
+# ---- errors / backoff ----------------------------------------------------------
+
+RETRYABLE_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)s\b")
+_RETRY_IN_RE = re.compile(r"retry in (\d+(?:\.\d+)?)\s*(ms|s)", re.I)
+
+
+def error_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a google-genai APIError (or look-alike), else None."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_hint(exc: BaseException) -> Optional[float]:
+    """
+    Seconds the server asked us to wait, from (in order) a `Retry-After` header,
+    a google.rpc.RetryInfo `retryDelay` detail, or a "retry in Xs" message.
+    """
+    resp = getattr(exc, "response", None)
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        ra = headers.get("retry-after") or headers.get("Retry-After")
+        if ra:
+            return float(ra)
+    except (TypeError, ValueError, AttributeError):
+        pass
+
+    details: Any = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        details = (details.get("error") or details).get("details")
+    for d in details if isinstance(details, list) else []:
+        if isinstance(d, dict) and "retryDelay" in d:
+            m = _DURATION_RE.match(str(d["retryDelay"]))
+            if m:
+                return float(m.group(1))
+
+    m = _RETRY_IN_RE.search(str(exc))
+    if m:
+        val = float(m.group(1))
+        return val / 1000.0 if m.group(2).lower() == "ms" else val
+    return None
+
+
+def backoff_delay(attempt: int, *, base: float, cap: float, hint: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's hint."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    return max(delay, hint or 0.0)
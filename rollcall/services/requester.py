@@ -0,0 +1,142 @@
+# services/requester.py
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from ..config import CHARS_PER_TOKEN
+from ..logging import metrics
+from .ratelimit import RateLimiter, RETRYABLE_CODES, backoff_delay, error_code, retry_hint
+
+# Rough prompt-side token costs used to pre-charge the TPM bucket before the
+# real `usage_metadata` comes back.
+IMAGE_TOKENS_EST = 258
+
+
+def estimate_tokens(contents: Any, max_output_tokens: Optional[int]) -> int:
+    total = int(max_output_tokens or 0)
+    for c in contents if isinstance(contents, (list, tuple)) else [contents]:
+        if isinstance(c, str):
+            total += len(c) // CHARS_PER_TOKEN + 1
+        elif getattr(c, "inline_data", None) is not None:
+            total += IMAGE_TOKENS_EST
+        else:
+            total += len(str(getattr(c, "text", "") or "")) // CHARS_PER_TOKEN + 1
+    return total
+
+
+def usage_tokens(resp: Any) -> Optional[int]:
+    usage = getattr(resp, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return int(total) if total is not None else None
+
+
+class GeminiRequester:
+    """
+    Asyncio request layer shared by OCRService and GuesserService.
+
+    All calls go through one RateLimiter (rpm/tpm buckets + concurrency cap) and
+    are retried on 429/5xx with jittered exponential backoff that honours the
+    server's retry hint. Sync callers (the pipeline's worker threads) use
+    `generate_content`, which schedules onto a private event loop thread.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limits = dict(rpm=rpm, tpm=tpm, max_concurrency=max_concurrency)
+        self._limiter: Optional[RateLimiter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, client: Any, cfg: Any) -> "GeminiRequester":
+        return cls(
+            client,
+            rpm=cfg.rpm,
+            tpm=cfg.tpm,
+            max_concurrency=cfg.max_concurrency,
+            max_retries=cfg.max_retries,
+        )
+
+    # ---- event loop ----------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="rollcall-genai", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def submit(self, **kwargs: Any) -> Future:
+        """Schedule a request and return a concurrent.futures.Future for it."""
+        return asyncio.run_coroutine_threadsafe(self.agenerate_content(**kwargs), self._ensure_loop())
+
+    def generate_content(self, *, kind: str = "other", **kwargs: Any) -> Any:
+        """
+        Blocking drop-in for `client.models.generate_content(...)`. `kind`
+        ("ocr", "refine", ...) labels the request's latency and token metrics.
+        """
+        with metrics.timer("gemini_request_seconds", kind=kind):
+            resp = self.submit(**kwargs).result()
+        metrics.inc("gemini_requests_total", kind=kind)
+        metrics.record_usage(kind, resp)
+        return resp
+
+    # ---- async path ----------------------------------------------------------
+
+    async def _call(self, **kwargs: Any) -> Any:
+        aio = getattr(self.client, "aio", None)
+        if aio is not None:
+            return await aio.models.generate_content(**kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.client.models.generate_content(**kwargs))
+
+    async def agenerate_content(self, **kwargs: Any) -> Any:
+        if self._limiter is None:  # created lazily so it binds to the running loop
+            self._limiter = RateLimiter(**self._limits)
+        limiter = self._limiter
+
+        cfg = kwargs.get("config")
+        est = estimate_tokens(kwargs.get("contents"), getattr(cfg, "max_output_tokens", None))
+
+        attempt = 0
+        while True:
+            await limiter.wait(est)
+            try:
+                async with limiter:
+                    resp = await self._call(**kwargs)
+            except Exception as e:
+                code = error_code(e)
+                if code not in RETRYABLE_CODES or attempt >= self.max_retries:
+                    raise
+                hint = retry_hint(e)
+                metrics.inc("gemini_retries_total", code=code)
+                if code == 429:
+                    limiter.throttle(hint or self.backoff_base)
+                await asyncio.sleep(backoff_delay(attempt, base=self.backoff_base, cap=self.backoff_max, hint=hint))
+                attempt += 1
+                continue
+            limiter.settle(est, usage_tokens(resp))
+            return resp
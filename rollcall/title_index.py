@@ -0,0 +1,418 @@
+"""
+Offline title index: resolves a credits map to a title from a local catalog
+dump, so most files never need refine or search.
+
+Built from IMDb-style TSVs (title.basics, title.episode, name.basics,
+title.crew, title.principals; plain or .gz) into one SQLite file. `people`
+maps a normalized name (payload._name_form: case, accents, punctuation and
+common OCR confusions folded) to person ids, and `credits` maps a person to
+the titles they worked on. That is the inverted index. `TitleIndex.lookup`
+scores every title sharing a person with the credits map and answers only when
+one title clearly wins. Otherwise the caller asks Gemini, passing the top
+candidates along.
+
+Builds are incremental: each TSV is imported only if its size or mtime changed
+since the last build, and rows are upserted. Rows that disappeared from a dump
+stay until a `rebuild`.
+"""
+from __future__ import annotations
+
+import gzip
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from .logging import metrics
+from .payload import CHARACTER_WEIGHT, _name_form, canonical_map, key_weight
+from .services.guess import _normalize_guess
+from .types import CreditsMap
+from .utils.sqlite_utils import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    tconst TEXT PRIMARY KEY,
+    kind   TEXT NOT NULL,
+    title  TEXT NOT NULL,
+    year   INTEGER
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS episodes (
+    tconst  TEXT PRIMARY KEY,
+    parent  TEXT NOT NULL,
+    season  INTEGER,
+    episode INTEGER
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS people (
+    nconst TEXT PRIMARY KEY,
+    name   TEXT NOT NULL,
+    norm   TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS people_norm ON people(norm);
+CREATE TABLE IF NOT EXISTS credits (
+    nconst TEXT NOT NULL,
+    tconst TEXT NOT NULL,
+    role   TEXT NOT NULL,
+    PRIMARY KEY (nconst, tconst, role)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    name     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    rows     INTEGER NOT NULL,
+    imported REAL NOT NULL
+);
+"""
+
+# catalog files in import order; "name.basics" etc. match name.basics.tsv(.gz)
+SOURCES = ("title.basics", "title.episode", "name.basics", "title.crew", "title.principals")
+
+# title.basics titleType values never imported
+SKIP_KINDS = frozenset({"videoGame", "podcastSeries", "podcastEpisode"})
+# kinds that can be imported (episodes point at them) but are never an answer
+SERIES_KINDS = frozenset({"tvSeries", "tvMiniSeries"})
+
+# title.principals category -> role; unlisted categories (self, archive_footage, ...) are skipped
+PRINCIPAL_ROLES = {
+    "actor": "actor", "actress": "actor",
+    "director": "director", "writer": "writer", "producer": "producer", "composer": "composer",
+    "cinematographer": "cinematographer", "editor": "editor", "casting_director": "casting",
+    "production_designer": "designer",
+}
+
+# canonical payload key -> role it credits
+KEY_ROLES = {
+    "Directed by": "director",
+    "Created by": "writer", "Written by": "writer", "Screenplay by": "writer",
+    "Teleplay by": "writer", "Story by": "writer", "Based on": "writer",
+    "Cast": "actor",
+    "Produced by": "producer", "Executive Producers": "producer",
+    "Music by": "composer",
+    "Director of Photography": "cinematographer",
+    "Edited by": "editor",
+    "Casting by": "casting",
+    "Production Designer": "designer", "Costume Designer": "designer",
+}
+
+OTHER_ROLE = 0.4        # person credited on the title, but in a different role than the heading says
+TITLE_BONUS = 6.0       # the credits' "Title" key names the candidate
+MAX_FANOUT = 5000       # credit rows per name before it is dropped as uninformative
+BATCH = 50000           # rows per executemany during a build
+
+
+def _open_text(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _rows(path: Path) -> Iterator[list[str]]:
+    """TSV rows as lists, header skipped, IMDb's "\\N" as ""."""
+    with _open_text(path) as f:
+        next(f, None)
+        for line in f:
+            yield [("" if c == "\\N" else c) for c in line.rstrip("\n").split("\t")]
+
+
+def _int(text: str) -> Optional[int]:
+    return int(text) if text.isdigit() else None
+
+
+def _find_source(directory: Path, name: str) -> Optional[Path]:
+    for suffix in (".tsv.gz", ".tsv"):
+        p = directory / f"{name}{suffix}"
+        if p.exists():
+            return p
+    return None
+
+
+def _title_rows(path: Path) -> Iterator[tuple]:
+    for r in _rows(path):
+        if len(r) >= 6 and r[1] not in SKIP_KINDS:
+            yield r[0], r[1], r[2], _int(r[5])
+
+
+def _episode_rows(path: Path) -> Iterator[tuple]:
+    for r in _rows(path):
+        if len(r) >= 4:
+            yield r[0], r[1], _int(r[2]), _int(r[3])
+
+
+def _people_rows(path: Path) -> Iterator[tuple]:
+    for r in _rows(path):
+        if len(r) >= 2 and r[1]:
+            yield r[0], r[1], _name_form(r[1])
+
+
+def _crew_rows(path: Path) -> Iterator[tuple]:
+    for r in _rows(path):
+        if len(r) < 3:
+            continue
+        for role, ids in (("director", r[1]), ("writer", r[2])):
+            for nconst in filter(None, ids.split(",")):
+                yield nconst, r[0], role
+
+
+def _principal_rows(path: Path) -> Iterator[tuple]:
+    for r in _rows(path):
+        role = PRINCIPAL_ROLES.get(r[3]) if len(r) >= 4 else None
+        if role:
+            yield r[2], r[0], role
+
+
+_IMPORTS: dict[str, tuple[str, Callable[[Path], Iterator[tuple]]]] = {
+    "title.basics": ("INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?)", _title_rows),
+    "title.episode": ("INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?)", _episode_rows),
+    "name.basics": ("INSERT OR REPLACE INTO people VALUES (?, ?, ?)", _people_rows),
+    "title.crew": ("INSERT OR IGNORE INTO credits VALUES (?, ?, ?)", _crew_rows),
+    "title.principals": ("INSERT OR IGNORE INTO credits VALUES (?, ?, ?)", _principal_rows),
+}
+
+
+def build_index(
+    index_path: Path,
+    tsv_dir: Path,
+    *,
+    rebuild: bool = False,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> dict[str, int]:
+    """
+    Import the catalog TSVs in `tsv_dir` into `index_path`. Unchanged files are
+    skipped (unless `rebuild`, which starts from an empty index). Returns rows
+    imported per source; `progress(source, rows)` is called as rows stream in.
+    """
+    if rebuild:
+        for p in (index_path, index_path.with_name(index_path.name + "-wal"), index_path.with_name(index_path.name + "-shm")):
+            p.unlink(missing_ok=True)
+    db = connect(index_path, _SCHEMA)
+    db.execute("PRAGMA synchronous=OFF")  # a crashed build is simply rerun
+    imported: dict[str, int] = {}
+    try:
+        for name in SOURCES:
+            path = _find_source(tsv_dir, name)
+            if path is None:
+                continue
+            st = path.stat()
+            seen = db.execute("SELECT size, mtime_ns FROM sources WHERE name = ?", (name,)).fetchone()
+            if seen == (st.st_size, st.st_mtime_ns):
+                continue
+            sql, reader = _IMPORTS[name]
+            rows = 0
+            db.execute("BEGIN")
+            batch: list[tuple] = []
+            for row in reader(path):
+                batch.append(row)
+                if len(batch) >= BATCH:
+                    db.executemany(sql, batch)
+                    rows += len(batch)
+                    batch.clear()
+                    if progress: progress(name, rows)
+            db.executemany(sql, batch)
+            rows += len(batch)
+            db.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                (name, st.st_size, st.st_mtime_ns, rows, time.time()),
+            )
+            db.execute("COMMIT")
+            if progress: progress(name, rows)
+            imported[name] = rows
+        if imported:
+            db.execute("ANALYZE")
+    finally:
+        db.close()
+    return imported
+
+
+@dataclass(slots=True)
+class Candidate:
+    tconst: str
+    guess: str                                 # in _normalize_guess format
+    score: float
+    people: list[str] = field(default_factory=list)  # matched names, as OCR'd
+
+
+@dataclass(slots=True)
+class IndexLookup:
+    """Scored candidates, best first; `guess` is set only when the best one clearly wins."""
+    candidates: list[Candidate]
+    guess: Optional[str] = None
+
+    @property
+    def confident(self) -> bool:
+        return self.guess is not None
+
+
+def _role_for(key: str, values: list[str]) -> Optional[str]:
+    role = KEY_ROLES.get(key)
+    if role is None and key_weight(key, values) == CHARACTER_WEIGHT:
+        return "actor"  # "Character" -> ["Actor"] cast rows
+    return role
+
+
+def _usable(form: str) -> bool:
+    # a bare first name or initials match thousands of people
+    return len(form) >= 5 and " " in form
+
+
+def _safe_title(title: str) -> str:
+    return " ".join(title.replace("/", "-").replace("\\", "-").split())
+
+
+class TitleIndex:
+    """
+    Read side of the index. One read-only connection (memory-mapped) guarded
+    by a lock, so it can be shared by the pipeline's identify workers.
+
+    `lookup` answers when the best title has at least `min_people` distinct
+    matched names and scores at least `min_margin` times the runner-up.
+    """
+
+    MMAP_BYTES = 1 << 30
+
+    def __init__(self, path: Path, *, min_people: int = 2, min_margin: float = 2.0, max_candidates: int = 5):
+        self.path = Path(path)
+        self.min_people = min_people
+        self.min_margin = min_margin
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._db.execute(f"PRAGMA mmap_size={self.MMAP_BYTES}")
+
+    def lookup(self, credits_map: CreditsMap) -> IndexLookup:
+        with metrics.timer("title_index_seconds"):
+            found = self._lookup(credits_map)
+        outcome = "hit" if found.confident else "ambiguous" if found.candidates else "miss"
+        metrics.inc("title_index_total", outcome=outcome)
+        with self._lock:
+            if found.confident:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def _lookup(self, credits_map: CreditsMap) -> IndexLookup:
+        canon = canonical_map(credits_map)
+        wanted: dict[str, tuple[Optional[str], float, str]] = {}  # form -> (role, weight, as OCR'd)
+        for key, values in canon.items():
+            if key == "Title":
+                continue
+            role, weight = _role_for(key, values), key_weight(key, values)
+            for value in values:
+                form = _name_form(value)
+                if _usable(form) and weight > wanted.get(form, (None, 0.0, ""))[1]:
+                    wanted[form] = (role, weight, value)
+
+        scores: dict[str, float] = {}
+        matched: dict[str, list[str]] = {}
+        with self._lock:
+            for form, (role, weight, value) in wanted.items():
+                rows = self._db.execute(
+                    "SELECT c.tconst, c.role FROM people p JOIN credits c ON c.nconst = p.nconst "
+                    "WHERE p.norm = ? LIMIT ?",
+                    (form, MAX_FANOUT + 1),
+                ).fetchall()
+                if not rows or len(rows) > MAX_FANOUT:
+                    continue
+                best: dict[str, float] = {}
+                for tconst, credited in rows:
+                    w = weight if role is None or credited == role else weight * OTHER_ROLE
+                    best[tconst] = max(best.get(tconst, 0.0), w)
+                # a name on thousands of titles says less than one on a handful
+                idf = 1.0 / math.log2(2 + len(best))
+                for tconst, w in best.items():
+                    scores[tconst] = scores.get(tconst, 0.0) + w * idf
+                    matched.setdefault(tconst, []).append(value)
+
+            # the Title bonus goes in before ranking, so a named title can't be cut off below the top few
+            titles = {_name_form(t) for t in canon.get("Title", [])}
+            if titles:
+                for tconst in self._titled(list(scores), titles):
+                    scores[tconst] += TITLE_BONUS
+            ranked = sorted(scores, key=lambda t: (-scores[t], t))
+            candidates: list[Candidate] = []
+            for tconst in ranked:
+                guess, _ = self._describe(tconst)
+                if guess is None:
+                    continue  # a series, or an episode without season/episode numbers
+                candidates.append(Candidate(tconst, guess, round(scores[tconst], 4), matched[tconst]))
+                if len(candidates) >= self.max_candidates:
+                    break
+        return IndexLookup(candidates, self._decide(candidates))
+
+    def _titled(self, tconsts: list[str], titles: set[str]) -> list[str]:
+        """The `tconsts` whose own title folds to one of `titles`."""
+        out = []
+        for i in range(0, len(tconsts), 500):  # under SQLite's bound-parameter limit
+            chunk = tconsts[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT tconst, title FROM titles WHERE tconst IN ({','.join('?' * len(chunk))})", chunk,
+            ).fetchall()
+            out += [tconst for tconst, title in rows if title and _name_form(title) in titles]
+        return out
+
+    def _decide(self, candidates: list[Candidate]) -> Optional[str]:
+        if not candidates:
+            return None
+        top = candidates[0]
+        if len(top.people) < self.min_people:  # one entry per distinct folded name
+            return None
+        runner_up = candidates[1].score if len(candidates) > 1 else 0.0
+        return top.guess if top.score >= self.min_margin * runner_up else None
+
+    def _describe(self, tconst: str) -> tuple[Optional[str], Optional[str]]:
+        """(guess in _normalize_guess format or None if unusable, title for matching)."""
+        row = self._db.execute(
+            "SELECT t.kind, t.title, t.year, s.title, e.season, e.episode FROM titles t "
+            "LEFT JOIN episodes e ON e.tconst = t.tconst LEFT JOIN titles s ON s.tconst = e.parent "
+            "WHERE t.tconst = ?",
+            (tconst,),
+        ).fetchone()
+        if row is None:
+            return None, None
+        kind, title, year, series, season, episode = row
+        if kind in SERIES_KINDS:
+            return None, title
+        if kind == "tvEpisode":
+            if not (series and season is not None and episode is not None):
+                return None, title
+            text = f"{_safe_title(series)}_S{season:02d}E{episode:02d}"
+        else:
+            text = f"{_safe_title(title)} ({year})" if year else _safe_title(title)
+        guess = _normalize_guess(text)
+        return (None if guess == "UNKNOWN_TITLE" else guess), title
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                table: int(self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+                for table in ("titles", "episodes", "people", "credits")
+            }
+
+    def sources(self) -> list[tuple[str, int, float]]:
+        """(source, rows, imported at) for every imported TSV."""
+        with self._lock:
+            return self._db.execute("SELECT name, rows, imported FROM sources ORDER BY imported").fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_title_index(path: Path, **kw) -> Optional[TitleIndex]:
+    """The index at `path`, or None if none has been built there."""
+    return TitleIndex(path, **kw) if Path(path).exists() else None
+
+
+def parse_credit_args(pairs: Iterable[str]) -> dict[str, set[str]]:
+    """["Directed by=Jane Doe", "Cast=A, B"] -> credits map (for `rlcl index lookup`)."""
+    out: dict[str, set[str]] = {}
+    for pair in pairs:
+        key, sep, values = pair.partition("=")
+        if not sep:
+            raise ValueError(f"expected KEY=NAME[, NAME...], got {pair!r}")
+        out.setdefault(key.strip(), set()).update(v.strip() for v in values.split(",") if v.strip())
+    return out
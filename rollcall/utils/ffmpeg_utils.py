@@ -1,25 +1,53 @@
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 from datetime import timedelta
 from ..config import OCRConfig
-import ffmpeg
+from ..logging import metrics
+import numpy as np
 import re
+import queue
+import subprocess
+import threading
+import time
 
-def ffprobe_duration_seconds(video_path: Path) -> Optional[float]:
+def probe_media(video_path: Path) -> Optional[dict]:
+    """Single ffprobe call; the result is shared by the duration/size/chapter helpers below."""
+    import ffmpeg  # ffmpeg-python is imported on first use, keeping CLI startup light
+
+    try:
+        with metrics.timer("ffmpeg_seconds", op="probe"):
+            return ffmpeg.probe(str(video_path), show_chapters=None)
+    except ffmpeg.Error as e:
+        try:
+            err = e.stderr.decode("utf-8", errors="ignore")
+        except Exception:
+            err = str(e)
+        print(f"[ffprobe] Error: {err}")
+    except Exception as e:
+        print(f"[ffprobe] Unexpected error: {e}")
+    return None
+
+
+def _video_stream(probe: dict) -> Optional[dict]:
+    streams = probe.get("streams") or []
+    return next((s for s in streams if s.get("codec_type") == "video"), None)
+
+
+def duration_from_probe(probe: Optional[dict]) -> Optional[float]:
     """
-    Robust duration using ffmpeg.probe:
+    Robust duration from an ffmpeg.probe result:
     - Prefer container-level format.duration
     - Fall back to a duration-like tag in the video stream if needed
     """
+    if not probe:
+        return None
     try:
-        probe = ffmpeg.probe(str(video_path))
         fmt = probe.get("format") or {}
         dur_str = fmt.get("duration")
         if dur_str:
             return float(dur_str)
 
-        streams = probe.get("streams") or []
-        v = next((s for s in streams if s.get("codec_type") == "video"), None)
+        v = _video_stream(probe)
         if v:
             tags = v.get("tags") or {}
             key = next((k for k in tags if re.search(r"duration", k, re.I)), None)
@@ -28,33 +56,111 @@ def ffprobe_duration_seconds(video_path: Path) -> Optional[float]:
                 h, m, s = cleaned.split(":")
                 td = timedelta(hours=int(h), minutes=int(m), seconds=float(s))
                 return float(td.total_seconds())
-    except ffmpeg.Error as e:
-        try:
-            err = e.stderr.decode("utf-8", errors="ignore")
-        except Exception:
-            err = str(e)
-        print(f"[ffprobe] Error: {err}")
     except Exception as e:
         print(f"[ffprobe] Unexpected error: {e}")
 
     return None
 
 
+def ffprobe_duration_seconds(video_path: Path) -> Optional[float]:
+    return duration_from_probe(probe_media(video_path))
+
+
+def video_size(probe: Optional[dict]) -> Optional[tuple[int, int]]:
+    """Display (width, height) of the first video stream, accounting for rotation."""
+    v = _video_stream(probe or {})
+    if not v or not v.get("width") or not v.get("height"):
+        return None
+    w, h = int(v["width"]), int(v["height"])
+    rotate = (v.get("tags") or {}).get("rotate")
+    for sd in v.get("side_data_list") or []:
+        rotate = sd.get("rotation", rotate)
+    try:
+        if abs(int(float(rotate or 0))) % 180 == 90:
+            w, h = h, w
+    except ValueError:
+        pass
+    return w, h
+
+
+def chapters_from_probe(probe: Optional[dict]) -> list[tuple[float, float, str]]:
+    """(start, end, title) for each chapter marker, in order; [] when there are none."""
+    out = []
+    for ch in (probe or {}).get("chapters") or []:
+        try:
+            start, end = float(ch["start_time"]), float(ch["end_time"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        out.append((start, end, str((ch.get("tags") or {}).get("title") or "")))
+    return sorted(out)
+
+
+# subtitle codecs ffmpeg can turn into text (bitmap ones like PGS/VobSub would need OCR)
+TEXT_SUBTITLE_CODECS = frozenset({"subrip", "srt", "ass", "ssa", "mov_text", "webvtt", "text"})
+
+
+def text_subtitle_streams(probe: Optional[dict]) -> list[dict]:
+    """Text subtitle streams from a probe result, in file order."""
+    return [
+        s for s in (probe or {}).get("streams") or []
+        if s.get("codec_type") == "subtitle" and s.get("codec_name") in TEXT_SUBTITLE_CODECS
+    ]
+
+
+def subtitle_text(video_path: Path, stream_index: int, start_time: float) -> Optional[str]:
+    """
+    SRT text of subtitle stream `stream_index` (absolute index) from
+    `start_time` to the end. Nothing is decoded; ffmpeg seeks and demuxes only
+    the tail. None on error.
+    """
+    import ffmpeg
+
+    try:
+        with metrics.timer("ffmpeg_seconds", op="subtitles"):
+            out, _ = (
+                ffmpeg.input(str(video_path), ss=start_time)
+                .output("pipe:", map=f"0:{stream_index}", format="srt")
+                .global_args("-nostdin", "-loglevel", "error")
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+    except ffmpeg.Error as e:
+        err = (e.stderr or b"").decode("utf-8", errors="ignore").strip()
+        print(f"[ffmpeg] Could not read subtitles of {video_path.name}: {err.splitlines()[-1] if err else e}")
+        return None
+    return out.decode("utf-8", errors="replace")
+
+
 def tail_start_time(duration_s: float, cfg: OCRConfig) -> float:
     if duration_s > 3600:
         return max(0.0, duration_s - cfg.long_video_tail_sec)
     return max(0.0, duration_s - cfg.short_video_tail_sec)
 
 
-def extract_frames(video_path: Path, out_dir: Path, start_time: float, fps_expr: str) -> None:
+def _input(video_path: Path, start_time: float, end_time: Optional[float], **kwargs):
+    import ffmpeg
+
+    if end_time is not None:
+        kwargs["t"] = max(0.0, end_time - start_time)
+    return ffmpeg.input(str(video_path), ss=start_time, **kwargs)
+
+
+def extract_frames(
+    video_path: Path,
+    out_dir: Path,
+    start_time: float,
+    fps_expr: str,
+    end_time: Optional[float] = None,
+) -> None:
+    import ffmpeg
+
     try:
-        (
-            ffmpeg
-            .input(str(video_path), ss=start_time)
-            .filter("fps", fps=fps_expr)
-            .output(str(out_dir / "frame_%03d.png"))
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+        with metrics.timer("ffmpeg_seconds", op="extract"):
+            (
+                _input(video_path, start_time, end_time)
+                .filter("fps", fps=fps_expr)
+                .output(str(out_dir / "frame_%03d.png"))
+                .run(capture_stdout=True, capture_stderr=True)
+            )
     except ffmpeg.Error as e:
         stdout = ""
         stderr = ""
@@ -63,4 +169,148 @@ def extract_frames(video_path: Path, out_dir: Path, start_time: float, fps_expr:
             stderr = e.stderr.decode("utf-8", errors="ignore")
         except Exception:
             pass
-        print(f"[ffmpeg] Error extracting frames for {video_path.name}:\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}")
\ No newline at end of file
+        print(f"[ffmpeg] Error extracting frames for {video_path.name}:\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}")
+
+
+def grab_frame(video_path: Path, t: float, size: tuple[int, int]) -> Optional[np.ndarray]:
+    """
+    The frame at `t` seconds as a (height, width, 3) uint8 array scaled to
+    `size`: one targeted seek, decoding from the preceding keyframe only.
+    None past the end of the file or on error.
+    """
+    w, h = size
+    cmd = (
+        _input(video_path, t, None)
+        .filter("scale", w, h)
+        .output("pipe:", vframes=1, format="rawvideo", pix_fmt="rgb24")
+        .global_args("-nostdin", "-loglevel", "error")
+        .compile()
+    )
+    with metrics.timer("ffmpeg_seconds", op="seek"):
+        proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode or len(proc.stdout) < w * h * 3:
+        if proc.returncode:
+            print(f"[ffmpeg] Error seeking to {t:.1f}s in {video_path.name}: {proc.stderr.decode('utf-8', errors='ignore').strip()}")
+        return None
+    return np.frombuffer(bytearray(proc.stdout[: w * h * 3]), dtype=np.uint8).reshape(h, w, 3)
+
+
+class FramePool:
+    """
+    Fixed set of preallocated (height, width, 3) frame buffers. `stream_frames`
+    decodes into buffers taken from the pool, and consumers hand them back with
+    `release()`, so memory stays bounded and a slow consumer throttles ffmpeg.
+    """
+
+    def __init__(self, size: tuple[int, int], count: int):
+        w, h = size
+        self.size = size
+        self._free: queue.Queue = queue.Queue()
+        self._closed = False
+        self._owned: set[int] = set()
+        for _ in range(max(1, count)):
+            buf = np.empty((h, w, 3), dtype=np.uint8)
+            self._owned.add(id(buf))
+            self._free.put(buf)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Blocks for a free buffer; returns None once the pool is closed."""
+        buf = self._free.get()
+        if buf is None or self._closed:
+            self._free.put(None)  # wake the next waiter too
+            return None
+        return buf
+
+    def release(self, buf: np.ndarray) -> None:
+        if id(buf) in self._owned:  # frames allocated elsewhere (e.g. grab_frame) are just dropped
+            self._free.put(buf)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        self._closed = True
+        self._free.put(None)
+
+
+def stream_frames(
+    video_path: Path,
+    start_time: float,
+    fps_expr: str,
+    size: tuple[int, int],
+    *,
+    end_time: Optional[float] = None,
+    keyframes_only: bool = False,
+    exact: bool = False,
+    buffers: int = 3,
+    pool: Optional[FramePool] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decode sampled frames straight from ffmpeg's stdout as rgb24 rawvideo.
+
+    Frames are read into preallocated buffers and yielded as zero-copy
+    (height, width, 3) uint8 arrays, so decoding overlaps with whatever the
+    caller does with each frame:
+
+    - without `pool`, `buffers` arrays are reused round-robin; a yielded frame
+      stays valid until `buffers - 1` further frames have been read;
+    - with `pool`, each frame is owned by the caller until `pool.release(frame)`.
+
+    `end_time` stops decoding there instead of at the end of the file.
+    `keyframes_only` makes the decoder skip everything but keyframes (each sample
+    then repeats the nearest preceding keyframe), which is what coarse scans want.
+    By default frame k lands about half an interval after `start_time + k/fps`
+    (the fps filter rounds to nearest); with `exact` it is the frame at that time.
+
+    Closing the generator early stops ffmpeg.
+    """
+    w, h = size
+    frame_bytes = w * h * 3
+    cmd = (
+        _input(video_path, start_time, end_time, **({"skip_frame": "nokey"} if keyframes_only else {}))
+        .filter("fps", fps=fps_expr, **({"round": "up"} if exact else {}))
+        .filter("scale", w, h)  # pin the output size whatever the rotation/SAR
+        .output("pipe:", format="rawvideo", pix_fmt="rgb24")
+        .global_args("-nostdin", "-loglevel", "error")
+        .compile()
+    )
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    err_chunks: list[bytes] = []
+    drain = threading.Thread(target=lambda: err_chunks.append(proc.stderr.read()), daemon=True)
+    drain.start()
+
+    ring = [np.empty((h, w, 3), dtype=np.uint8) for _ in range(max(2, buffers))] if pool is None else []
+    slot = 0
+    waited = 0.0  # time blocked on ffmpeg's output, i.e. decode-bound time
+    try:
+        while True:
+            buf = ring[slot] if pool is None else pool.acquire()
+            if buf is None:
+                break
+            view, got = memoryview(buf.reshape(-1)), 0
+            t0 = time.perf_counter()
+            while got < frame_bytes:
+                n = proc.stdout.readinto(view[got:])
+                if not n:
+                    break
+                got += n
+            waited += time.perf_counter() - t0
+            if got < frame_bytes:
+                if pool is not None:
+                    pool.release(buf)
+                break
+            yield buf
+            slot = (slot + 1) % max(1, len(ring))
+    finally:
+        metrics.observe("ffmpeg_seconds", waited, op="scan" if keyframes_only else "stream")
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        else:
+            proc.wait()
+            drain.join(timeout=1.0)
+            if proc.returncode:
+                stderr = b"".join(err_chunks).decode("utf-8", errors="ignore")
+                print(f"[ffmpeg] Error streaming frames for {video_path.name}:\nSTDERR:\n{stderr}")
+        proc.stdout.close()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import sys
+from pathlib import Path
+
+# renameat2(2)
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+_renameat2 = None  # libc function, False once known to be missing
+
+
+def _libc_renameat2():
+    global _renameat2
+    if _renameat2 is None:
+        _renameat2 = False
+        if sys.platform.startswith("linux"):
+            try:
+                fn = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True).renameat2
+                fn.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+                _renameat2 = fn
+            except (OSError, AttributeError):  # glibc < 2.28, musl
+                pass
+    return _renameat2
+
+
+def rename_noreplace(src: Path, dst: Path) -> None:
+    """
+    Rename `src` to `dst` within one filesystem, raising FileExistsError rather
+    than replacing an existing `dst`. Atomic where the filesystem allows:
+
+    - renameat2(RENAME_NOREPLACE) (Linux, local filesystems);
+    - else link + unlink, which NFS and SMB with unix extensions carry out on
+      the server: of two hosts racing for `dst`, one link fails with EEXIST;
+    - else (no hard links: exFAT, plain SMB) a check just before the rename,
+      which narrows the race but cannot close it.
+
+    A `dst` that is already a second link to `src` (a link + unlink
+    interrupted halfway) counts as done. On a case-insensitive filesystem
+    (exFAT, SMB, macOS, casefold ext4) a case-only rename finds `dst`
+    "existing" as `src` itself, and is done with a plain rename.
+    """
+    try:
+        _rename_noreplace(src, dst)
+    except FileExistsError:
+        if not os.path.samefile(src, dst):
+            raise
+        if os.fspath(src).casefold() == os.fspath(dst).casefold():
+            os.rename(src, dst)  # one directory entry under two spellings: never unlink it
+        elif os.stat(src).st_nlink >= 2:
+            os.unlink(src)
+        else:
+            raise
+
+
+def _rename_noreplace(src: Path, dst: Path) -> None:
+    fn = _libc_renameat2()
+    if fn:
+        if fn(AT_FDCWD, os.fsencode(src), AT_FDCWD, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):  # EINVAL: flag unsupported here (NFS, CIFS)
+            raise OSError(err, os.strerror(err), str(src), None, str(dst))
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK):
+            raise
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst)) from None
+        os.rename(src, dst)
+        return
+    os.unlink(src)
@@ -1,11 +1,363 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
 from PIL import Image
 
-def image_has_text(frame_path: Path, variation_threshold: float = 0.0) -> bool:
+from ..config import UPLOAD_FORMATS  # re-exported; defined there so the CLI can validate without PIL
+
+Frame = Union[Path, Image.Image, np.ndarray]
+
+
+def image_has_text(frame: Frame, variation_threshold: float = 0.0) -> bool:
     """
     Quick and cheap heuristic: if grayscale extrema are identical,
     there is likely no text or variation.
     """
-    with Image.open(frame_path).convert("L") as img:
-        lo, hi = img.getextrema()
+    if isinstance(frame, Path):
+        with Image.open(frame).convert("L") as img:
+            lo, hi = img.getextrema()
+    else:
+        lo, hi = _to_image(frame).convert("L").getextrema()
     return hi > (lo + variation_threshold)
+
+
+Box = tuple[int, int, int, int]   # (left, top, right, bottom) in source pixels
+
+
+@dataclass(slots=True)
+class TextScore:
+    score: float                                    # 0..1 likelihood that the frame shows text
+    regions: list[Box] = field(default_factory=list)
+
+    def bounds(self) -> Optional[Box]:
+        """Union of all regions, or None if there are none."""
+        if not self.regions:
+            return None
+        l, t, r, b = zip(*self.regions)
+        return min(l), min(t), max(r), max(b)
+
+
+def text_likelihood(
+    frame: Frame,
+    *,
+    width: int = 480,
+    cell: int = 8,
+    edge: float = 40.0,
+    stroke: int = 4,
+    min_strokes: int = 3,
+    min_contrast: float = 80.0,
+    pad: int = 1,
+) -> TextScore:
+    """
+    Cheap text detector over a `width`-px grayscale thumbnail (a few ms per frame).
+
+    Text is dense in *strokes*: a strong rising edge followed within `stroke` px by
+    a falling one (or the reverse for dark text), in either direction. The
+    thumbnail is split into `cell`-px cells; a cell is text-like when it holds at
+    least `min_strokes` stroke starts, two of them side by side on one row, and
+    spans `min_contrast` grey levels.
+    Text-like cells only count when they sit in horizontal runs of two or more,
+    which drops isolated thin lines from logos and scene detail. Runs that touch
+    vertically are merged into regions (padded by `pad` cells, mapped back to
+    source pixels). The score saturates with the number of text-like cells, so a
+    single short line of credits already scores ~0.5.
+    """
+    img = _to_image(frame)
+    src_w, src_h = img.size
+    h = max(cell, round(src_h * width / max(1, src_w)))
+    factor = src_w // width
+    if factor >= 2:
+        img = img.reduce(factor)  # box filter in C; far cheaper than resizing full-res
+    g = gray_array(img, None if img.size == (width, h) else (width, h))
+
+    strokes = np.zeros(g.shape, dtype=bool)
+    across = np.zeros(g.shape, dtype=bool)   # strokes met scanning a row (vertical strokes)
+    for axis in (1, 0):
+        d = np.diff(g.astype(np.int16), axis=axis)
+        rise, fall = d > edge, d < -edge
+        near_fall = np.zeros_like(fall)
+        near_rise = np.zeros_like(rise)
+        n = d.shape[axis]
+        for k in range(1, stroke + 1):
+            if axis == 1:
+                near_fall[:, : n - k] |= fall[:, k:]
+                near_rise[:, : n - k] |= rise[:, k:]
+            else:
+                near_fall[: n - k] |= fall[k:]
+                near_rise[: n - k] |= rise[k:]
+        hits = (rise & near_fall) | (fall & near_rise)
+        if axis == 1:
+            across[:, :-1] = hits
+            strokes |= across
+        else:
+            strokes[:-1] |= hits
+
+    rows, cols = g.shape[0] // cell, g.shape[1] // cell
+    if not rows or not cols:
+        return TextScore(0.0)
+    tiles = (rows, cell, cols, cell)
+    count = strokes[: rows * cell, : cols * cell].reshape(tiles).sum(axis=(1, 3), dtype=np.uint16)
+    gt = g[: rows * cell, : cols * cell].reshape(tiles)
+    contrast = gt.max(axis=(1, 3)).astype(np.int16) - gt.min(axis=(1, 3))
+    # glyphs put several strokes side by side; a logo outline crosses a row once
+    per_row = across[: rows * cell, : cols * cell].reshape(tiles).sum(axis=3, dtype=np.uint8).max(axis=1)
+    mask = (count >= min_strokes) & (contrast >= min_contrast) & (per_row >= 2)
+
+    # keep horizontal runs of >= 2 cells
+    left = np.zeros_like(mask)
+    right = np.zeros_like(mask)
+    left[:, 1:] = mask[:, :-1]
+    right[:, :-1] = mask[:, 1:]
+    mask &= left | right
+    n_cells = int(mask.sum())
+    if not n_cells:
+        return TextScore(0.0)
+
+    # merge vertically touching runs into regions (cell coordinates, inclusive)
+    regions: list[list[int]] = []
+    for r in range(rows):
+        padded = np.concatenate(([False], mask[r], [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        for c0, c1 in zip(edges[::2], edges[1::2] - 1):
+            for reg in regions:
+                if reg[3] >= r - 1 and reg[0] <= c1 + 1 and c0 - 1 <= reg[2]:
+                    reg[0], reg[2], reg[3] = min(reg[0], c0), max(reg[2], c1), r
+                    break
+            else:
+                regions.append([int(c0), r, int(c1), r])
+
+    sx, sy = src_w / g.shape[1], src_h / g.shape[0]
+    boxes = [
+        (
+            max(0, int((c0 - pad) * cell * sx)),
+            max(0, int((r0 - pad) * cell * sy)),
+            min(src_w, int((c1 + 1 + pad) * cell * sx)),
+            min(src_h, int((r1 + 1 + pad) * cell * sy)),
+        )
+        for c0, r0, c1, r1 in regions
+    ]
+    return TextScore(1.0 - float(np.exp(-n_cells / 8.0)), boxes)
+
+
+def _to_image(frame: Frame) -> Image.Image:
+    if isinstance(frame, Image.Image):
+        return frame
+    if isinstance(frame, np.ndarray):
+        return Image.fromarray(frame)
+    img = Image.open(frame)
+    img.load()  # reads pixels and releases the file handle
+    return img
+
+
+def gray_array(frame: Frame, size: Optional[tuple[int, int]] = None) -> np.ndarray:
+    """Grayscale uint8 array of a frame, optionally resized to (width, height)."""
+    img = _to_image(frame).convert("L")
+    if size is not None:
+        img = img.resize(size, Image.BILINEAR)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def encode_png(frame: Frame, box: Optional[tuple[int, int, int, int]] = None) -> bytes:
+    img = _to_image(frame)
+    if box is not None:
+        img = img.crop(box)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# ---- upload preparation ----------------------------------------------------------
+
+def border_box(gray: np.ndarray, *, black: int = 24, margin: int = 8) -> Optional[Box]:
+    """
+    Bounding box of everything brighter than `black` (letterbox/pillarbox bars and
+    the empty black around credits fall outside), grown by `margin` px. None when
+    the frame is all black or nothing would be cut.
+    """
+    lit = gray > black
+    rows, cols = np.flatnonzero(lit.any(axis=1)), np.flatnonzero(lit.any(axis=0))
+    if not rows.size or not cols.size:
+        return None
+    h, w = gray.shape
+    box = (
+        max(0, int(cols[0]) - margin), max(0, int(rows[0]) - margin),
+        min(w, int(cols[-1]) + 1 + margin), min(h, int(rows[-1]) + 1 + margin),
+    )
+    return None if box == (0, 0, w, h) else box
+
+
+def text_line_height(gray: np.ndarray, *, min_rows: int = 3, max_frac: float = 0.15) -> Optional[int]:
+    """
+    Median height in px of the text lines in a grayscale frame: rows holding ink
+    (pixels on the far side of the midpoint between background and brightest
+    detail) form bands, one per line. Bands taller than `max_frac` of the frame
+    are scenery, not text. None when no bands are found.
+    """
+    lo, hi = float(np.percentile(gray, 5)), float(gray.max())
+    if hi - lo < 40:
+        return None
+    mid = (lo + hi) / 2
+    ink = gray > mid if np.median(gray) < mid else gray < mid
+    inked = np.concatenate(([False], ink.mean(axis=1) > 0.002, [False]))
+    edges = np.flatnonzero(inked[1:] != inked[:-1])
+    tallest = gray.shape[0] * max_frac
+    heights = [int(b - a) for a, b in zip(edges[::2], edges[1::2]) if min_rows <= b - a <= tallest]
+    return int(np.median(heights)) if heights else None
+
+
+def prepare_upload(
+    frame: Frame,
+    box: Optional[Box] = None,
+    *,
+    grayscale: bool = False,
+    crop_borders: bool = False,
+    text_height: int = 0,
+    fmt: str = "png",
+    quality: int = 90,
+) -> tuple[bytes, str]:
+    """
+    Encode a frame for OCR upload; returns (bytes, mime type).
+
+    Applied in order: crop to `box`, crop black borders, convert to grayscale,
+    downscale so text lines are about `text_height` px tall (never upscales;
+    0 disables), then encode as `fmt` ("png", "jpeg" or "webp") at `quality`.
+    """
+    img = _to_image(frame)
+    if box is not None:
+        img = img.crop(box)
+    gray = None
+    if crop_borders or text_height > 0:
+        gray = np.asarray(img.convert("L"))
+    if crop_borders:
+        border = border_box(gray)
+        if border is not None:
+            img = img.crop(border)
+            l, t, r, b = border
+            gray = gray[t:b, l:r]
+    if grayscale:
+        img = img.convert("L")
+    if text_height > 0:
+        line = text_line_height(gray)
+        if line and line > text_height:
+            scale = max(text_height / line, 64 / min(img.size))
+            if scale < 1.0:
+                img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+
+    pil_fmt, mime = UPLOAD_FORMATS[fmt]
+    if pil_fmt == "JPEG" and img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    if pil_fmt == "PNG":
+        img.save(buf, format="PNG")
+    else:
+        img.save(buf, format=pil_fmt, quality=quality)
+    return buf.getvalue(), mime
+
+
+# ---- perceptual hashing ----------------------------------------------------------
+
+def dhash(frame: Frame, hash_size: int = 32) -> int:
+    """
+    Difference hash: sign of horizontal gradients over a (hash_size+1)×hash_size
+    thumbnail, packed into a hash_size² bit int. Robust to compression noise and
+    small brightness shifts. Credit cards share layouts, so the default grid is
+    finer than the usual 8×8: different names on the same layout differ by ~30
+    bits at 32×32, re-encoded copies of one card by < 10.
+    """
+    px = gray_array(frame, (hash_size + 1, hash_size)).astype(np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def vertical_shift(
+    prev: np.ndarray,
+    cur: np.ndarray,
+    *,
+    max_err: float = 6.0,
+    min_shift: int = 2,
+    max_ratio: float = 0.5,
+) -> int:
+    """
+    Estimate how many rows `cur` scrolled *up* relative to `prev` (both grayscale
+    thumbnails of equal shape). Returns 0 when no shift explains the change better
+    than the frames being unrelated (shifted error above `max_ratio` times the
+    unshifted one).
+    """
+    if prev.shape != cur.shape:
+        return 0
+    h = prev.shape[0]
+    a = prev.astype(np.float32)
+    b = cur.astype(np.float32)
+    still = float(np.abs(a - b).mean())
+
+    best_shift, best_err = 0, still
+    for s in range(min_shift, int(h * 0.7)):  # keep ≥30% of rows overlapping
+        err = float(np.abs(a[s:] - b[: h - s]).mean())
+        if err < best_err:
+            best_shift, best_err = s, err
+    if best_shift and best_err <= max_err and best_err < still * max_ratio:
+        return best_shift
+    return 0
+
+
+@dataclass(slots=True)
+class DedupDecision:
+    skip: bool
+    box: Optional[tuple[int, int, int, int]] = None   # crop to send instead of the full frame
+
+
+@dataclass(slots=True)
+class FrameDeduper:
+    """
+    Per-video filter in front of OCR:
+
+    - skip frames whose dHash is within `max_distance` bits of a frame already sent
+      (static cards, slow crawls);
+    - for scrolling credits, detect the vertical shift against the last frame sent
+      and crop to the newly revealed strip (plus `overlap` of context).
+
+    `max_distance < 0` disables hashing; `scroll_crop=False` disables cropping.
+    """
+    max_distance: int = 12
+    scroll_crop: bool = True
+    hash_size: int = 32
+    overlap: float = 0.1        # fraction of frame height kept above the new strip
+    max_strip: float = 0.6      # only crop when the new strip is at most this tall
+    thumb: tuple[int, int] = (64, 180)
+    skipped: int = 0
+    cropped: int = 0
+    _hashes: list[int] = field(default_factory=list)
+    _last: Optional[np.ndarray] = None
+
+    def check(self, frame: Frame) -> DedupDecision:
+        img = _to_image(frame)
+        if self.max_distance >= 0:
+            h = dhash(img, self.hash_size)
+            if any(hamming(h, seen) <= self.max_distance for seen in self._hashes):
+                self.skipped += 1
+                return DedupDecision(skip=True)
+            self._hashes.append(h)
+
+        box = None
+        if self.scroll_crop:
+            thumb = gray_array(img, self.thumb)
+            if self._last is not None:
+                shift = vertical_shift(self._last, thumb)
+                if shift:
+                    width, height = img.size
+                    frac = shift / thumb.shape[0] + self.overlap
+                    if frac <= self.max_strip:
+                        top = max(0, int(height * (1.0 - frac)))
+                        box = (0, top, width, height)
+                        self.cropped += 1
+            self._last = thumb
+        return DedupDecision(skip=False, box=box)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+def connect(path: Path, schema: str = "") -> sqlite3.Connection:
+    """
+    Autocommit connection tuned for several threads/processes sharing one file:
+    WAL journal, relaxed fsync and a generous busy timeout. Callers serialize
+    use of the returned connection with their own lock.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    if schema:
+        db.executescript(schema)
+    return db
@@ -0,0 +1,339 @@
+"""
+`rlcl watch`: one long-lived run over an ingest directory.
+
+A cron-driven `rlcl run` pays for interpreter startup, the Gemini client and a
+full directory listing on every tick, and a dropped file waits for the next
+tick. Here a single `process_media_directory` call stays up instead: its
+client, rate limiter, OCR cache, title index and pipeline worker threads are
+created once, and `Watcher.paths()` feeds it files as they finish copying.
+
+A file is handed over once its (size, mtime) has held still for
+`WatchConfig.settle_sec`, so half-written copies are never read. On Linux
+inotify wakes the watcher as soon as something lands; elsewhere (or with
+`inotify=False`) the tree is rescanned every `poll_sec`.
+
+The first SIGINT/SIGTERM stops feeding new files and lets the ones in flight
+finish and rename; a second one aborts, leaving their progress in the journal
+for the next start. Queue depth and drop-to-rename latency are exported as
+`watch_files{state}` and `watch_latency_seconds` (see rollcall/logging.py),
+refreshed in the Prometheus textfile while running.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .config import MetricsConfig, ScanConfig, SeriesConfig, WatchConfig
+from .logging import metrics, write_prometheus
+from .scanner import iter_media
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then `len` bytes of name
+
+
+class _Inotify:
+    """Minimal inotify through ctypes. Events only wake the watcher; a rescan decides what changed."""
+
+    MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, Path] = {}
+
+    def add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def read(self) -> list[Path]:
+        """Drain pending events; returns directories created (or moved in) since the last read."""
+        created: list[Path] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return created
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size: offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_ISDIR and wd in self._dirs and name:
+                    created.append(self._dirs[wd] / os.fsdecode(name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def open_inotify() -> Optional[_Inotify]:
+    """An inotify instance, or None where it is unavailable (non-Linux, limits reached)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify()
+    except (OSError, AttributeError):
+        return None
+
+
+class Watcher:
+    """
+    Finds media files under `root` that have stopped changing and yields each
+    once from `paths()`. A file is offered again only if it changes after being
+    handed over; `done()` records the outcome (and the renamed path, which must
+    not be picked up as a new arrival).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        cfg: Optional[WatchConfig] = None,
+        scan_cfg: Optional[ScanConfig] = None,
+        *,
+        prometheus_path: Optional[Path] = None,
+        verbose: bool = True,
+    ):
+        self.root = root
+        self.cfg = cfg or WatchConfig()
+        self.scan_cfg = scan_cfg or ScanConfig()
+        self.prometheus_path = prometheus_path
+        self.verbose = verbose
+        self.inotify = False  # set by paths(): whether inotify could be used
+        self._settling: dict[Path, tuple[tuple[int, int], float, float]] = {}  # sig, stable since, first seen
+        self._fed: dict[Path, tuple[int, int]] = {}  # handed over at this (size, mtime_ns)
+        self._first_seen: dict[Path, float] = {}  # in the pipeline: when the file was first seen
+        self._settled_first_seen: dict[Path, float] = {}  # settled this scan, not yet yielded
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+
+    # ---- control (any thread) --------------------------------------------------
+
+    def stop(self) -> None:
+        """Stop offering files; `paths()` returns and the pipeline drains."""
+        self._stop.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._first_seen)
+
+    def done(self, row: dict) -> None:
+        """`process_media_directory` on_file hook: a file left the pipeline."""
+        path = Path(row["path"])
+        with self._lock:
+            first = self._first_seen.pop(path, None)
+            renamed = row.get("renamed_to")
+            if renamed and _moved(path, Path(renamed)):
+                # the new name is our own output, not an arrival
+                self._fed.pop(path, None)
+                self._fed[Path(renamed)] = _signature(Path(renamed)) or (0, 0)
+            # else unchanged, or only planned (--dry-run): _fed[path] keeps it from being offered again
+        if first is not None and row["outcome"] != "elsewhere":  # "elsewhere": another worker holds it (--queue)
+            latency = time.time() - first
+            metrics.observe("watch_latency_seconds", latency)
+            if self.verbose:
+                print(f"  Drop to {row['outcome']} in {latency:.1f}s.")
+        self._publish()
+
+    # ---- feed (pipeline feeder thread) ---------------------------------------------
+
+    def paths(self) -> Iterator[Path]:
+        """Blocking feed for `process_media_directory(paths=...)`; ends after `stop()`."""
+        notify = open_inotify() if self.cfg.inotify else None
+        self.inotify = notify is not None
+        if self.cfg.inotify and notify is None and self.verbose:
+            print(f"[watch] inotify unavailable; polling every {self.cfg.poll_sec:g}s.")
+        try:
+            if notify is not None:
+                self._watch_tree(notify, self.root)
+            last_scan = 0.0
+            while not self._stop.is_set():
+                last_scan = time.monotonic()
+                for path in self._scan():
+                    if self._stop.is_set():
+                        return
+                    with self._lock:
+                        self._first_seen[path] = self._settled_first_seen.pop(path)
+                    self._publish()
+                    yield path
+                timeout = self._next_deadline()
+                if notify is None:
+                    timeout = min(timeout, self.cfg.poll_sec)
+                else:
+                    timeout = min(timeout, max(0.0, last_scan + self.cfg.rescan_sec - time.monotonic()))
+                self._wait(notify, timeout)
+        finally:
+            if notify is not None:
+                notify.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+    def _watch_tree(self, notify: _Inotify, top: Path) -> None:
+        notify.add(top)
+        if not self.scan_cfg.recursive:
+            return
+        for dirpath, dirnames, _ in os.walk(top, followlinks=self.scan_cfg.follow_symlinks):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for d in dirnames:
+                notify.add(Path(dirpath) / d)
+
+    def _wait(self, notify: Optional[_Inotify], timeout: float) -> None:
+        fds = [self._wake_r] + ([notify.fd] if notify is not None else [])
+        ready, _, _ = select.select(fds, [], [], max(0.0, timeout))
+        if notify is not None and notify.fd in ready:
+            for d in notify.read():
+                self._watch_tree(notify, d)
+            time.sleep(0.05)  # let a burst of events (a copy starting) coalesce into one rescan
+
+    def _scan(self) -> list[Path]:
+        """One pass over the tree: update settle state, return files that just settled."""
+        now = time.time()
+        settle = self.cfg.settle_sec
+        confirm = min(settle, self.cfg.poll_sec)
+        ready: list[Path] = []
+        present: set[Path] = set()
+        for path in iter_media(self.root, self.scan_cfg):
+            present.add(path)
+            sig = _signature(path)
+            if sig is None:
+                continue
+            with self._lock:
+                if self._fed.get(path) == sig or path in self._first_seen:
+                    self._settling.pop(path, None)
+                    continue
+            seen = self._settling.get(path)
+            if seen is None or seen[0] != sig:
+                first = seen[2] if seen else now
+                if seen is None and sig[1] / 1e9 <= now - settle:
+                    since = now - settle + confirm  # already old: one more look and it is ready
+                else:
+                    since = now
+                self._settling[path] = (sig, since, first)
+                continue
+            if now - seen[1] >= settle and sig[0] > 0:
+                del self._settling[path]
+                with self._lock:
+                    self._fed[path] = sig
+                self._settled_first_seen[path] = seen[2]
+                ready.append(path)
+        for path in [p for p in self._settling if p not in present]:
+            del self._settling[path]  # deleted or renamed away while settling
+        with self._lock:
+            for path in [p for p in self._fed if p not in present and p not in self._first_seen]:
+                del self._fed[path]
+        return ready
+
+    def _next_deadline(self) -> float:
+        """Seconds until the next settling file could be ready (a long wait when none are)."""
+        if not self._settling:
+            return 3600.0
+        now = time.time()
+        return max(0.05, min(since + self.cfg.settle_sec - now for _, since, _ in self._settling.values()))
+
+    def _publish(self) -> None:
+        metrics.set("watch_files", len(self._settling), state="settling")
+        metrics.set("watch_files", self.in_flight, state="pipeline")
+        if self.prometheus_path:
+            try:
+                write_prometheus(self.prometheus_path)
+            except OSError as e:
+                print(f"[watch] Could not write {self.prometheus_path}: {e}")
+
+
+def _signature(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _moved(src: Path, dst: Path) -> bool:
+    """Whether `src` now lives at `dst`; False for a dry-run rename, which leaves `src` in place."""
+    if not os.path.lexists(src):
+        return True
+    try:
+        return os.path.samefile(src, dst)  # a case-only rename on a case-insensitive filesystem
+    except OSError:
+        return False
+
+
+def watch_directory(
+    directory: Path,
+    *,
+    watch_cfg: Optional[WatchConfig] = None,
+    scan_cfg: Optional[ScanConfig] = None,
+    metrics_cfg: Optional[MetricsConfig] = None,
+    series_cfg: Optional[SeriesConfig] = None,
+    verbose: bool = True,
+    **run_kwargs: Any,
+) -> None:
+    """
+    Run `process_media_directory` over `directory` until SIGINT/SIGTERM,
+    feeding it files as they settle. `run_kwargs` are passed through
+    (api_key, ocr_cfg, gemini_cfg, pipeline_cfg, cache_cfg, ...).
+
+    Series matching still applies, but grouped episode resolution waits for the
+    end of a run and so is turned off here.
+    """
+    from .core import process_media_directory
+
+    metrics_cfg = metrics_cfg or MetricsConfig()
+    series_cfg = series_cfg or SeriesConfig()
+    if series_cfg.group_episodes:
+        series_cfg.group_episodes = False
+        print("[watch] --group-episodes needs the end of a run; files are placed one by one.")
+    watcher = Watcher(
+        directory, watch_cfg, scan_cfg, prometheus_path=metrics_cfg.prometheus_path, verbose=verbose,
+    )
+
+    def on_signal(signum, frame):
+        if watcher.stopping:
+            raise KeyboardInterrupt
+        print(f"\n[watch] Stopping: finishing {watcher.in_flight} file(s) in flight (signal again to abort).")
+        watcher.stop()
+
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous[sig] = signal.signal(sig, on_signal)
+    try:
+        if verbose:
+            print(f"[watch] Watching {directory} (settle {watcher.cfg.settle_sec:g}s); Ctrl-C to stop.")
+        process_media_directory(
+            directory,
+            scan_cfg=scan_cfg,
+            metrics_cfg=metrics_cfg,
+            series_cfg=series_cfg,
+            verbose=verbose,
+            paths=watcher.paths(),
+            on_file=watcher.done,
+            **run_kwargs,
+        )
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
@@ -0,0 +1,414 @@
+"""
+Several rlcl processes, on one host or many, sharing one library (`--queue`).
+
+Workers coordinate through plain files under `<library>/.rollcall-queue`, so
+any mount of the library works (NFS, SMB) with no server to run. SQLite is
+kept out of the shared part: its locking is unreliable on network filesystems.
+
+- leases/<kk>/<key>.json: a file being processed. Created with O_EXCL, so of
+  two workers reaching a file only one gets it. The owner touches it every
+  `heartbeat_sec`; one left untouched for `lease_sec` belonged to a worker
+  that died and is taken over (renamed aside first, so one taker wins).
+- done/<kk>/<key>.json: a finished file (outcome, guess, new name), checked
+  before and again after taking its lease. A renamed file is recorded under
+  its new name.
+- workers/<worker>.json: each worker's heartbeat and counters (`rlcl status`).
+- journals/<host>.sqlite3: the resume journal, one per host.
+
+`key` hashes the path relative to the library, so hosts agree on it whatever
+their mount point. Ages are measured on the share's clock (the mtime of a
+file just written), so clock skew between hosts does not expire live leases.
+
+A worker that loses a lease (stalled past `lease_sec`) does not rename the
+file. A file taken over from a dead worker restarts OCR, since that worker's
+journal belongs to its host. Failed files are left for the next run rather
+than retried by the other workers of this one.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from .config import QueueConfig
+from .logging import metrics
+from .utils.fs_utils import rename_noreplace
+
+QUEUE_DIR = ".rollcall-queue"
+
+# try_claim results
+CLAIMED = "claimed"
+DONE = "done"        # finished by some worker (this run, or an earlier one)
+BUSY = "busy"        # leased by a live worker
+GONE = "gone"        # renamed or deleted since it was listed
+
+
+def file_key(library: Path, path: Path) -> str:
+    """Queue key of a media file: a hash of its path relative to the library."""
+    rel = os.path.relpath(path, library).replace(os.sep, "/")
+    return hashlib.blake2b(rel.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def _signature(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _read(path: Path) -> dict:
+    """A queue record, {} when missing or half-written."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def share_clock(root: Path) -> float:
+    """Seconds to add to time.time() to get the share's clock (0 if it can't be written)."""
+    probe = root / f".clock-{os.getpid()}-{threading.get_ident()}"
+    try:
+        probe.write_bytes(b"")
+        skew = probe.stat().st_mtime - time.time()
+        probe.unlink()
+        return skew
+    except OSError:
+        return 0.0
+
+
+class WorkQueue:
+    """
+    This process's view of a shared library's queue. `claim()` filters the
+    scan down to files this worker now holds; `finish()` records each one's
+    outcome and lets go of it. A daemon thread renews held leases.
+    """
+
+    def __init__(self, library: Path, cfg: Optional[QueueConfig] = None, *, dry_run: bool = False):
+        self.library = library
+        self.cfg = cfg or QueueConfig()
+        self.root = library / QUEUE_DIR
+        self.host = socket.gethostname()
+        self.worker = self.cfg.worker or f"{self.host}-{os.getpid()}"
+        self.token = os.urandom(8).hex()
+        self.dry_run = dry_run
+        self.counts: Counter[str] = Counter()
+        self._held: dict[Path, Path] = {}   # media path -> its lease file
+        self._lost: set[Path] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for sub in ("leases", "done", "workers", "journals"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+        self._skew = share_clock(self.root)
+        self.started = self.now()
+        self._beat("running")
+        self._thread = threading.Thread(target=self._heartbeats, name="rollcall-queue", daemon=True)
+        self._thread.start()
+
+    @property
+    def journal_path(self) -> Path:
+        return self.root / "journals" / f"{_safe_name(self.host)}.sqlite3"
+
+    def now(self) -> float:
+        return time.time() + self._skew
+
+    def key(self, path: Path) -> str:
+        return file_key(self.library, path)
+
+    def _file(self, kind: str, key: str) -> Path:
+        return self.root / kind / key[:2] / f"{key}.json"
+
+    # ---- claiming ----------------------------------------------------------------
+
+    def claim(self, paths: Iterable[Path], *, on_skip: Optional[Callable[[Path], None]] = None) -> Iterator[Path]:
+        """
+        The files of `paths` this worker got a lease on, lazily. With
+        `QueueConfig.wait`, files other workers held are retried once `paths`
+        is exhausted, until each is finished or taken over. `on_skip` is
+        called with each file the scan passes over.
+        """
+        waiting: list[Path] = []
+        for path in paths:
+            state = self.try_claim(path)
+            if state == CLAIMED:
+                yield path
+                continue
+            if state == BUSY:
+                waiting.append(path)
+            if on_skip is not None:
+                on_skip(path)
+        if not self.cfg.wait or not waiting:
+            return
+        print(f"[queue] Scan done; waiting on {len(waiting)} file(s) leased by other workers.")
+        while waiting and not self._stop.wait(self.cfg.heartbeat_sec):
+            busy = []
+            for path in waiting:
+                state = self.try_claim(path)
+                if state == CLAIMED:
+                    yield path
+                elif state == BUSY:
+                    busy.append(path)
+            waiting = busy
+
+    def try_claim(self, path: Path) -> str:
+        """Take the lease on `path` if nobody holds it; returns CLAIMED, DONE, BUSY or GONE."""
+        sig = _signature(path)
+        if sig is None:
+            return GONE
+        key = self.key(path)
+        if self._done(key, sig):
+            metrics.inc("queue_leases_total", outcome="done")
+            return DONE
+        lease = self._file("leases", key)
+        lease.parent.mkdir(exist_ok=True)
+        reclaimed, info = False, {}
+        if not self._create(lease, path):
+            info, mtime = _read(lease), _mtime(lease)
+            if mtime is not None and self.now() - mtime < info.get("lease_sec", self.cfg.lease_sec):
+                metrics.inc("queue_leases_total", outcome="busy")
+                return BUSY
+            # expired (or released just now): move it aside, so one worker wins the takeover
+            if mtime is not None and not self._take_over(lease, info.get("lease_sec", self.cfg.lease_sec)):
+                return BUSY
+            if not self._create(lease, path):
+                return BUSY
+            reclaimed = mtime is not None
+        if self._done(key, sig):  # finished while we were looking
+            self._unlink_own(lease)
+            return DONE
+        with self._lock:
+            self._held[path] = lease
+        outcome = "reclaimed" if reclaimed else "claimed"
+        self.counts[outcome] += 1
+        metrics.inc("queue_leases_total", outcome=outcome)
+        if reclaimed:
+            print(f"[queue] Took over {path.name} from {info.get('worker', 'an unknown worker')} (lease expired).")
+        return CLAIMED
+
+    def _done(self, key: str, sig: tuple[int, int]) -> bool:
+        rec = _read(self._file("done", key))
+        if not rec or (rec.get("size"), rec.get("mtime_ns")) != sig:
+            return False  # never finished, or replaced since
+        if rec.get("dry_run") and not self.dry_run:
+            return False  # a plan, not a rename
+        # failures and untitled files are final for this run's workers only; the next run retries them
+        retry = rec.get("outcome") == "failed" or (
+            rec.get("outcome") == "unchanged" and rec.get("guess") in (None, "", "UNKNOWN_TITLE"))
+        return not retry or rec.get("finished", 0) >= self.started
+
+    def _create(self, lease: Path, path: Path) -> bool:
+        try:
+            fd = os.open(lease, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                "path": os.path.relpath(path, self.library), "worker": self.worker, "host": self.host,
+                "pid": os.getpid(), "token": self.token, "lease_sec": self.cfg.lease_sec, "acquired": self.now(),
+            }, f)
+        return True
+
+    def _take_over(self, lease: Path, lease_sec: float) -> bool:
+        aside = lease.with_name(f"{lease.name}.{self.token}.stale")
+        try:
+            os.rename(lease, aside)
+        except FileNotFoundError:
+            return False  # another worker took it first
+        mtime = _mtime(aside)
+        if mtime is not None and self.now() - mtime < lease_sec:
+            # renewed between our look and the rename: hand it back
+            try:
+                rename_noreplace(aside, lease)
+                return False
+            except OSError:
+                pass
+        try:
+            aside.unlink()
+        except OSError:
+            pass
+        return True
+
+    # ---- holding -----------------------------------------------------------------
+
+    def held(self, path: Path) -> bool:
+        """Whether this worker still holds `path` (check right before renaming it)."""
+        with self._lock:
+            lease = self._held.get(path)
+        return lease is not None and _read(lease).get("token") == self.token
+
+    def finish(self, path: Path, outcome: str, *, guess: Optional[str] = None, renamed_to: Optional[Path] = None) -> None:
+        """Record `path` as finished (under `renamed_to` if it moved) and drop its lease."""
+        with self._lock:
+            lease = self._held.pop(path, None)
+            self._lost.discard(path)
+        if lease is None:
+            return
+        self.counts[outcome] += 1
+        if outcome != "lease_lost":
+            final = renamed_to if renamed_to is not None and not self.dry_run else path
+            sig = _signature(final)
+            if sig is not None:
+                done = self._file("done", self.key(final))
+                done.parent.mkdir(exist_ok=True)
+                self._write(done, {
+                    "path": os.path.relpath(path, self.library),
+                    "renamed_to": os.path.relpath(renamed_to, self.library) if renamed_to else None,
+                    "outcome": outcome, "guess": guess, "size": sig[0], "mtime_ns": sig[1],
+                    "worker": self.worker, "finished": self.now(), "dry_run": self.dry_run,
+                })
+        self._unlink_own(lease)
+
+    def _unlink_own(self, lease: Path) -> None:
+        if _read(lease).get("token") == self.token:
+            try:
+                lease.unlink()
+            except OSError:
+                pass
+
+    def _write(self, path: Path, data: dict) -> None:
+        tmp = path.with_name(f".{path.name}.{self.token}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+    # ---- heartbeats ----------------------------------------------------------------
+
+    def _heartbeats(self) -> None:
+        while not self._stop.wait(self.cfg.heartbeat_sec):
+            with self._lock:
+                held = list(self._held.items())
+            for path, lease in held:
+                if path in self._lost:
+                    continue
+                if _read(lease).get("token") == self.token:
+                    try:
+                        os.utime(lease)  # no times: NFS sets the server's
+                    except OSError as e:
+                        print(f"[queue] Could not renew the lease on {path.name}: {e}")
+                    continue
+                with self._lock:
+                    self._lost.add(path)
+                metrics.inc("queue_leases_total", outcome="lost")
+                print(f"[queue] Lost the lease on {path.name}; another worker took it over.")
+            try:
+                self._beat("running")
+            except OSError as e:
+                print(f"[queue] Heartbeat failed: {e}")
+
+    def _beat(self, state: str) -> None:
+        path = self.root / "workers" / f"{_safe_name(self.worker)}.json"
+        with self._lock:
+            leases = len(self._held) - len(self._lost)
+        self._write(path, {
+            "worker": self.worker, "host": self.host, "pid": os.getpid(), "state": state,
+            "started": self.started, "lease_sec": self.cfg.lease_sec, "leases": leases,
+            "counts": dict(self.counts), "dry_run": self.dry_run,
+        })
+        mtime = _mtime(path)
+        if mtime is not None:
+            self._skew = mtime - time.time()
+
+    def close(self) -> None:
+        """Stop renewing; release leases still held so other workers can pick them up now."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            held, self._held = list(self._held.values()), {}
+        for lease in held:
+            self._unlink_own(lease)
+        try:
+            self._beat("exited")
+        except OSError:
+            pass
+
+
+# ---- progress view ---------------------------------------------------------------------
+
+@dataclass(slots=True)
+class WorkerStatus:
+    worker: str
+    host: str
+    pid: int
+    state: str           # running | exited | dead (no heartbeat for lease_sec)
+    heartbeat_age: float
+    leases: int
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class LeaseStatus:
+    path: str
+    worker: str
+    age: float
+    expired: bool
+
+
+@dataclass(slots=True)
+class QueueStatus:
+    workers: list[WorkerStatus]
+    leases: list[LeaseStatus]
+    done: set[str]             # keys
+    leased: set[str]           # keys
+
+
+def _records(directory: Path) -> Iterator[Path]:
+    try:
+        shards = sorted(os.scandir(directory), key=lambda e: e.name)
+    except OSError:
+        return
+    for shard in shards:
+        if not shard.is_dir():
+            continue
+        with os.scandir(shard.path) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and not entry.name.startswith("."):
+                    yield Path(entry.path)
+
+
+def queue_status(library: Path) -> QueueStatus:
+    """Workers, live and expired leases, and finished files, from the files under QUEUE_DIR."""
+    root = library / QUEUE_DIR
+    now = time.time() + share_clock(root)
+    workers = []
+    for path in sorted((root / "workers").glob("*.json")):
+        rec, mtime = _read(path), _mtime(path)
+        if not rec or mtime is None:
+            continue
+        age = now - mtime
+        state = rec.get("state", "running")
+        if state == "running" and age > rec.get("lease_sec", QueueConfig().lease_sec):
+            state = "dead"
+        workers.append(WorkerStatus(
+            rec.get("worker", path.stem), rec.get("host", "?"), rec.get("pid", 0), state, age,
+            rec.get("leases", 0) if state == "running" else 0, rec.get("counts", {}),
+        ))
+    leases, leased = [], set()
+    for path in _records(root / "leases"):
+        rec, mtime = _read(path), _mtime(path)
+        if mtime is None:
+            continue
+        age = now - mtime
+        leased.add(path.stem)
+        leases.append(LeaseStatus(
+            rec.get("path", path.stem), rec.get("worker", "?"), age, age >= rec.get("lease_sec", QueueConfig().lease_sec),
+        ))
+    done = {path.stem for path in _records(root / "done")}
+    return QueueStatus(workers, leases, done, leased)
@@ -0,0 +1,66 @@
+import errno
+import os
+
+import pytest
+
+from rollcall.utils import fs_utils
+
+
+@pytest.fixture(params=["renameat2", "link"])
+def strategy(request, monkeypatch):
+    if request.param == "link":
+        monkeypatch.setattr(fs_utils, "_renameat2", False)
+    return request.param
+
+
+def test_rename(tmp_path, strategy):
+    src, dst = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    src.write_bytes(b"media")
+    fs_utils.rename_noreplace(src, dst)
+    assert not src.exists() and dst.read_bytes() == b"media"
+
+
+def test_existing_target_is_not_replaced(tmp_path, strategy):
+    src, dst = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    src.write_bytes(b"a")
+    dst.write_bytes(b"b")
+    with pytest.raises(FileExistsError):
+        fs_utils.rename_noreplace(src, dst)
+    assert src.read_bytes() == b"a" and dst.read_bytes() == b"b"
+
+
+def test_interrupted_link_unlink_completes(tmp_path, strategy):
+    src, dst = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    src.write_bytes(b"media")
+    os.link(src, dst)
+    fs_utils.rename_noreplace(src, dst)
+    assert not src.exists() and dst.read_bytes() == b"media"
+
+
+def test_case_only_rename_on_case_insensitive_fs_keeps_the_file(tmp_path, monkeypatch):
+    src, dst = tmp_path / "show.mkv", tmp_path / "Show.mkv"
+    src.write_bytes(b"media")
+
+    # what a case-insensitive filesystem reports: the new spelling exists, and it is src itself
+    def exists(a, b):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(b))
+
+    monkeypatch.setattr(fs_utils, "_rename_noreplace", exists)
+    monkeypatch.setattr(fs_utils.os.path, "samefile", lambda a, b: True)
+    fs_utils.rename_noreplace(src, dst)
+    assert dst.read_bytes() == b"media"
+    assert os.listdir(tmp_path) == ["Show.mkv"]
+
+
+def test_same_file_under_another_name_with_one_link_is_refused(tmp_path, monkeypatch):
+    src, dst = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    src.write_bytes(b"media")
+
+    def exists(a, b):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(b))
+
+    monkeypatch.setattr(fs_utils, "_rename_noreplace", exists)
+    monkeypatch.setattr(fs_utils.os.path, "samefile", lambda a, b: True)
+    with pytest.raises(FileExistsError):
+        fs_utils.rename_noreplace(src, dst)
+    assert src.read_bytes() == b"media"
@@ -0,0 +1,22 @@
+import pytest
+
+from rollcall.config import MetadataConfig
+from rollcall.metadata import enough_credits, parse_credit_lines
+
+
+@pytest.mark.parametrize("line", ["I Know Who You Are", "Where Are You Now", "Take Me To The River"])
+def test_title_case_dialogue_is_not_a_name(line):
+    assert parse_credit_lines(["Cast", line]) == ([], 1)
+
+
+def test_names_under_a_heading():
+    rows, unparsed = parse_credit_lines(["Cast", "Will Smith", "Courtney Love", "Directed by I. M. Pei"])
+    assert rows == [("Cast", ["Will Smith"]), ("Cast", ["Courtney Love"]), ("Directed by", ["I. M. Pei"])]
+    assert unparsed == 0
+
+
+def test_enough_credits_needs_names_under_several_headings():
+    cfg = MetadataConfig()
+    assert not enough_credits({"Directed by": {"Jane Doe"}, "Cast": {"John Roe"}}, cfg)
+    assert not enough_credits({"Cast": {"A Bee", "C Dee", "E Eff", "G Aitch"}}, cfg)
+    assert enough_credits({"Directed by": {"Jane Doe"}, "Starring": {"A Bee", "C Dee", "E Eff"}}, cfg)
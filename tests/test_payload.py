@@ -0,0 +1,38 @@
+import pytest
+
+from rollcall.payload import canonical_map, merge_names
+
+
+@pytest.mark.parametrize("values", [
+    ["Season 1 Episode 4", "Season 1 Episode 5"],
+    ["Episode 11", "Episode 12"],
+    ["Unit 1 Camera 1992", "Unit 1 Camera 1993"],
+])
+def test_values_with_different_digits_stay_apart(values):
+    assert merge_names(values) == sorted(values)
+
+
+def test_different_people_stay_apart():
+    assert merge_names(["Sarah Jones", "Sara Jones"]) == ["Sara Jones", "Sarah Jones"]
+    assert merge_names(["John Doe", "Joan Doe"]) == ["Joan Doe", "John Doe"]
+
+
+def test_rn_read_as_m_keeps_the_correct_spelling():
+    assert merge_names(["Bernard Herrmann", "Bemard Herrmann"]) == ["Bernard Herrmann"]
+    assert merge_names(["Bemard Herrmann", "Bernard Herrmann"]) == ["Bernard Herrmann"]
+
+
+def test_ocr_variants_merge():
+    assert merge_names(["Jane Doe", "JANE DOE", "Jane D0e", "Jane  Doe"]) == ["Jane Doe"]
+    assert len(merge_names(["Jennifer Lopez", "Jennifer Lopcz"])) == 1
+
+
+def test_title_and_copyright_are_not_merged():
+    canon = canonical_map({
+        "TITLE": ["Episode 11", "Episode 1l"],
+        "Copyright": ["© 2019 Acme Films", "© 2019 ACME FILMS"],
+        "Directed by": ["Jane Doe", "JANE DOE"],
+    })
+    assert canon["Title"] == ["Episode 11", "Episode 1l"]
+    assert canon["Copyright"] == ["© 2019 ACME FILMS", "© 2019 Acme Films"]
+    assert canon["Directed by"] == ["Jane Doe"]
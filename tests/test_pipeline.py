@@ -0,0 +1,26 @@
+import threading
+
+from rollcall.pipeline import Stage, run_pipeline
+
+
+def _held_until(release: threading.Event):
+    def fn(item):
+        if item == 0:
+            assert release.wait(5)
+    return fn
+
+
+def test_ordered_by_default():
+    out = [item for item, err in run_pipeline(range(6), [Stage("s", lambda x: None, workers=3)])]
+    assert out == list(range(6))
+
+
+def test_unordered_does_not_wait_for_a_slow_item():
+    release = threading.Event()
+    seen = []
+    for item, err in run_pipeline(range(4), [Stage("s", _held_until(release), workers=2)], ordered=False):
+        assert err is None
+        seen.append(item)
+        if len(seen) == 3:
+            release.set()  # only reached if 1-3 came out while 0 was still running
+    assert seen == [1, 2, 3, 0]
@@ -0,0 +1,39 @@
+import pytest
+
+from rollcall.title_index import TitleIndex, build_index
+
+PEOPLE = {"nm1": "Dora Director", "nm2": "Arlo Actor", "nm3": "Wendy Writer"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    # seven films credit all three people; "Quiet Harbor" only the director and the actor
+    films = [(f"tt{n}", f"Loud Film {n}", "nm3") for n in range(1, 8)] + [("tt8", "Quiet Harbor", "\\N")]
+    tsv = {
+        "title.basics": ["tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear"]
+        + [f"{t}\tmovie\t{title}\t{title}\t0\t2001" for t, title, _ in films],
+        "name.basics": ["nconst\tprimaryName"] + [f"{n}\t{name}" for n, name in PEOPLE.items()],
+        "title.crew": ["tconst\tdirectors\twriters"]
+        + [f"{t}\tnm1\t{writers}" for t, _, writers in films],
+        "title.principals": ["tconst\tordering\tnconst\tcategory"] + [f"{t}\t1\tnm2\tactor" for t, _, _ in films],
+    }
+    for name, lines in tsv.items():
+        (tmp_path / f"{name}.tsv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    build_index(tmp_path / "titles.sqlite3", tmp_path)
+    idx = TitleIndex(tmp_path / "titles.sqlite3")
+    yield idx
+    idx.close()
+
+
+CREDITS = {"Directed by": ["Dora Director"], "Starring": ["Arlo Actor"], "Written by": ["Wendy Writer"]}
+
+
+def test_without_a_title_only_the_best_credit_matches_are_kept(index):
+    found = index.lookup(CREDITS)
+    assert len(found.candidates) == 5
+    assert "Quiet Harbor (2001)" not in [c.guess for c in found.candidates]
+
+
+def test_title_key_lifts_a_low_ranked_candidate(index):
+    found = index.lookup({**CREDITS, "Title": ["QUIET HARBOR"]})
+    assert found.candidates[0].guess == "Quiet Harbor (2001)"
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+import pytest
+
+from rollcall.config import QueueConfig
+from rollcall.workqueue import BUSY, CLAIMED, DONE, GONE, WorkQueue
+
+LEASE_SEC = 60.0
+
+
+@pytest.fixture
+def library(tmp_path):
+    (tmp_path / "film.mkv").write_bytes(b"media")
+    return tmp_path
+
+
+@pytest.fixture
+def workers(library):
+    opened = []
+
+    def make(name, **kw):
+        q = WorkQueue(library, QueueConfig(enabled=True, worker=name, lease_sec=LEASE_SEC), **kw)
+        opened.append(q)
+        return q
+
+    yield make
+    for q in opened:
+        q.close()
+
+
+def _expire(q, path):
+    lease = q._file("leases", q.key(path))
+    old = time.time() - 2 * LEASE_SEC
+    os.utime(lease, (old, old))
+    return lease
+
+
+def _race(queues, path):
+    start = threading.Barrier(len(queues))
+    results = [None] * len(queues)
+
+    def run(i):
+        start.wait()
+        results[i] = queues[i].try_claim(path)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(queues))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_one_of_two_claimers_gets_the_file(library, workers):
+    path = library / "film.mkv"
+    a, b = workers("a"), workers("b")
+    assert a.try_claim(path) == CLAIMED
+    assert b.try_claim(path) == BUSY
+    assert a.held(path) and not b.held(path)
+
+
+def test_concurrent_claimers_get_one_lease(library, workers):
+    path = library / "film.mkv"
+    results = _race([workers(f"w{i}") for i in range(8)], path)
+    assert results.count(CLAIMED) == 1 and results.count(BUSY) == 7
+
+
+def test_missing_file_is_gone(library, workers):
+    assert workers("a").try_claim(library / "other.mkv") == GONE
+
+
+def test_expired_lease_is_taken_over_by_exactly_one_worker(library, workers):
+    path = library / "film.mkv"
+    dead = workers("dead")
+    assert dead.try_claim(path) == CLAIMED
+    _expire(dead, path)
+    takers = [workers(f"w{i}") for i in range(6)]
+    results = _race(takers, path)
+    assert results.count(CLAIMED) == 1 and results.count(BUSY) == 5
+    assert sum(q.counts["reclaimed"] for q in takers) == 1
+    assert not dead.held(path)
+
+
+def test_renewed_lease_is_handed_back(library, workers):
+    path = library / "film.mkv"
+    owner, taker = workers("owner"), workers("taker")
+    assert owner.try_claim(path) == CLAIMED
+    lease = owner._file("leases", owner.key(path))
+    # the owner renewed it between the taker's look and its rename
+    assert taker._take_over(lease, LEASE_SEC) is False
+    assert owner.held(path)
+    assert not list(lease.parent.glob("*.stale"))
+
+
+def test_stale_lease_loses_the_rename(library, workers):
+    path = library / "film.mkv"
+    dead, first, second = workers("dead"), workers("first"), workers("second")
+    assert dead.try_claim(path) == CLAIMED
+    lease = _expire(dead, path)
+    assert first._take_over(lease, LEASE_SEC) is True
+    assert second._take_over(lease, LEASE_SEC) is False  # already moved aside by `first`
+    assert first.try_claim(path) == CLAIMED
+    assert second.try_claim(path) == BUSY
+    # the old owner neither holds it nor removes the new lease when it finishes
+    assert not dead.held(path)
+    dead.finish(path, "renamed", guess="Film (1999)")
+    assert lease.exists() and first.held(path)
+
+
+def _finish_then_look(workers, outcome, guess, path):
+    a, same_run = workers("a"), workers("b")
+    assert a.try_claim(path) == CLAIMED
+    a.finish(path, outcome, guess=guess)
+    time.sleep(0.01)
+    return same_run.try_claim(path), workers("next-run").try_claim(path)
+
+
+@pytest.mark.parametrize("outcome, guess", [
+    ("failed", None),
+    ("unchanged", "UNKNOWN_TITLE"),
+    ("unchanged", None),
+])
+def test_failed_and_untitled_files_are_retried_by_the_next_run_only(library, workers, outcome, guess):
+    assert _finish_then_look(workers, outcome, guess, library / "film.mkv") == (DONE, CLAIMED)
+
+
+@pytest.mark.parametrize("outcome, guess", [
+    ("unchanged", "Film (1999)"),  # already named for its title
+    ("skipped", None),
+])
+def test_finished_files_stay_done(library, workers, outcome, guess):
+    assert _finish_then_look(workers, outcome, guess, library / "film.mkv") == (DONE, DONE)
+
+
+def test_renamed_file_is_done_under_its_new_name(library, workers):
+    path, new = library / "film.mkv", library / "Film (1999).mkv"
+    a = workers("a")
+    assert a.try_claim(path) == CLAIMED
+    path.rename(new)
+    a.finish(path, "renamed", guess="Film (1999)", renamed_to=new)
+    assert workers("b").try_claim(new) == DONE
+    assert workers("c").try_claim(path) == GONE
+
+
+def test_replaced_file_is_not_done(library, workers):
+    path = library / "film.mkv"
+    a = workers("a")
+    assert a.try_claim(path) == CLAIMED
+    a.finish(path, "unchanged", guess="Film (1999)")
+    path.write_bytes(b"a different file")
+    assert workers("b").try_claim(path) == CLAIMED
+
+
+def test_dry_run_tombstone_does_not_count_for_a_real_run(library, workers):
+    path = library / "film.mkv"
+    plan = workers("plan", dry_run=True)
+    assert plan.try_claim(path) == CLAIMED
+    plan.finish(path, "renamed", guess="Film (1999)")
+    assert workers("dry", dry_run=True).try_claim(path) == DONE
+    assert workers("real").try_claim(path) == CLAIMED